@@ -0,0 +1,183 @@
+"""
+Per-(repository, branch, day) totals backing the organization coverage chart.
+
+For every branch of every repository we keep, per day, the totals of the last
+complete commit of that day in a `DailyRollup`.  Every branch is kept so that a
+repository changing its default branch is charted from its new branch's history.
+The chart is then a cheap aggregate over the days of default branches: each
+repository contributes the totals of the last commit of every time window, carried
+forward through windows without commits or whose last commit has no totals, and the
+totals are summed across repositories.  Identical chart requests are cached under
+the versions of the rollups they're computed from.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import QuerySet
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import Commit
+from services.daily_rollups import DailyRollup, DailyValues, RepositoryBranch
+from utils.lru_cache import LRUCache
+
+TOTALS_FIELDS = ("h", "m", "p", "n")
+
+_GROUPING_STEPS = {
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "quarter": relativedelta(months=3),
+    "year": relativedelta(years=1),
+}
+
+# identical chart requests are served from here until one of the repositories changes
+_series_cache = LRUCache(maxsize=256, ttl=60 * 60)
+
+
+def truncate_date(value: date, grouping_unit: str) -> date:
+    """
+    Start of the time window `value` falls in, same as Postgres' DATE_TRUNC.
+    """
+    if grouping_unit == "week":
+        return value - timedelta(days=value.weekday())
+    if grouping_unit == "month":
+        return value.replace(day=1)
+    if grouping_unit == "quarter":
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if grouping_unit == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def _daily_totals(commits: QuerySet[Commit]) -> DailyValues:
+    # the last complete commit of every day of every branch.  Values are wrapped
+    # since commits without totals are kept too, their windows carry the previous
+    # totals forward
+    rows = (
+        commits.filter(state="complete", branch__isnull=False, timestamp__isnull=False)
+        .annotate(day=TruncDate("timestamp", tzinfo=timezone.utc))
+        .order_by("repository_id", "branch", "day", "-timestamp")
+        .distinct("repository_id", "branch", "day")
+        .values_list("repository_id", "branch", "day", "totals")
+    )
+    for repoid, branch, day, totals in rows.iterator():
+        if totals is not None:
+            totals = {field: totals.get(field) for field in TOTALS_FIELDS}
+        yield repoid, branch, day, {"totals": totals}
+
+
+chart_totals_rollup = DailyRollup("chart_totals", _daily_totals)
+
+
+def _as_decimal(value) -> Decimal:
+    # totals missing a field don't contribute to its sum, like SQL's SUM
+    return Decimal(str(value)) if value is not None else Decimal(0)
+
+
+def _series(
+    daily_totals: Dict[int, List[Tuple[date, Optional[dict]]]],
+    grouping_unit: str,
+    start_date: Optional[date],
+    end_date: date,
+) -> List[dict]:
+    first_date = min(
+        (days[0][0] for days in daily_totals.values() if days), default=None
+    )
+    if first_date is None:
+        return []
+    first_date = truncate_date(first_date, grouping_unit)
+
+    # last commit totals of every time window, by window
+    windows: Dict[date, Dict[int, Optional[dict]]] = defaultdict(dict)
+    for repoid, days in daily_totals.items():
+        for day, totals in days:
+            windows[truncate_date(day, grouping_unit)][repoid] = totals
+
+    step = _GROUPING_STEPS[grouping_unit]
+    carried: Dict[int, Tuple[Decimal, ...]] = {}
+    sums = [Decimal(0)] * len(TOTALS_FIELDS)
+    series = []
+    window = first_date
+    while window <= end_date:
+        for repoid, totals in windows.get(window, {}).items():
+            # windows whose last commit has no totals carry the previous ones forward
+            if totals is None:
+                continue
+            values = tuple(_as_decimal(totals.get(field)) for field in TOTALS_FIELDS)
+            previous = carried.get(repoid, (Decimal(0),) * len(TOTALS_FIELDS))
+            sums = [
+                total - old + new for total, old, new in zip(sums, previous, values)
+            ]
+            carried[repoid] = values
+        hits, misses, partials, lines = sums
+
+        series.append(
+            {
+                "date": datetime.combine(window, datetime.min.time(), timezone.utc),
+                "total_hits": hits,
+                "total_misses": misses,
+                "total_partials": partials,
+                "total_lines": lines,
+                "coverage": (
+                    ((hits + partials) / lines * 100).quantize(
+                        Decimal("0.01"), rounding=ROUND_HALF_UP
+                    )
+                    if lines
+                    else None
+                ),
+            }
+        )
+        window += step
+
+    if start_date is not None:
+        start_window = truncate_date(start_date, grouping_unit)
+        series = [point for point in series if point["date"].date() >= start_window]
+    return series
+
+
+def organization_chart_series(
+    branches: Iterable[RepositoryBranch],
+    grouping_unit: str,
+    start_date: Optional[date],
+    end_date: date,
+    descending: bool = False,
+) -> Optional[List[dict]]:
+    """
+    Same results as `ChartQueryRunner.run_query` for the default `branches` of the
+    given repositories, computed from their daily totals, or None if some of them
+    don't have up to date daily totals yet.  Starts at the first time window with
+    a complete commit if `start_date` isn't given.
+    """
+    branches = sorted(branches)
+    versions = chart_totals_rollup.versions(branches)
+    if versions is None:
+        return None
+
+    cache_key = (
+        tuple(branches),
+        tuple(versions),
+        grouping_unit,
+        start_date,
+        end_date,
+    )
+    series = _series_cache.get(cache_key)
+    if series is None:
+        days = chart_totals_rollup.days(branches)
+        if days is None:
+            return None
+        daily_totals = {
+            repoid: sorted(
+                (day, value["totals"]) for day, value in days[(repoid, branch)].items()
+            )
+            for repoid, branch in branches
+        }
+        series = _series(daily_totals, grouping_unit, start_date, end_date)
+        _series_cache.set(cache_key, series)
+
+    series = [dict(point) for point in series]
+    return series[::-1] if descending else series
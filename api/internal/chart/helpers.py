@@ -1,18 +1,25 @@
+import logging
 from datetime import datetime
 
 from cerberus import Validator
 from dateutil import parser
-from django.db import connection
+from django.conf import settings
 from django.db.models import Case, FloatField, Value, When
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Trunc
 from django.utils import timezone
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from rest_framework.exceptions import ValidationError
 
+from codecov.db.queries import queries
 from codecov_auth.models import Owner
 from core.models import Repository
 
+from .daily_totals import organization_chart_series
+
+log = logging.getLogger(__name__)
+
 
 class ChartParamValidator(Validator):
     # Custom validation rule to require "agg_value" and "agg_function" fields only when not grouping by commit.
@@ -133,6 +140,147 @@ def apply_grouping(queryset, data):
     # should be the one with the min/max value we want to aggregate by
 
 
+FIRST_COMPLETE_COMMIT_DATE_QUERY = queries.register(
+    "chart.first_complete_commit_date",
+    """
+    SELECT
+        DATE_TRUNC(%(grouping_unit)s, c.timestamp AT TIME ZONE 'UTC') as truncated_date
+    FROM commits c
+    INNER JOIN repos r ON c.repoid = r.repoid AND c.branch = r.branch
+    WHERE r.repoid = ANY(%(repoids)s::integer[])
+        AND c.state = 'complete'
+    ORDER BY c.timestamp ASC LIMIT 1
+    """,
+    {"repoids": "integer[]", "grouping_unit": "text"},
+)
+
+ORGANIZATION_COVERAGE_QUERY = queries.register(
+    "chart.organization_coverage",
+    """
+    WITH date_series AS (
+        SELECT
+            t::date AS "date"
+        FROM generate_series(
+            %(first_date)s::timestamp,
+            %(end_date)s::timestamp,
+            %(interval)s::interval
+        ) t
+    ), graph_repos AS (
+        SELECT
+            r.repoid,
+            r.name,
+            r.branch
+        FROM
+            repos r
+        WHERE r.repoid = ANY(%(repoids)s::integer[])
+    ), spine AS (
+        SELECT
+            ds.date,
+            r.repoid
+        FROM date_series ds
+        CROSS JOIN graph_repos r
+    ), t_ranked_commits AS (
+        SELECT
+            ROW_NUMBER() OVER (
+                PARTITION BY c.repoid, DATE_TRUNC(%(grouping_unit)s, c.timestamp)
+                ORDER BY timestamp DESC NULLS LAST
+            ) AS commit_rank,
+            DATE_TRUNC(%(grouping_unit)s, c.timestamp) AS "truncated_date",
+            c.timestamp AS commit_timestamp,
+            c.totals,
+            r.repoid
+        FROM
+            commits c
+        INNER JOIN graph_repos r ON r.repoid = c.repoid
+            AND r.branch = c.branch
+            AND c.state = 'complete'
+    ), commits_spine AS (
+        SELECT
+            s.date AS spine_date,
+            trc.truncated_date AS truncated_commit_date,
+            trc.commit_timestamp,
+            trc.totals AS totals,
+            s.repoid
+        FROM spine s
+        LEFT JOIN t_ranked_commits trc ON trc.truncated_date = s.date
+          AND trc.repoid = s.repoid
+          AND trc.commit_rank = 1
+    ), grouped AS (
+        SELECT
+            spine_date,
+            truncated_commit_date,
+            totals,
+            repoid,
+            SUM(CASE
+                WHEN totals IS NOT NULL THEN 1 END
+            ) OVER (
+                PARTITION BY repoid
+                ORDER BY spine_date
+            ) AS grp_commit
+        FROM commits_spine
+    ), corrected AS (
+        SELECT
+            spine_date,
+            FIRST_VALUE(totals) OVER (
+                PARTITION BY repoid, grp_commit
+                ORDER BY spine_date
+            ) AS corrected_totals
+        FROM
+            grouped
+    ), parsed_totals AS (
+        SELECT
+            spine_date,
+            (CASE
+                WHEN corrected_totals IS NOT NULL then (corrected_totals->>'h')::numeric
+                WHEN corrected_totals IS NULL then 0 END
+            ) as hits,
+            (CASE
+                WHEN corrected_totals IS NOT NULL then (corrected_totals->>'m')::numeric
+                WHEN corrected_totals IS NULL then 0 END
+            ) as misses,
+            (CASE
+                WHEN corrected_totals IS NOT NULL then (corrected_totals->>'p')::numeric
+                WHEN corrected_totals IS NULL then 0 END
+            ) as partials,
+            (CASE
+                WHEN corrected_totals IS NOT NULL then (corrected_totals->>'n')::numeric
+                WHEN corrected_totals IS NULL then 0 END
+            ) as lines
+        FROM
+            corrected
+    ), summed_totals AS (
+        SELECT
+            spine_date::timestamp at time zone 'UTC' AS date,
+            SUM(hits) AS total_hits,
+            SUM(misses) AS total_misses,
+            SUM(partials) AS total_partials,
+            SUM(lines) AS total_lines,
+            ROUND((SUM(hits) + SUM(partials)) / SUM(lines) * 100, 2) AS coverage
+        FROM
+            parsed_totals
+        GROUP BY spine_date
+    )
+
+    SELECT
+        *
+    FROM summed_totals
+    WHERE "date" >= DATE_TRUNC(%(grouping_unit)s, %(start_date)s::timestamp)
+    ORDER BY
+        CASE WHEN %(descending)s THEN "date" END DESC,
+        "date"
+    """,
+    {
+        "repoids": "integer[]",
+        "grouping_unit": "text",
+        "interval": "interval",
+        "first_date": "timestamp",
+        "start_date": "timestamp",
+        "end_date": "timestamp",
+        "descending": "boolean",
+    },
+)
+
+
 class ChartQueryRunner:
     """
     Houses the SQL query that retrieves data for analytics chart, and
@@ -144,14 +292,6 @@ class ChartQueryRunner:
         self.request_params = request_params
         self._validate_parameters()
 
-    def _dictfetchall(self, cursor):
-        """
-        Return all rows from a cursor as a dict
-        Copied from: https://docs.djangoproject.com/en/3.1/topics/db/sql/#executing-custom-sql-directly
-        """
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-
     @property
     def start_date(self):
         """
@@ -197,9 +337,9 @@ class ChartQueryRunner:
         return ""
 
     @cached_property
-    def repoids(self):
+    def repository_branches(self):
         """
-        Returns a string of repoids of the repositories being queried.
+        Returns the (repoid, default branch) of the repositories being queried.
         """
         organization = Owner.objects.get(
             service=self.request_params["service"],
@@ -215,11 +355,17 @@ class ChartQueryRunner:
         if self.request_params.get("repositories", []):
             repos = repos.filter(name__in=self.request_params.get("repositories", []))
 
-        if repos:
-            # Get repoids into a format easily plugged into raw SQL
+        return list(repos.values_list("repoid", "branch"))
+
+    @cached_property
+    def repoids(self):
+        """
+        Returns a string of repoids of the repositories being queried.
+        """
+        if self.repository_branches:
             return (
                 "("
-                + ",".join(map(str, list(repos.values_list("repoid", flat=True))))
+                + ",".join(str(repoid) for repoid, _ in self.repository_branches)
                 + ")"
             )
 
@@ -229,26 +375,12 @@ class ChartQueryRunner:
         Date of first commit made to any repo in 'self.repoids'. Used as initial
         date for date_spine query.
         """
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f"""
-                WITH relevant_repo_branches AS (
-                    SELECT
-                        r.repoid,
-                        r.branch
-                    FROM repos r
-                    WHERE r.repoid IN {self.repoids}
-                )
-
-                SELECT
-                    DATE_TRUNC('{self.grouping_unit}', c.timestamp AT TIME ZONE 'UTC') as truncated_date
-                FROM commits c
-                INNER JOIN relevant_repo_branches r ON c.repoid = r.repoid AND c.branch = r.branch
-                WHERE c.state = 'complete'
-                ORDER BY c.timestamp ASC LIMIT 1;
-                """
-            )
-            date = self._dictfetchall(cursor)
+        date = FIRST_COMPLETE_COMMIT_DATE_QUERY.execute(
+            {
+                "repoids": [repoid for repoid, _ in self.repository_branches],
+                "grouping_unit": self.grouping_unit,
+            }
+        )
 
         if date:
             return datetime.date(date[0]["truncated_date"])
@@ -287,122 +419,43 @@ class ChartQueryRunner:
         # Edge cases -- no repos or no commits
         if not self.repoids:
             return []
-        if not self.first_complete_commit_date:
-            return []
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f"""
-                WITH date_series AS (
-                    SELECT
-                        t::date AS "date"
-                    FROM generate_series(
-                        timestamp '{self.first_complete_commit_date}',
-                        timestamp '{self.end_date}',
-                        '{self.interval}'
-                    ) t
-                ), graph_repos AS (
-                    SELECT
-                        r.repoid,
-                        r.name,
-                        r.branch
-                    FROM
-                        repos r
-                    WHERE r.repoid IN {self.repoids}
-                ), spine AS (
-                    SELECT
-                        ds.date,
-                        r.repoid
-                    FROM date_series ds
-                    CROSS JOIN graph_repos r
-                ), t_ranked_commits AS (
-                    SELECT
-                        ROW_NUMBER() OVER (
-                            PARTITION BY c.repoid, DATE_TRUNC('{self.grouping_unit}', c.timestamp)
-                            ORDER BY timestamp DESC NULLS LAST
-                        ) AS commit_rank,
-                        DATE_TRUNC('{self.grouping_unit}', c.timestamp) AS "truncated_date",
-                        c.timestamp AS commit_timestamp,
-                        c.totals,
-                        r.repoid
-                    FROM
-                        commits c
-                    INNER JOIN graph_repos r ON r.repoid = c.repoid
-                        AND r.branch = c.branch
-                        AND c.state = 'complete'
-                ), commits_spine AS (
-                    SELECT
-                        s.date AS spine_date,
-                        trc.truncated_date AS truncated_commit_date,
-                        trc.commit_timestamp,
-                        trc.totals AS totals,
-                        s.repoid
-                    FROM spine s
-                    LEFT JOIN t_ranked_commits trc ON trc.truncated_date = s.date
-                      AND trc.repoid = s.repoid
-                      AND trc.commit_rank = 1
-                ), grouped AS (
-                    SELECT
-                        spine_date,
-                        truncated_commit_date,
-                        totals,
-                        repoid,
-                        SUM(CASE
-                            WHEN totals IS NOT NULL THEN 1 END
-                        ) OVER (
-                            PARTITION BY repoid
-                            ORDER BY spine_date
-                        ) AS grp_commit
-                    FROM commits_spine
-                ), corrected AS (
-                    SELECT
-                        spine_date,
-                        FIRST_VALUE(totals) OVER (
-                            PARTITION BY repoid, grp_commit
-                            ORDER BY spine_date
-                        ) AS corrected_totals
-                    FROM
-                        grouped
-                ), parsed_totals AS (
-                    SELECT
-                        spine_date,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'h')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as hits,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'m')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as misses,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'p')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as partials,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'n')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as lines
-                    FROM
-                        corrected
-                ), summed_totals AS (
-                    SELECT
-                        spine_date::timestamp at time zone 'UTC' AS date,
-                        SUM(hits) AS total_hits,
-                        SUM(misses) AS total_misses,
-                        SUM(partials) AS total_partials,
-                        SUM(lines) AS total_lines,
-                        ROUND((SUM(hits) + SUM(partials)) / SUM(lines) * 100, 2) AS coverage
-                    FROM
-                        parsed_totals
-                    GROUP BY spine_date
-                    ORDER BY spine_date {self.ordering}
-                )
-
-                SELECT
-                    *
-                FROM summed_totals
-                WHERE date >= DATE_TRUNC('{self.grouping_unit}', timestamp '{self.start_date}');
-                """
+        if not settings.DAILY_ROLLUPS_ENABLED:
+            return self._run_commits_query()
+
+        try:
+            series = organization_chart_series(
+                self.repository_branches,
+                grouping_unit=self.grouping_unit,
+                start_date=(
+                    self.start_date if "start_date" in self.request_params else None
+                ),
+                end_date=self.end_date,
+                descending=self.ordering == "DESC",
+            )
+            if series is not None:
+                return series
+        except RedisError:
+            log.warning(
+                "Error reading organization chart daily totals, querying commits",
+                extra=dict(repoids=self.repoids),
+                exc_info=True,
             )
 
-            return self._dictfetchall(cursor)
+        return self._run_commits_query()
+
+    def _run_commits_query(self):
+        if not self.first_complete_commit_date:
+            return []
+
+        return ORGANIZATION_COVERAGE_QUERY.execute(
+            {
+                "repoids": [repoid for repoid, _ in self.repository_branches],
+                "grouping_unit": self.grouping_unit,
+                "interval": self.interval,
+                "first_date": self.first_complete_commit_date,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                "descending": self.ordering == "DESC",
+            }
+        )
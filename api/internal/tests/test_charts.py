@@ -4,12 +4,14 @@ from math import isclose
 from random import randint
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from dateutil.relativedelta import relativedelta
 from django.test import TestCase, override_settings
 from django.utils import timezone
 from factory.faker import faker
 from pytz import UTC
+from redis.exceptions import RedisError
 from rest_framework.exceptions import ValidationError
 from rest_framework.reverse import reverse
 from shared.django_apps.core.tests.factories import (
@@ -18,6 +20,8 @@ from shared.django_apps.core.tests.factories import (
     RepositoryFactory,
 )
 
+from api.internal.chart import daily_totals
+from api.internal.chart.daily_totals import _series_cache, chart_totals_rollup
 from api.internal.chart.filters import apply_default_filters, apply_simple_filters
 from api.internal.chart.helpers import (
     ChartQueryRunner,
@@ -505,12 +509,19 @@ class CoverageChartHelpersTest(TestCase):
                 assert results[i]["timestamp"] > results[i + 1]["timestamp"]
 
 
+@override_settings(DAILY_ROLLUPS_ENABLED=True)
 class TestChartQueryRunnerQuery(TestCase):
     """
     Tests for the querying-part of the ChartQueryRunner.
     """
 
     def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("services.daily_rollups.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        _series_cache.clear()
+
         self.org = OwnerFactory()
         self.repo1 = RepositoryFactory(author=self.org, active=True)
         self.repo2 = RepositoryFactory(author=self.org, active=True)
@@ -669,6 +680,160 @@ class TestChartQueryRunnerQuery(TestCase):
                 },
             ).run_query()
 
+    def _query_runner(self, **params):
+        return ChartQueryRunner(
+            user=self.user,
+            request_params={
+                "owner_username": self.org.username,
+                "service": self.org.service,
+                **params,
+            },
+        )
+
+    def test_query_matches_commits_query(self):
+        for repo, timestamp, totals in [
+            (self.repo1, datetime(2024, 1, 1, 10), {"h": 5, "n": 10, "p": 1, "m": 4}),
+            (self.repo1, datetime(2024, 1, 1, 12), {"h": 6, "n": 10, "p": 1, "m": 3}),
+            (self.repo1, datetime(2024, 1, 20, 9), None),
+            (self.repo2, datetime(2024, 1, 9, 8), {"h": 7, "n": 9, "p": 0, "m": 2}),
+            (self.repo2, datetime(2024, 1, 10, 8), None),
+            (self.repo1, datetime(2024, 2, 14, 1), {"h": 8, "n": 10, "p": 2, "m": 0}),
+            (self.repo2, datetime(2024, 3, 2, 23), {"h": 1, "n": 9, "p": 0, "m": 8}),
+        ]:
+            CommitFactory(
+                repository=repo,
+                branch=repo.branch,
+                state="complete",
+                timestamp=timestamp.replace(tzinfo=UTC),
+                totals=totals,
+            )
+        CommitFactory(
+            repository=self.repo1,
+            branch=self.repo1.branch,
+            state="pending",
+            timestamp=datetime(2024, 2, 20, tzinfo=UTC),
+            totals={"h": 0, "n": 10, "p": 0, "m": 10},
+        )
+        self.commit1.delete()
+        self.commit2.delete()
+        # reads before the first refresh query commits
+        self._query_runner(grouping_unit="day").run_query()
+        chart_totals_rollup.refresh()
+
+        for grouping_unit in ["day", "week", "month", "quarter", "year"]:
+            for params in [
+                {},
+                {"start_date": "2024-01-15"},
+                {"coverage_timestamp_ordering": "decreasing"},
+            ]:
+                with self.subTest(grouping_unit=grouping_unit, **params):
+                    query_runner = self._query_runner(
+                        grouping_unit=grouping_unit, end_date="2024-03-31", **params
+                    )
+                    assert query_runner.run_query() == (
+                        query_runner._run_commits_query()
+                    )
+
+    def test_query_follows_default_branch_changes(self):
+        for branch, timestamp, totals in [
+            (
+                self.repo1.branch,
+                datetime(2024, 1, 1),
+                {"h": 5, "n": 10, "p": 1, "m": 4},
+            ),
+            ("feature", datetime(2024, 1, 2), {"h": 9, "n": 10, "p": 0, "m": 1}),
+            ("feature", datetime(2024, 1, 3), None),
+        ]:
+            CommitFactory(
+                repository=self.repo1,
+                branch=branch,
+                state="complete",
+                timestamp=timestamp.replace(tzinfo=UTC),
+                totals=totals,
+            )
+        self.commit1.delete()
+        self.commit2.delete()
+        self._query_runner(grouping_unit="day").run_query()
+        chart_totals_rollup.refresh()
+
+        self.repo1.branch = "feature"
+        self.repo1.save()
+        chart_totals_rollup.refresh()
+
+        assert chart_totals_rollup.days([(self.repo1.repoid, "feature")]) is not None
+        query_runner = self._query_runner(grouping_unit="day", end_date="2024-01-05")
+        results = query_runner.run_query()
+        assert results == query_runner._run_commits_query()
+        assert [point["total_hits"] for point in results] == [9, 9, 9, 9]
+
+    @override_settings(DAILY_ROLLUPS_ENABLED=False)
+    def test_query_disabled(self):
+        results = self._query_runner(
+            grouping_unit="day", end_date=str(timezone.now())
+        ).run_query()
+
+        assert results[0]["total_hits"] == 114
+        assert self.redis.keys("daily_rollup:*") == []
+
+    def _refresh_commit(self, commit):
+        Commit.objects.filter(pk=commit.pk).update(updatestamp=timezone.now())
+        chart_totals_rollup.refresh()
+
+    def test_query_refreshes_completed_commits(self):
+        self._query_runner(grouping_unit="day").run_query()
+        chart_totals_rollup.refresh()
+
+        commit = CommitFactory(
+            repository=self.repo1,
+            branch=self.repo1.branch,
+            state="complete",
+            timestamp=timezone.now() + timedelta(seconds=1),
+            totals={"h": 0, "n": 120, "p": 0, "m": 120},
+        )
+        results = self._query_runner(grouping_unit="day").run_query()
+        assert results[-1]["total_hits"] == 114
+        assert results[-1]["total_lines"] == 145
+
+        self._refresh_commit(commit)
+        results = self._query_runner(grouping_unit="day").run_query()
+        assert results[-1]["total_hits"] == 14
+        assert results[-1]["total_lines"] == 145
+
+    def test_query_caches_identical_requests(self):
+        self._query_runner(grouping_unit="day").run_query()
+        chart_totals_rollup.refresh()
+
+        with patch(
+            "api.internal.chart.daily_totals._series",
+            wraps=daily_totals._series,
+        ) as series:
+            first = self._query_runner(grouping_unit="day").run_query()
+            second = self._query_runner(grouping_unit="day").run_query()
+            assert series.call_count == 1
+            assert first == second
+
+            commit = CommitFactory(
+                repository=self.repo2,
+                branch=self.repo2.branch,
+                state="complete",
+                timestamp=timezone.now() + timedelta(seconds=1),
+            )
+            self._refresh_commit(commit)
+            self._query_runner(grouping_unit="day").run_query()
+            assert series.call_count == 2
+
+    @patch("api.internal.chart.helpers.organization_chart_series")
+    def test_query_falls_back_to_commits_query(self, organization_chart_series):
+        organization_chart_series.side_effect = RedisError
+
+        results = self._query_runner(
+            grouping_unit="day", end_date=str(timezone.now())
+        ).run_query()
+
+        assert len(results) == 1
+        assert results[0]["total_hits"] == 114
+        assert results[0]["total_lines"] == 145
+
 
 class TestChartQueryRunnerHelperMethods(TestCase):
     """
@@ -945,6 +1110,13 @@ class RepositoryCoverageChartTest(InternalAPITest):
 
 class TestOrganizationChartHandler(InternalAPITest):
     def setUp(self):
+        redis_patcher = patch(
+            "services.daily_rollups.redis", fakeredis.FakeStrictRedis()
+        )
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        _series_cache.clear()
+
         self.org = OwnerFactory()
         self.repo1 = RepositoryFactory(author=self.org, active=True)
         self.repo2 = RepositoryFactory(author=self.org, active=True)
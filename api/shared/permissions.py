@@ -16,6 +16,7 @@ from codecov_auth.models import Owner
 from core.models import Repository
 from services.activation import try_auto_activate
 from services.decorators import torngit_safe
+from services.permission_cache import ADMIN, REPOSITORY, cached_permission
 from services.repo_providers import get_generic_adapter_params, get_provider
 
 log = logging.getLogger(__name__)
@@ -28,13 +29,25 @@ class RepositoryPermissionsService:
     ) -> Tuple[bool, bool]:
         can_view, can_edit = RepoAccessors().get_repo_permissions(owner, repo)
 
-        if can_view:
+        if can_view and repo.repoid not in (owner.permission or []):
             owner.permission = owner.permission or []
             owner.permission.append(repo.repoid)
             owner.save(update_fields=["permission"])
 
         return can_view, can_edit
 
+    def _provider_permissions(
+        self, owner: Owner, repo: Repository
+    ) -> Tuple[bool, bool]:
+        can_view, can_edit = cached_permission(
+            owner.ownerid,
+            REPOSITORY,
+            repo.repoid,
+            lambda: self._fetch_provider_permissions(owner, repo),
+            granted=lambda permissions: permissions[0],
+        )
+        return can_view, can_edit
+
     def has_read_permissions(self, owner: Owner, repo: Repository) -> bool:
         return not repo.private or (
             owner is not None
@@ -42,14 +55,14 @@ class RepositoryPermissionsService:
                 repo.author.ownerid == owner.ownerid
                 or owner.permission
                 and repo.repoid in owner.permission
-                or self._fetch_provider_permissions(owner, repo)[0]
+                or self._provider_permissions(owner, repo)[0]
             )
         )
 
     def has_write_permissions(self, user: Owner, repo: Repository) -> bool:
         return user.is_authenticated and (
             repo.author.ownerid == user.ownerid
-            or self._fetch_provider_permissions(user, repo)[1]
+            or self._provider_permissions(user, repo)[1]
         )
 
     def user_is_activated(self, current_owner: Owner, owner: Owner) -> bool:
@@ -140,8 +153,7 @@ class ChartPermissions(BasePermission):
         return True
 
 
-@torngit_safe
-def is_admin_on_provider(current_user: Owner, owner: Owner) -> bool:
+def _fetch_is_admin_on_provider(current_user: Owner, owner: Owner) -> bool:
     torngit_provider_adapter = get_provider(
         owner.service,
         {
@@ -155,6 +167,16 @@ def is_admin_on_provider(current_user: Owner, owner: Owner) -> bool:
     )
 
 
+@torngit_safe
+def is_admin_on_provider(current_user: Owner, owner: Owner) -> bool:
+    return cached_permission(
+        current_user.ownerid,
+        ADMIN,
+        owner.ownerid,
+        lambda: _fetch_is_admin_on_provider(current_user, owner),
+    )
+
+
 class UserIsAdminPermissions(BasePermission):
     """
     Permissions class for asserting the user is an admin of the 'owner'
@@ -0,0 +1,220 @@
+"""
+Registry of the hot raw SQL statements executed by the API.
+
+Registered statements are written once with named `%(param)s` placeholders and
+explicit casts, so Postgres sees the same statement text on every request no
+matter which repositories or dates it's for.  When
+`DATABASE_PREPARED_STATEMENTS_ENABLED` is set they're also executed as server-side
+prepared statements, prepared once per database connection so that their plans
+can be reused.
+
+Every execution is timed and counted per statement, both as Prometheus metrics
+and in `QueryRegistry.stats`.
+"""
+
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.query import RawQuerySet
+from django.db.models.sql.query import RawQuery
+from shared.metrics import Counter, Histogram, inc_counter
+
+REGISTERED_QUERY_LATENCIES = Histogram(
+    "api_db_registered_query_runtime_seconds",
+    "Runtime in seconds of registered raw SQL statements",
+    ["query"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10],
+)
+
+REGISTERED_QUERY_PLAN_CACHE_COUNTER = Counter(
+    "api_db_registered_query_plan_cache",
+    "Executions of registered raw SQL statements by prepared plan cache result",
+    ["query", "result"],
+)
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+
+@dataclass
+class QueryStats:
+    executions: int = 0
+    prepares: int = 0
+    plan_cache_hits: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def plan_cache_hit_rate(self) -> Optional[float]:
+        if not self.executions:
+            return None
+        return self.plan_cache_hits / self.executions
+
+    @property
+    def mean_seconds(self) -> Optional[float]:
+        if not self.executions:
+            return None
+        return self.total_seconds / self.executions
+
+
+class RegisteredQuery:
+    """
+    A raw SQL statement with named, typed parameters.  `param_types` maps every
+    parameter name to its Postgres type, in the order they're declared when the
+    statement is prepared.  Statements that can't be prepared (e.g. `CALL`) are
+    registered with `prepare=False` and only get their executions recorded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sql: str,
+        param_types: Mapping[str, str],
+        prepare: bool = True,
+    ):
+        self.name = name
+        self.sql = sql
+        self.param_types = dict(param_types)
+        self.prepare = prepare
+        self.statement_name = "api_" + re.sub(r"\W", "_", name)
+
+        positions = {param: i for i, param in enumerate(self.param_types, start=1)}
+        self.prepared_sql = _PLACEHOLDER.sub(
+            lambda match: f"${positions[match.group(1)]}", sql
+        ).replace("%%", "%")
+
+        self.stats = QueryStats()
+        self._lock = threading.Lock()
+        # raw database connections the statement has been prepared on
+        self._prepared_on: weakref.WeakSet = weakref.WeakSet()
+
+    def statement(self, using: str, params: Mapping[str, Any]) -> Tuple[str, Any, str]:
+        """
+        The SQL and parameters to execute for `params` on the `using` database,
+        preparing the statement on its connection first if needed.  Also returns
+        whether that was a plan cache "hit", a "miss" or "unprepared".
+        """
+        missing = self.param_types.keys() - params.keys()
+        if missing:
+            raise ValueError(f"Missing parameters for {self.name}: {sorted(missing)}")
+
+        if not (self.prepare and settings.DATABASE_PREPARED_STATEMENTS_ENABLED):
+            return self.sql, params, "unprepared"
+
+        connection = connections[using]
+        connection.ensure_connection()
+        values = [params[param] for param in self.param_types]
+        execute = f"EXECUTE {self.statement_name}"
+        if values:
+            execute += "(" + ", ".join(["%s"] * len(values)) + ")"
+
+        if connection.connection in self._prepared_on:
+            return execute, values, "hit"
+
+        types = ", ".join(self.param_types.values())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"PREPARE {self.statement_name}"
+                + (f"({types})" if types else "")
+                + f" AS {self.prepared_sql}"
+            )
+        self._prepared_on.add(connection.connection)
+        return execute, values, "miss"
+
+    def record(self, result: str, seconds: float) -> None:
+        with self._lock:
+            self.stats.executions += 1
+            self.stats.total_seconds += seconds
+            if result == "hit":
+                self.stats.plan_cache_hits += 1
+            elif result == "miss":
+                self.stats.prepares += 1
+
+        REGISTERED_QUERY_LATENCIES.labels(query=self.name).observe(seconds)
+        inc_counter(
+            REGISTERED_QUERY_PLAN_CACHE_COUNTER,
+            labels=dict(query=self.name, result=result),
+        )
+
+    def execute(
+        self, params: Mapping[str, Any], using: str = "default"
+    ) -> List[Dict[str, Any]]:
+        """
+        Executes the statement and returns all resulting rows as dicts.
+        """
+        sql, values, result = self.statement(using, params)
+        start = time.perf_counter()
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, values)
+            if cursor.description is None:
+                rows = []
+            else:
+                columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        self.record(result, time.perf_counter() - start)
+        return rows
+
+    def raw(
+        self, model, params: Mapping[str, Any], using: str = "default"
+    ) -> RawQuerySet:
+        """
+        Same as `model.objects.raw(...).using(using)` for the statement.
+        """
+        return RegisteredRawQuerySet(self, model, params, using)
+
+
+class RegisteredRawQuerySet(RawQuerySet):
+    def __init__(self, registered: RegisteredQuery, model, params, using: str):
+        super().__init__(registered.sql, model=model, params=params, using=using)
+        self.registered = registered
+
+    def iterator(self):
+        sql, values, result = self.registered.statement(self.db, self.params)
+        self.query = RawQuery(sql=sql, using=self.db, params=values)
+        start = time.perf_counter()
+        yield from super().iterator()
+        self.registered.record(result, time.perf_counter() - start)
+
+
+class QueryRegistry:
+    def __init__(self):
+        self._queries: Dict[str, RegisteredQuery] = {}
+
+    def register(
+        self,
+        name: str,
+        sql: str,
+        param_types: Optional[Mapping[str, str]] = None,
+        prepare: bool = True,
+    ) -> RegisteredQuery:
+        if name in self._queries:
+            raise ValueError(f"A query named {name} is already registered")
+        query = RegisteredQuery(name, sql, param_types or {}, prepare=prepare)
+        self._queries[name] = query
+        return query
+
+    def __getitem__(self, name: str) -> RegisteredQuery:
+        return self._queries[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-statement execution counts, latencies and plan cache hit rates.
+        """
+        return {
+            name: {
+                "executions": query.stats.executions,
+                "prepares": query.stats.prepares,
+                "plan_cache_hits": query.stats.plan_cache_hits,
+                "plan_cache_hit_rate": query.stats.plan_cache_hit_rate,
+                "total_seconds": query.stats.total_seconds,
+                "mean_seconds": query.stats.mean_seconds,
+            }
+            for name, query in self._queries.items()
+        }
+
+
+queries = QueryRegistry()
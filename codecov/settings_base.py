@@ -111,11 +111,50 @@ GRAPHQL_MAX_DEPTH = get_config("setup", "graphql", "max_depth", default=20)
 
 GRAPHQL_MAX_ALIASES = get_config("setup", "graphql", "max_aliases", default=10)
 
+# connections are counted exactly up to this many rows
+GRAPHQL_EXACT_COUNT_THRESHOLD = get_config(
+    "setup", "graphql", "exact_count_threshold", default=10000
+)
+
+# and report the planner estimate itself above this one
+GRAPHQL_ESTIMATED_COUNT_THRESHOLD = get_config(
+    "setup", "graphql", "estimated_count_threshold", default=1000000
+)
+
+# profiles the resolvers of every request, see `graphql_api.profiler`
+GRAPHQL_PROFILER_ENABLED = get_config(
+    "setup", "graphql", "profiler_enabled", default=False
+)
+
+# profiled requests running more database queries than this are logged
+GRAPHQL_QUERY_BUDGET = get_config("setup", "graphql", "query_budget", default=None)
+
+# and the budgets of specific operations, by operation name
+GRAPHQL_QUERY_BUDGETS = get_config("setup", "graphql", "query_budgets", default={})
+
+# shares the records of some DataLoaders across requests, see `graphql_api.dataloader.cache`
+GRAPHQL_DATALOADER_CACHE_ENABLED = get_config(
+    "setup", "graphql", "dataloader_cache_enabled", default=False
+)
+
+# serves coverage fallbacks and organization charts from daily rollups, which are only
+# built by a scheduled `manage.py refresh_daily_rollups`, see `services.daily_rollups`
+DAILY_ROLLUPS_ENABLED = get_config("setup", "daily_rollups_enabled", default=False)
+
+# caches the permission decisions of git providers, see `services.permission_cache`
+PERMISSION_CACHE_ENABLED = get_config("setup", "permission_cache_enabled", default=True)
+
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
 DATABASE_ROUTERS = ["codecov.db.DatabaseRouter"]
 
+# Execute registered raw SQL (see `codecov.db.queries`) as server-side prepared
+# statements.  Only enable this when connections aren't pooled per transaction.
+DATABASE_PREPARED_STATEMENTS_ENABLED = get_config(
+    "setup", "database", "prepared_statements_enabled", default=False
+)
+
 # GCS
 GCS_BUCKET_NAME = get_config("services", "minio", "bucket", default="codecov")
 
@@ -355,6 +394,16 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = int(
 FILE_UPLOAD_MAX_MEMORY_SIZE = int(
     get_config("setup", "http", "file_upload_max_memory_size", default=2621440)
 )
+# v2 uploads are streamed to storage rather than read into memory, so they are
+# capped separately from `DATA_UPLOAD_MAX_MEMORY_SIZE`
+UPLOAD_MAX_STREAM_SIZE = int(
+    get_config(
+        "setup",
+        "http",
+        "upload_max_stream_size",
+        default=DATA_UPLOAD_MAX_MEMORY_SIZE,
+    )
+)
 
 CORS_ALLOWED_ORIGIN_REGEXES = get_config(
     "setup", "api_cors_allowed_origin_regexes", default=[]
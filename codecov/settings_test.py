@@ -13,3 +13,6 @@ SHELTER_PUBSUB_SYNC_REPO_TOPIC_ID = "test-topic-id"
 os.environ["PUBSUB_EMULATOR_HOST"] = "localhost"
 
 GRAPHQL_INTROSPECTION_ENABLED = True
+
+# tests mock the providers' permission decisions, which mustn't leak between them
+PERMISSION_CACHE_ENABLED = False
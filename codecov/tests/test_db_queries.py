@@ -0,0 +1,83 @@
+import pytest
+from django.test import TestCase, override_settings
+from shared.django_apps.core.tests.factories import OwnerFactory
+
+from codecov.db.queries import QueryRegistry
+from codecov_auth.models import Owner
+
+SQL = """
+    SELECT x + %(offset)s::integer AS value, '100%%' AS label
+    FROM unnest(%(values)s::integer[]) x
+    ORDER BY x
+"""
+PARAM_TYPES = {"values": "integer[]", "offset": "integer"}
+
+
+class QueryRegistryTest(TestCase):
+    def setUp(self):
+        self.registry = QueryRegistry()
+
+    def test_prepared_sql(self):
+        query = self.registry.register("test.prepared_sql", SQL, PARAM_TYPES)
+
+        assert query.statement_name == "api_test_prepared_sql"
+        assert "x + $2::integer" in query.prepared_sql
+        assert "unnest($1::integer[])" in query.prepared_sql
+        assert "'100%'" in query.prepared_sql
+
+    def test_register_duplicate_name(self):
+        self.registry.register("test.duplicate", SQL, PARAM_TYPES)
+        with pytest.raises(ValueError):
+            self.registry.register("test.duplicate", SQL, PARAM_TYPES)
+
+    def test_missing_params(self):
+        query = self.registry.register("test.missing", SQL, PARAM_TYPES)
+        with pytest.raises(ValueError):
+            query.execute({"values": [1]})
+
+    def test_execute_unprepared(self):
+        query = self.registry.register("test.unprepared", SQL, PARAM_TYPES)
+
+        for _ in range(2):
+            assert query.execute({"values": [2, 1], "offset": 10}) == [
+                {"value": 11, "label": "100%"},
+                {"value": 12, "label": "100%"},
+            ]
+
+        stats = self.registry.stats()["test.unprepared"]
+        assert stats["executions"] == 2
+        assert stats["prepares"] == 0
+        assert stats["plan_cache_hit_rate"] == 0
+        assert stats["mean_seconds"] > 0
+
+    @override_settings(DATABASE_PREPARED_STATEMENTS_ENABLED=True)
+    def test_execute_prepared(self):
+        query = self.registry.register("test.prepared", SQL, PARAM_TYPES)
+
+        for offset in range(4):
+            assert query.execute({"values": [1], "offset": offset}) == [
+                {"value": 1 + offset, "label": "100%"}
+            ]
+
+        stats = self.registry.stats()["test.prepared"]
+        assert stats["executions"] == 4
+        assert stats["prepares"] == 1
+        assert stats["plan_cache_hits"] == 3
+        assert stats["plan_cache_hit_rate"] == 0.75
+
+    @override_settings(DATABASE_PREPARED_STATEMENTS_ENABLED=True)
+    def test_raw_prepared(self):
+        owner = OwnerFactory()
+        query = self.registry.register(
+            "test.raw_prepared",
+            f"SELECT * FROM {Owner._meta.db_table} WHERE ownerid = ANY(%(ownerids)s::integer[])",
+            {"ownerids": "integer[]"},
+        )
+
+        for _ in range(2):
+            owners = query.raw(Owner, {"ownerids": [owner.pk]})
+            assert [o.pk for o in owners] == [owner.pk]
+
+        stats = self.registry.stats()["test.raw_prepared"]
+        assert stats["executions"] == 2
+        assert stats["plan_cache_hits"] == 1
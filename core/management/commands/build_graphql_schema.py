@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from graphql_api.helpers.ariadne import build_schema_artifact
+from graphql_api.schema import SCHEMA_ARTIFACT_PATH
+from graphql_api.types import types
+
+
+class Command(BaseCommand):
+    help = (
+        "Prebuilds the GraphQL schema into an artifact which workers load instead "
+        "of parsing the schema's .graphql files. Stale artifacts are ignored."
+    )
+
+    def handle(self, *args, **options):
+        checksum = build_schema_artifact(types, SCHEMA_ARTIFACT_PATH)
+        self.stdout.write(f"Built {SCHEMA_ARTIFACT_PATH} ({checksum})")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.internal.chart.daily_totals import chart_totals_rollup
+from timeseries.rollups import coverage_rollup
+
+DAILY_ROLLUPS = [coverage_rollup, chart_totals_rollup]
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds and refreshes the daily rollups of the repositories read recently. "
+        "Meant to run every few minutes, reads fall back to the database meanwhile."
+    )
+
+    def handle(self, *args, **options):
+        for rollup in DAILY_ROLLUPS:
+            changed = rollup.refresh()
+            self.stdout.write(f"Refreshed {rollup.name} rollups ({changed} branches)")
@@ -1,11 +1,18 @@
 import logging
 from typing import Any, Dict, List, Type, cast
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from shared.django_apps.core.models import Commit
+from redis.exceptions import RedisError
 
-from core.models import Repository
+from core.models import Branch, Commit, Pull, Repository
+from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.helpers.counts import (
+    invalidate_counts,
+    owner_count_scope,
+    repository_count_scope,
+)
 from utils.shelter import ShelterPubsub
 
 log = logging.getLogger(__name__)
@@ -41,3 +48,56 @@ def update_commit(
             "id": instance.id,
         }
         ShelterPubsub.get_instance().publish(data)
+
+
+@receiver(post_save, sender=Commit, dispatch_uid="dataloader_cache_commit")
+@receiver(post_delete, sender=Commit, dispatch_uid="dataloader_cache_commit_delete")
+def invalidate_cached_commits(
+    sender: Type[Commit], instance: Commit, **kwargs: Dict[str, Any]
+) -> None:
+    if not settings.GRAPHQL_DATALOADER_CACHE_ENABLED:
+        return
+    try:
+        CommitLoader.shared_cache.invalidate(instance.repository_id)
+    except RedisError:
+        log.warning(
+            "Error invalidating cached commits",
+            extra=dict(repoid=instance.repository_id),
+            exc_info=True,
+        )
+
+
+@receiver(post_save, sender=Commit, dispatch_uid="connection_counts_commit")
+@receiver(post_delete, sender=Commit, dispatch_uid="connection_counts_commit_delete")
+@receiver(post_save, sender=Pull, dispatch_uid="connection_counts_pull")
+@receiver(post_delete, sender=Pull, dispatch_uid="connection_counts_pull_delete")
+@receiver(post_save, sender=Branch, dispatch_uid="connection_counts_branch")
+@receiver(post_delete, sender=Branch, dispatch_uid="connection_counts_branch_delete")
+def invalidate_repository_counts(
+    sender: Type[Commit | Pull | Branch],
+    instance: Commit | Pull | Branch,
+    **kwargs: Dict[str, Any],
+) -> None:
+    try:
+        invalidate_counts(repository_count_scope(instance.repository_id))
+    except RedisError:
+        log.warning(
+            "Error invalidating repository connection counts",
+            extra=dict(repoid=instance.repository_id),
+            exc_info=True,
+        )
+
+
+@receiver(post_save, sender=Repository, dispatch_uid="connection_counts_repo")
+@receiver(post_delete, sender=Repository, dispatch_uid="connection_counts_repo_delete")
+def invalidate_owner_counts(
+    sender: Type[Repository], instance: Repository, **kwargs: Dict[str, Any]
+) -> None:
+    try:
+        invalidate_counts(owner_count_scope(instance.author_id))
+    except RedisError:
+        log.warning(
+            "Error invalidating owner connection counts",
+            extra=dict(ownerid=instance.author_id),
+            exc_info=True,
+        )
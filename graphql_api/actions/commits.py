@@ -1,7 +1,7 @@
 from collections import defaultdict
 from typing import Optional
 
-from django.db.models import Count, Prefetch, Q, QuerySet
+from django.db.models import Count, Q, QuerySet
 from django.db.models.functions import Lower, Substr
 from graphql import GraphQLResolveInfo
 
@@ -75,17 +75,10 @@ def commit_status(
 def repo_commits(
     repository: Repository, filters: Optional[dict] = None
 ) -> QuerySet[Commit]:
-    # prefetch the CommitReport with the ReportLevelTotals
-    prefetch = Prefetch(
-        "reports",
-        queryset=CommitReport.objects.coverage_reports()
-        .filter(code=None)
-        .select_related("reportleveltotals"),
-    )
-
     # We don't select the `report` column here b/c it can be many MBs of JSON
-    # and can cause performance issues
-    queryset = repository.commits.defer("_report").prefetch_related(prefetch).all()
+    # and can cause performance issues.  Reports are prefetched according to
+    # the requested fields, see `CommitLoader.shape`
+    queryset = repository.commits.defer("_report").all()
 
     # queryset filtering
     filters = filters or {}
@@ -1,7 +1,8 @@
 from datetime import datetime
+from decimal import Decimal
 from typing import Any, Dict, Iterable, List, Optional
 
-from django.db.models import Max, QuerySet
+from django.db.models import F, QuerySet
 
 from core.models import Repository
 from timeseries.helpers import aggregate_measurements, aligned_start_date
@@ -48,45 +49,123 @@ def measurements_by_ids(
     return measurements
 
 
-def measurements_last_uploaded_before_start_date(
+def _last_measurements_by_ids(
     owner_id: int,
     repo_id: int,
     measurable_name: str,
-    measurable_id: int,
-    start_date: datetime,
+    measurable_ids: Iterable[str],
+    before: Optional[datetime] = None,
     branch: Optional[str] = None,
 ) -> QuerySet:
+    """
+    The most recent measurement (optionally strictly before `before`) for each of
+    `measurable_ids`, fetched in a single `DISTINCT ON (measurable_id)` query.
+    """
     queryset = Measurement.objects.filter(
         owner_id=owner_id,
         repo_id=repo_id,
-        measurable_id=measurable_id,
+        measurable_id__in=measurable_ids,
         name=measurable_name,
-        timestamp__lt=start_date,
     )
 
+    if before is not None:
+        queryset = queryset.filter(timestamp__lt=before)
+
     if branch:
         queryset = queryset.filter(branch=branch)
 
-    return queryset.values("measurable_id", "value").annotate(
-        last_uploaded=Max("timestamp")
-    )
+    return queryset.order_by("measurable_id", "-timestamp").distinct("measurable_id")
 
 
-def measurements_last_uploaded_by_ids(
+def measurements_last_uploaded_before_start_date(
     owner_id: int,
     repo_id: int,
     measurable_name: str,
-    measurable_ids: str,
+    measurable_ids: Iterable[str],
+    start_date: datetime,
     branch: Optional[str] = None,
-) -> QuerySet:
-    queryset = Measurement.objects.filter(
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the last measurement uploaded before `start_date` for each of the given
+    measurable ids, keyed by measurable id.  Ids without any such measurement are omitted.
+    """
+    queryset = _last_measurements_by_ids(
         owner_id=owner_id,
         repo_id=repo_id,
-        measurable_id__in=measurable_ids,
-        name=measurable_name,
+        measurable_name=measurable_name,
+        measurable_ids=measurable_ids,
+        before=start_date,
+        branch=branch,
+    ).values("measurable_id", "value", "timestamp")
+
+    return {row["measurable_id"]: row for row in queryset}
+
+
+def measurements_with_carryover(
+    measurements: Dict[Any, List[Dict[str, Any]]],
+    repository: Repository,
+    measurable_name: str,
+    after: Optional[datetime],
+    branch: Optional[str] = None,
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """
+    Prepends a datapoint at the start date to each series in `measurements` that
+    doesn't already start there, carrying over the last value uploaded before it.
+    Series without any earlier measurement are left untouched.
+    """
+    if after is None:
+        return measurements
+
+    missing_start = [
+        measurable_id
+        for measurable_id, series in measurements.items()
+        if not series or series[0]["timestamp_bin"] > after
+    ]
+    if not missing_start:
+        return measurements
+
+    carryovers = measurements_last_uploaded_before_start_date(
+        owner_id=repository.author_id,
+        repo_id=repository.pk,
+        measurable_name=measurable_name,
+        measurable_ids=missing_start,
+        start_date=after,
+        branch=branch,
     )
 
-    if branch:
-        queryset = queryset.filter(branch=branch)
+    start = after.replace(hour=0, minute=0, second=0, microsecond=0)
+    for measurable_id in missing_start:
+        carryover_measurement = carryovers.get(measurable_id)
+        if carryover_measurement is None:
+            continue
+
+        series = measurements[measurable_id]
+        value = Decimal(carryover_measurement["value"])
+        carryover = dict(series[0]) if series else {}
+        carryover["timestamp_bin"] = start
+        carryover["min"] = value
+        carryover["max"] = value
+        carryover["avg"] = value
+        measurements[measurable_id] = [carryover] + series
+
+    return measurements
+
 
-    return queryset.values("measurable_id").annotate(last_uploaded=Max("timestamp"))
+def measurements_last_uploaded_by_ids(
+    owner_id: int,
+    repo_id: int,
+    measurable_name: str,
+    measurable_ids: str,
+    branch: Optional[str] = None,
+) -> QuerySet:
+    return (
+        _last_measurements_by_ids(
+            owner_id=owner_id,
+            repo_id=repo_id,
+            measurable_name=measurable_name,
+            measurable_ids=measurable_ids,
+            branch=branch,
+        )
+        .values("measurable_id")
+        .annotate(last_uploaded=F("timestamp"))
+    )
@@ -1,15 +1,55 @@
 import logging
-from typing import Any
+from typing import Any, Iterable, Optional
 
 from django.db.models import QuerySet
 from shared.django_apps.codecov_auth.models import GithubAppInstallation, Owner
 from shared.django_apps.core.models import Repository
 
+from graphql_api.helpers.requested_fields import FieldRequirements, QuerysetShape
+from graphql_api.types.enums import RepositoryOrdering
 from utils.config import get_config
 
 log = logging.getLogger(__name__)
 AI_FEATURES_GH_APP_ID = get_config("github", "ai_features_app_id")
 
+RECENT_COVERAGE = FieldRequirements(annotations=("with_recent_coverage",))
+LATEST_COMMIT_AT = FieldRequirements(annotations=("with_latest_commit_at",))
+OLDEST_COMMIT_AT = FieldRequirements(annotations=("with_oldest_commit_at",))
+
+# the annotations of repositories needed by their GraphQL fields
+REPOSITORY_SHAPE = QuerysetShape(
+    {
+        "coverageAnalytics.percentCovered": RECENT_COVERAGE,
+        "coverageAnalytics.commitSha": RECENT_COVERAGE,
+        "coverageAnalytics.hits": RECENT_COVERAGE,
+        "coverageAnalytics.misses": RECENT_COVERAGE,
+        "coverageAnalytics.lines": RECENT_COVERAGE,
+        "latestCommitAt": LATEST_COMMIT_AT,
+        "oldestCommitAt": OLDEST_COMMIT_AT,
+    }
+)
+
+ORDERING_REQUIREMENTS = {
+    RepositoryOrdering.COVERAGE: RECENT_COVERAGE,
+    RepositoryOrdering.COMMIT_DATE: LATEST_COMMIT_AT,
+}
+
+
+def shape_repositories(
+    queryset: QuerySet,
+    requested_fields: Iterable[str],
+    prefix: str = "",
+    ordering: Optional[RepositoryOrdering] = None,
+) -> QuerySet:
+    """
+    Annotates `queryset` with what the `requested_fields` of its repositories (see
+    `selected_fields`) and `ordering` need.
+    """
+    extra = (
+        [ORDERING_REQUIREMENTS[ordering]] if ordering in ORDERING_REQUIREMENTS else []
+    )
+    return REPOSITORY_SHAPE.apply(queryset, requested_fields, prefix, extra=extra)
+
 
 def apply_filters_to_queryset(
     queryset: QuerySet, filters: dict[str, Any] | None, owner: Owner | None = None
@@ -70,9 +110,7 @@ def list_repository_for_owner(
     if exclude_okta_enforced_repos:
         queryset = queryset.exclude_accounts_enforced_okta(okta_account_auths)
 
-    queryset = (
-        queryset.with_recent_coverage().with_latest_commit_at().filter(author=owner)
-    )
+    queryset = queryset.filter(author=owner)
     queryset = apply_filters_to_queryset(queryset, filters, owner)
     return queryset
 
@@ -89,10 +127,6 @@ def search_repos(
     if exclude_okta_enforced_repos:
         queryset = queryset.exclude_accounts_enforced_okta(okta_account_auths)
 
-    queryset = (
-        queryset.with_recent_coverage()
-        .with_latest_commit_at()
-        .filter(author__ownerid__in=authors_from)
-    )
+    queryset = queryset.filter(author__ownerid__in=authors_from)
     queryset = apply_filters_to_queryset(queryset, filters)
     return queryset
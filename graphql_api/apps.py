@@ -1,5 +1,11 @@
 from django.apps import AppConfig
 
+from .profiler import install
+
 
 class GraphqlApiConfig(AppConfig):
     name = "graphql_api"
+
+    def ready(self):
+        # counts the queries and calls of profiled requests, see `graphql_api.profiler`
+        install()
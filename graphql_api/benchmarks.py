@@ -0,0 +1,113 @@
+"""
+Startup benchmarks for the GraphQL schema, with and without its prebuilt
+artifact (see `manage.py build_graphql_schema`). They need the settings of a
+configured environment but no database, run them with:
+
+    python -m graphql_api.benchmarks [name ...]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import django
+
+from utils.config import get_settings_module
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", get_settings_module())
+django.setup()
+
+from graphql_api.helpers.ariadne import (  # noqa: E402
+    build_schema_artifact,
+    make_executable_schema_from_artifact,
+)
+from graphql_api.schema import SCHEMA_ARTIFACT_PATH  # noqa: E402
+from graphql_api.types import bindables, types  # noqa: E402
+
+BENCHMARKS: dict[str, Callable[[], None]] = {}
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+WORKER_BOOT = (
+    "from codecov.wsgi import application; "
+    "from graphql_api.schema import get_schema; "
+    "get_schema()"
+)
+
+
+def benchmark(func: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _report(name: str, stmt: Callable, repeat: int = 5) -> None:
+    elapsed = min(timeit.repeat(stmt, number=1, repeat=repeat))
+    sys.stdout.write(f"{name:<40} {elapsed * 1e3:10.2f} ms\n")
+
+
+@contextmanager
+def _artifact(built: bool) -> Iterator[None]:
+    """
+    Builds or removes the schema artifact, restoring the previous one after.
+    """
+    previous = (
+        SCHEMA_ARTIFACT_PATH.read_bytes() if SCHEMA_ARTIFACT_PATH.exists() else None
+    )
+    try:
+        if built:
+            build_schema_artifact(types, SCHEMA_ARTIFACT_PATH)
+        else:
+            SCHEMA_ARTIFACT_PATH.unlink(missing_ok=True)
+        yield
+    finally:
+        if previous is None:
+            SCHEMA_ARTIFACT_PATH.unlink(missing_ok=True)
+        else:
+            SCHEMA_ARTIFACT_PATH.write_bytes(previous)
+
+
+def _run(*args: str) -> Callable[[], None]:
+    return lambda: subprocess.run(
+        [sys.executable, *args],
+        cwd=BASE_DIR,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+@benchmark
+def schema():
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_path = Path(tmp) / "schema.artifact"
+        build_schema_artifact(types, artifact_path)
+        for label, path in (
+            ("source", Path(tmp) / "missing.artifact"),
+            ("artifact", artifact_path),
+        ):
+            _report(
+                f"make_executable_schema ({label})",
+                lambda: make_executable_schema_from_artifact(
+                    types, *bindables, artifact_path=path, convert_names_case=True
+                ),
+                repeat=20,
+            )
+
+
+@benchmark
+def startup():
+    for label, built in (("source", False), ("artifact", True)):
+        with _artifact(built):
+            _report(f"manage.py check ({label})", _run("manage.py", "check"))
+            _report(f"worker boot ({label})", _run("-c", WORKER_BOOT))
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        sys.stdout.write(f"== {name}\n")
+        BENCHMARKS[name]()
@@ -0,0 +1,182 @@
+"""
+A cache of DataLoader records shared across requests.
+
+`BaseLoader.loader` scopes loaders to a request, so every request fetches the
+same records again, e.g. the commits of a pull request page that dozens of users
+have open.  Loaders with a `shared_cache` first look their keys up in a
+process-local LRU, then in Redis, and only fetch the others from the database.
+
+Records are cached under a version of their scope (e.g. the repository of
+commits), which `invalidate` replaces whenever one of them is saved, i.e. its
+`updatestamp` changes.  Processes keep the versions they read for
+`DATALOADER_VERSION_CACHE_TTL`, so they see the invalidations of other processes
+up to that late.  Records written outside of the API (e.g. by the worker) don't
+invalidate the cache, which is why loaders only cache the records they consider
+done changing, and only for `DATALOADER_CACHE_TTL`.
+
+Records are cached pickled, also in the LRU, so that requests never share the
+same instances.
+"""
+
+import logging
+import pickle
+import uuid
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.helpers.redis import get_redis_connection
+from shared.metrics import Counter
+
+from utils.lru_cache import LRUCache
+
+log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+GQL_DATALOADER_CACHE_COUNTER = Counter(
+    "api_gql_dataloader_cache",
+    "Number of DataLoader keys looked up in the shared cache by loader and result",
+    ["loader", "result"],
+)
+
+DATALOADER_CACHE_TTL = 60
+DATALOADER_LOCAL_CACHE_TTL = 10
+DATALOADER_LOCAL_CACHE_SIZE = 4096
+DATALOADER_VERSION_CACHE_TTL = 5
+
+# bump when the cached records can't be unpickled by the previous release
+DATALOADER_CACHE_VERSION = 1
+
+
+class SharedLoaderCache:
+    def __init__(
+        self,
+        name: str,
+        cacheable: Callable[[Any], bool] = lambda record: True,
+        ttl: int = DATALOADER_CACHE_TTL,
+        local_ttl: int = DATALOADER_LOCAL_CACHE_TTL,
+        local_size: int = DATALOADER_LOCAL_CACHE_SIZE,
+        version_ttl: int = DATALOADER_VERSION_CACHE_TTL,
+    ):
+        self.name = name
+        self.cacheable = cacheable
+        self.ttl = ttl
+        self.local = LRUCache(maxsize=local_size, ttl=local_ttl)
+        # the versions of the scopes read recently, by scope
+        self.versions = LRUCache(maxsize=local_size, ttl=version_ttl)
+
+    def _version_key(self, scope: Hashable) -> str:
+        return f"dataloader_version:{self.name}:{scope}"
+
+    def _version(self, scope: Hashable) -> str:
+        version = self.versions.get(scope)
+        if version is None:
+            version = (redis.get(self._version_key(scope)) or b"").decode()
+            self.versions.set(scope, version)
+        return version
+
+    def _cache_keys(self, scope: Hashable, keys: Iterable[Hashable]) -> dict:
+        version = self._version(scope)
+        prefix = f"dataloader:{self.name}:{DATALOADER_CACHE_VERSION}:{scope}:{version}"
+        return {key: f"{prefix}:{key}" for key in keys}
+
+    def invalidate(self, scope: Hashable) -> None:
+        """
+        Invalidates the cached records of `scope`, in every process.
+        """
+        # random, unlike an INCR that restarts from 1 when its key expires
+        version = uuid.uuid4().hex
+        redis.set(self._version_key(scope), version, ex=self.ttl)
+        self.versions.set(scope, version)
+
+    def _get_many(self, cache_keys: dict) -> dict:
+        """
+        The cached records of the `cache_keys` (key: cache key) found, by key.
+        """
+        found = {}
+        remote = []
+        for key, cache_key in cache_keys.items():
+            value = self.local.get(cache_key)
+            if value is None:
+                remote.append(key)
+            else:
+                found[key] = value
+
+        if remote:
+            try:
+                values = redis.mget([cache_keys[key] for key in remote])
+            except RedisError:
+                log.warning("Failed to read cached records", exc_info=True)
+                values = [None] * len(remote)
+            for key, value in zip(remote, values):
+                if value is not None:
+                    self.local.set(cache_keys[key], value)
+                    found[key] = value
+
+        records = {}
+        for key, value in found.items():
+            try:
+                records[key] = pickle.loads(value)
+            except Exception:
+                log.warning(
+                    "Failed to unpickle cached record",
+                    extra=dict(loader=self.name, key=key),
+                    exc_info=True,
+                )
+        return records
+
+    def _set_many(self, cache_keys: dict, records: dict) -> None:
+        values = {
+            cache_keys[key]: pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            for key, record in records.items()
+            if self.cacheable(record)
+        }
+        if not values:
+            return
+
+        for cache_key, value in values.items():
+            self.local.set(cache_key, value)
+        try:
+            pipeline = redis.pipeline()
+            pipeline.mset(values)
+            # Setting timeout for each key as redis does not support timeout
+            # with mset().
+            for cache_key in values:
+                pipeline.expire(cache_key, self.ttl)
+            pipeline.execute()
+        except RedisError:
+            log.warning("Failed to cache records", exc_info=True)
+
+    def load(
+        self,
+        scope: Optional[Hashable],
+        keys: list,
+        fetch: Callable[[list], dict],
+    ) -> dict:
+        """
+        The records of `keys` by key, those which aren't cached being fetched with
+        `fetch`, which returns them by key too.
+        """
+        if not settings.GRAPHQL_DATALOADER_CACHE_ENABLED:
+            return fetch(keys)
+
+        try:
+            cache_keys = self._cache_keys(scope, keys)
+        except RedisError:
+            log.warning("Failed to read cached records version", exc_info=True)
+            return fetch(keys)
+
+        records = self._get_many(cache_keys)
+        missing = [key for key in keys if key not in records]
+        GQL_DATALOADER_CACHE_COUNTER.labels(loader=self.name, result="hit").inc(
+            len(keys) - len(missing)
+        )
+        GQL_DATALOADER_CACHE_COUNTER.labels(loader=self.name, result="miss").inc(
+            len(missing)
+        )
+
+        if missing:
+            fetched = fetch(missing)
+            self._set_many(cache_keys, fetched)
+            records.update(fetched)
+        return records
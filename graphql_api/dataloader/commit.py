@@ -1,34 +1,144 @@
-from django.db.models import Prefetch
+from typing import Iterable, Optional
+
+from django.db.models import Prefetch, prefetch_related_objects
 
 from core.models import Commit
+from graphql_api.helpers.requested_fields import FieldRequirements, QuerysetShape
 from reports.models import CommitReport
 
+from .cache import SharedLoaderCache
 from .loader import BaseLoader
 
+# the CommitReport with the ReportLevelTotals, see `Commit.commitreport`
+REPORTS_PREFETCH = Prefetch(
+    "reports",
+    queryset=CommitReport.objects.coverage_reports()
+    .filter(code=None)
+    .select_related("reportleveltotals"),
+)
+
+
+def _has_reports(commit: Commit) -> bool:
+    return "reports" in getattr(commit, "_prefetched_objects_cache", {})
+
 
 class CommitLoader(BaseLoader):
+    # the GraphQL fields of commits which don't read their report, any other field
+    # has it prefetched
+    shape = QuerysetShape(
+        dict.fromkeys(
+            (
+                "__typename",
+                "author",
+                "branchName",
+                "bundleAnalysis",
+                "bundleStatus",
+                "ciPassed",
+                "commitid",
+                "coverageStatus",
+                "createdAt",
+                "errors",
+                "message",
+                "parent",
+                "pullId",
+                "state",
+                "yaml",
+                "yamlState",
+            ),
+            FieldRequirements(),
+        ),
+        default=FieldRequirements(prefetch_related=(REPORTS_PREFETCH,)),
+    )
+
+    # commits only change while they're processed, apart from a few states
+    shared_cache = SharedLoaderCache(
+        "commit", cacheable=lambda commit: commit.state in ("complete", "error")
+    )
+
     @classmethod
     def key(cls, commit):
         return commit.commitid
 
     def __init__(self, info, repository_id, *args, **kwargs):
         self.repository_id = repository_id
+        # the GraphQL fields requested of the commits being loaded, `None` if unknown
+        self.requested_fields: dict[str, Optional[set[str]]] = {}
+        # commits already loaded without their reports, which are loaded again
+        self.without_reports: dict[str, Commit] = {}
         super().__init__(info, *args, **kwargs)
 
-    def batch_queryset(self, keys):
-        # We don't select the `report` column here b/c then can be
-        # very large JSON blobs and cause performance issues
+    def load(self, key, requested_fields: Optional[Iterable[str]] = None):
+        """
+        Loads the commit of `key`, prefetching what its `requested_fields` (see
+        `selected_fields`) need, or everything if they're unknown.
+        """
+        if requested_fields is not None:
+            requested_fields = set(requested_fields)
+        cached = self._cache.get(self.get_cache_key(key)) if self.cache else None
+        if cached is not None and cached.done():
+            commit = cached.result() if cached.exception() is None else None
+            if (
+                commit is None
+                or _has_reports(commit)
+                or not self._needs_reports([requested_fields])
+            ):
+                return cached
+            # loaded or primed without its reports, which are prefetched along with
+            # the other commits of the next batch
+            self.clear(key)
+            self.without_reports[key] = commit
 
-        # prefetch the CommitReport with the ReportLevelTotals
-        prefetch = Prefetch(
-            "reports",
-            queryset=CommitReport.objects.coverage_reports()
-            .filter(code=None)
-            .select_related("reportleveltotals"),
+        # only the fields of keys waiting for a batch are recorded
+        if requested_fields is None:
+            self.requested_fields[key] = None
+        elif self.requested_fields.get(key, ()) is not None:
+            self.requested_fields.setdefault(key, set()).update(requested_fields)
+        return super().load(key)
+
+    def cache_scope(self):
+        return self.repository_id
+
+    def _needs_reports(self, requested_fields) -> bool:
+        if None in requested_fields:
+            return True
+        return any(
+            REPORTS_PREFETCH in requirements.prefetch_related
+            for requirements in self.shape.requirements(set().union(*requested_fields))
         )
 
-        return (
-            Commit.objects.filter(commitid__in=keys, repository_id=self.repository_id)
-            .defer("_report")
-            .prefetch_related(prefetch)
+    def batch_records(self, keys):
+        # before `batch_queryset` pops the requested fields of the keys not cached
+        needs_reports = self._needs_reports(
+            [self.requested_fields.get(key) for key in keys]
         )
+        loaded = {
+            key: self.without_reports.pop(key)
+            for key in keys
+            if key in self.without_reports
+        }
+        records = {}
+        if len(loaded) < len(keys):
+            records = super().batch_records([key for key in keys if key not in loaded])
+        records.update(loaded)
+        for key in keys:
+            self.requested_fields.pop(key, None)
+
+        if needs_reports:
+            # cached commits may have been fetched without their reports
+            prefetch_related_objects(
+                [commit for commit in records.values() if not _has_reports(commit)],
+                REPORTS_PREFETCH,
+            )
+        return records
+
+    def batch_queryset(self, keys):
+        # We don't select the `report` column here b/c then can be
+        # very large JSON blobs and cause performance issues
+        queryset = Commit.objects.filter(
+            commitid__in=keys, repository_id=self.repository_id
+        ).defer("_report")
+
+        requested_fields = [self.requested_fields.pop(key, None) for key in keys]
+        if None in requested_fields:
+            return queryset.prefetch_related(REPORTS_PREFETCH)
+        return self.shape.apply(queryset, set().union(*requested_fields))
@@ -1,11 +1,18 @@
-from typing import Self
+from typing import Hashable, Optional, Self
 
 from aiodataloader import DataLoader
 from asgiref.sync import sync_to_async
 from graphql import GraphQLResolveInfo
 
+from graphql_api.profiler import profile_batch_load_fn
+
+from .cache import SharedLoaderCache
+
 
 class BaseLoader(DataLoader):
+    # caches the records across requests, see `graphql_api.dataloader.cache`
+    shared_cache: Optional[SharedLoaderCache] = None
+
     @classmethod
     def loader(cls, info: GraphQLResolveInfo, *args) -> Self:
         """
@@ -27,6 +34,9 @@ class BaseLoader(DataLoader):
     def __init__(self, info, *args, **kwargs):
         self.info = info
         super().__init__(*args, **kwargs)
+        self.batch_load_fn = profile_batch_load_fn(
+            type(self).__name__, self.batch_load_fn
+        )
 
     @classmethod
     def key(cls, record):
@@ -48,6 +58,27 @@ class BaseLoader(DataLoader):
         """
         raise NotImplementedError("override batch_queryset in subclass")
 
+    def cache_scope(self) -> Optional[Hashable]:
+        """
+        The scope the records of this loader are cached and invalidated within by
+        its `shared_cache`, e.g. their repository.
+        """
+        return None
+
+    def fetch_records(self, keys):
+        """
+        Return the records of `keys` by key.
+        """
+        return {self.key(record): record for record in self.batch_queryset(keys)}
+
+    def batch_records(self, keys):
+        """
+        Return the records of `keys` by key, from the `shared_cache` if any.
+        """
+        if self.shared_cache is None:
+            return self.fetch_records(keys)
+        return self.shared_cache.load(self.cache_scope(), keys, self.fetch_records)
+
     @sync_to_async
     def batch_load_fn(self, keys):
         """
@@ -59,8 +90,7 @@ class BaseLoader(DataLoader):
         batch load the records for all those keys.
         """
 
-        queryset = self.batch_queryset(keys)
-        results = {self.key(record): record for record in queryset}
+        results = self.batch_records(keys)
 
         # the returned list of records must be in the exact order of `keys`
         return [results.get(key) for key in keys]
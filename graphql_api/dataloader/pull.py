@@ -0,0 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Min
+
+from core.models import Pull
+
+from .loader import BaseLoader
+
+
+class FirstPullLoader(BaseLoader):
+    """
+    Loads the id of the first pull (the one with the lowest `id`) of each of the
+    repositories in `keys` (their `repoid`), `None` for repositories without pulls.
+    """
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        first_pull_ids = dict(
+            Pull.objects.filter(repository_id__in=keys)
+            .order_by()
+            .values("repository_id")
+            .annotate(first_pull_id=Min("id"))
+            .values_list("repository_id", "first_pull_id")
+        )
+        return [first_pull_ids.get(key) for key in keys]
+
+
+async def is_first_pull(info, pull: Pull) -> bool:
+    """
+    Whether `pull` is/was the 1st for its repository, the first pulls of all the
+    repositories in a request being loaded together.
+    """
+    first_pull_id = await FirstPullLoader.loader(info).load(pull.repository_id)
+    return first_pull_id == pull.id
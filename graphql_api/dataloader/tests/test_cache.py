@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+from shared.django_apps.core.tests.factories import CommitFactory, RepositoryFactory
+
+from graphql_api.dataloader.cache import SharedLoaderCache
+from graphql_api.dataloader.commit import CommitLoader
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+@override_settings(GRAPHQL_DATALOADER_CACHE_ENABLED=True)
+class SharedLoaderCacheTestCase(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("graphql_api.dataloader.cache.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        CommitLoader.shared_cache.local.clear()
+        CommitLoader.shared_cache.versions.clear()
+
+        self.repository = RepositoryFactory()
+        self.complete = CommitFactory(repository=self.repository, state="complete")
+        self.pending = CommitFactory(repository=self.repository, state="pending")
+
+    async def _load(self, commit, requested_fields=("message",)):
+        # a loader per request
+        loader = CommitLoader.loader(GraphQLResolveInfo(), self.repository.repoid)
+        return await loader.load(commit.commitid, set(requested_fields))
+
+    async def test_cached_across_requests(self):
+        with self.assertNumQueries(1):
+            assert await self._load(self.complete) == self.complete
+
+        with self.assertNumQueries(0):
+            assert await self._load(self.complete) == self.complete
+
+        # from Redis when the process-local cache doesn't have it
+        CommitLoader.shared_cache.local.clear()
+        with self.assertNumQueries(0):
+            commit = await self._load(self.complete)
+        assert commit == self.complete
+        assert commit.message == self.complete.message
+
+    async def test_commits_still_processing_are_not_cached(self):
+        with self.assertNumQueries(1):
+            assert await self._load(self.pending) == self.pending
+        with self.assertNumQueries(1):
+            assert await self._load(self.pending) == self.pending
+
+    async def test_reports_prefetched_for_cached_commits(self):
+        await self._load(self.complete)
+
+        # only the reports and their totals are fetched
+        with self.assertNumQueries(1):
+            commit = await self._load(self.complete, ["coverageAnalytics.totals"])
+        assert "reports" in commit._prefetched_objects_cache
+
+    def test_invalidated_when_commit_saved(self):
+        cache = CommitLoader.shared_cache
+        fetched = []
+
+        def fetch(keys):
+            fetched.extend(keys)
+            return {self.complete.commitid: self.complete}
+
+        cache.load(self.repository.repoid, [self.complete.commitid], fetch)
+        cache.load(self.repository.repoid, [self.complete.commitid], fetch)
+        assert fetched == [self.complete.commitid]
+
+        self.complete.message = "updated"
+        self.complete.save()
+
+        records = cache.load(self.repository.repoid, [self.complete.commitid], fetch)
+        assert fetched == [self.complete.commitid] * 2
+        assert records[self.complete.commitid].message == "updated"
+
+    def test_invalidated_by_other_processes(self):
+        cache = SharedLoaderCache("test")
+        other_process = SharedLoaderCache("test")
+        cache.load(1, [1], lambda keys: {1: "one"})
+
+        other_process.invalidate(1)
+        # versions are read again once they expire locally
+        assert cache.load(1, [1], lambda keys: {1: "fetched"}) == {1: "one"}
+        cache.versions.clear()
+        assert cache.load(1, [1], lambda keys: {1: "fetched"}) == {1: "fetched"}
+
+    def test_invalidated_after_version_expired(self):
+        cache = SharedLoaderCache("test")
+        cache.invalidate(1)
+        cache.load(1, [1], lambda keys: {1: "one"})
+        cache.invalidate(1)
+        cache.load(1, [1], lambda keys: {1: "two"})
+
+        # versions never repeat, records cached under a previous one aren't served
+        # again once the current one expires
+        self.redis.delete("dataloader_version:test:1")
+        cache.invalidate(1)
+        assert cache.load(1, [1], lambda keys: {1: "three"}) == {1: "three"}
+
+    @override_settings(GRAPHQL_DATALOADER_CACHE_ENABLED=False)
+    def test_disabled(self):
+        cache = SharedLoaderCache("test")
+        fetched = []
+
+        def fetch(keys):
+            fetched.extend(keys)
+            return {key: key for key in keys}
+
+        assert cache.load(None, [1, 2], fetch) == {1: 1, 2: 2}
+        assert cache.load(None, [1, 2], fetch) == {1: 1, 2: 2}
+        assert fetched == [1, 2, 1, 2]
+        assert self.redis.keys("dataloader:*") == []
+
+    def test_corrupt_records_are_fetched(self):
+        cache = SharedLoaderCache("test")
+        cache.load(None, [1], lambda keys: {1: "one"})
+        for key in self.redis.keys("dataloader:test:*"):
+            self.redis.set(key, b"not a pickle")
+        cache.local.clear()
+
+        assert cache.load(None, [1], lambda keys: {1: "fetched"}) == {1: "fetched"}
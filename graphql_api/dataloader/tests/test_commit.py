@@ -1,3 +1,5 @@
+import asyncio
+
 from django.test import TestCase
 from shared.django_apps.core.tests.factories import (
     CommitFactory,
@@ -5,7 +7,7 @@ from shared.django_apps.core.tests.factories import (
     RepositoryFactory,
 )
 
-from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.dataloader.commit import REPORTS_PREFETCH, CommitLoader
 
 
 class GraphQLResolveInfo:
@@ -98,3 +100,62 @@ class CommitLoaderTestCase(TestCase):
         loader = CommitLoader.loader(self.info, self.pulls[2].repository_id)
         commit_2 = await loader.load(self.pulls[2].base)
         assert commit_2 == self.base_commit
+
+    async def test_load_with_requested_fields(self):
+        loader = CommitLoader.loader(self.info, self.repository.repoid)
+        commit, base_commit = await asyncio.gather(
+            loader.load(self.pull_1_commit.commitid, {"message", "author.username"}),
+            loader.load(self.base_commit.commitid, {"commitid"}),
+        )
+        assert commit == self.pull_1_commit
+        assert base_commit == self.base_commit
+        assert loader.requested_fields == {}
+
+    def test_batch_queryset_shaped_by_requested_fields(self):
+        loader = CommitLoader(self.info, self.repository.repoid)
+
+        loader.requested_fields = {"123": {"message", "author.username"}}
+        queryset = loader.batch_queryset(["123"])
+        assert queryset._prefetch_related_lookups == ()
+        assert list(queryset) == [self.pull_1_commit]
+
+        loader.requested_fields = {
+            "123": {"message"},
+            "456": {"coverageAnalytics", "coverageAnalytics.totals"},
+        }
+        queryset = loader.batch_queryset(["123", "456"])
+        assert queryset._prefetch_related_lookups == (REPORTS_PREFETCH,)
+
+        # unknown fields, e.g. commits loaded to compare them
+        loader.requested_fields = {"123": {"message"}}
+        queryset = loader.batch_queryset(["123", "456"])
+        assert queryset._prefetch_related_lookups == (REPORTS_PREFETCH,)
+
+    async def test_loader_cache_hits_dont_record_requested_fields(self):
+        loader = CommitLoader.loader(self.info, self.repository.repoid)
+        await loader.load(self.pull_1_commit.commitid, {"message"})
+        commit = await loader.load(self.pull_1_commit.commitid, {"message"})
+
+        assert commit == self.pull_1_commit
+        assert loader.requested_fields == {}
+
+    async def test_loader_cache_hits_prefetch_reports(self):
+        loader = CommitLoader.loader(self.info, self.repository.repoid)
+        # e.g. commits primed by the resolver of a commits connection
+        loader.cache(self.pull_1_commit)
+        await loader.load(self.base_commit.commitid, {"message"})
+
+        fields = {"coverageAnalytics", "coverageAnalytics.totals"}
+        commit, base_commit, other_commit = await asyncio.gather(
+            loader.load(self.pull_1_commit.commitid, fields),
+            loader.load(self.base_commit.commitid, fields),
+            loader.load(self.pull_3_commits[0].commitid, fields),
+        )
+
+        assert commit is self.pull_1_commit
+        assert base_commit == self.base_commit
+        assert other_commit == self.pull_3_commits[0]
+        for loaded in (commit, base_commit, other_commit):
+            assert "reports" in loaded._prefetched_objects_cache
+        assert loader.requested_fields == {}
+        assert loader.without_reports == {}
@@ -0,0 +1,38 @@
+import asyncio
+
+from django.test import TestCase
+from shared.django_apps.core.tests.factories import PullFactory, RepositoryFactory
+
+from graphql_api.dataloader.pull import FirstPullLoader, is_first_pull
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class FirstPullLoaderTestCase(TestCase):
+    def setUp(self):
+        self.repository_1 = RepositoryFactory(name="test-repo-1")
+        self.repository_2 = RepositoryFactory(name="test-repo-2")
+        self.repository_3 = RepositoryFactory(name="test-repo-3")
+        self.pulls_1 = [PullFactory(repository=self.repository_1) for _ in range(3)]
+        self.pulls_2 = [PullFactory(repository=self.repository_2) for _ in range(2)]
+        self.info = GraphQLResolveInfo()
+
+    async def test_first_pulls(self):
+        loader = FirstPullLoader.loader(self.info)
+        first_pull_ids = await asyncio.gather(
+            loader.load(self.repository_1.repoid),
+            loader.load(self.repository_2.repoid),
+            loader.load(self.repository_3.repoid),
+        )
+        assert first_pull_ids == [self.pulls_1[0].id, self.pulls_2[0].id, None]
+
+    async def test_is_first_pull(self):
+        pulls = self.pulls_1 + self.pulls_2
+        with self.assertNumQueries(1):
+            results = await asyncio.gather(
+                *(is_first_pull(self.info, pull) for pull in pulls)
+            )
+        assert results == [True, False, False, True, False]
@@ -0,0 +1,239 @@
+"""
+Parsed and validated GraphQL documents, and Automatic Persisted Queries.
+
+The frontend sends the same few hundred query documents over and over, so parsed
+documents are kept in an in-process LRU cache keyed by the sha256 of their query,
+together with the errors of the validation rules that only depend on the document
+and the schema.  Rules depending on the request's variables (required variables,
+query cost) are run again for every request, on their own.
+
+Persisted queries follow Apollo's protocol: clients send the sha256 of their query
+in `extensions.persistedQuery.sha256Hash` and may leave the query out.  Unknown
+hashes are answered with a `PERSISTED_QUERY_NOT_FOUND` error, upon which clients
+send the query along with its hash to have it persisted.  Queries are only persisted
+once their document is known to be valid, and for a day: clients register them again
+as they expire.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Collection, Dict, Hashable, List, Optional, Tuple, Type
+
+from graphql import (
+    ASTValidationRule,
+    DocumentNode,
+    GraphQLError,
+    GraphQLSchema,
+    TypeInfo,
+    parse,
+    validate,
+)
+from redis.exceptions import RedisError
+from shared.helpers.redis import get_redis_connection
+from shared.metrics import Counter, inc_counter
+
+from utils.lru_cache import LRUCache
+
+log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+GQL_DOCUMENT_CACHE_COUNTER = Counter(
+    "api_gql_document_cache",
+    "Number of GraphQL documents looked up in the parsed document cache by result",
+    ["result"],
+)
+
+GQL_PERSISTED_QUERY_COUNTER = Counter(
+    "api_gql_persisted_queries",
+    "Number of GraphQL requests using a persisted query by result",
+    ["result"],
+)
+
+DOCUMENT_CACHE_SIZE = 1024
+
+PERSISTED_QUERY_TTL = 60 * 60 * 24
+# larger queries are run but not persisted
+PERSISTED_QUERY_MAX_LENGTH = 32 * 1024
+
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+PERSISTED_QUERY_NOT_SUPPORTED = "PERSISTED_QUERY_NOT_SUPPORTED"
+PERSISTED_QUERY_HASH_MISMATCH = "PERSISTED_QUERY_HASH_MISMATCH"
+
+_document_cache = LRUCache(maxsize=DOCUMENT_CACHE_SIZE)
+# first tier in front of Redis, persisted queries never change for a given hash.
+# Entries expire well before Redis' so that queries are registered again in time
+_persisted_queries = LRUCache(maxsize=DOCUMENT_CACHE_SIZE, ttl=60 * 60)
+
+
+@dataclass
+class CachedDocument:
+    document: DocumentNode
+    # errors of the variable-independent rules, by schema and set of rules
+    static_errors: Dict[Hashable, List[GraphQLError]] = field(default_factory=dict)
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get_document(query: str) -> CachedDocument:
+    """
+    The parsed document of `query`, parsing it only if it isn't cached yet.
+    """
+    key = query_hash(query)
+    cached = _document_cache.get(key)
+    if cached is not None:
+        inc_counter(GQL_DOCUMENT_CACHE_COUNTER, labels=dict(result="hit"))
+        return cached
+
+    inc_counter(GQL_DOCUMENT_CACHE_COUNTER, labels=dict(result="miss"))
+    cached = CachedDocument(document=parse(query))
+    _document_cache.set(key, cached)
+    return cached
+
+
+def validate_document(
+    schema: GraphQLSchema,
+    cached: CachedDocument,
+    static_rules: Collection[Type[ASTValidationRule]],
+    variable_rules: Collection[Type[ASTValidationRule]],
+    max_errors: Optional[int] = None,
+    type_info: Optional[TypeInfo] = None,
+) -> List[GraphQLError]:
+    """
+    Same as validating the document against all the rules at once.  The errors of
+    `static_rules` are only computed the first time the document is validated with
+    them, `variable_rules` are always run.
+    """
+    errors = []
+    if variable_rules:
+        # run first so that a `MissingVariablesError` is raised before any other
+        # error is reported, as when running along with all the other rules
+        errors = validate(
+            schema,
+            cached.document,
+            rules=tuple(variable_rules),
+            max_errors=max_errors,
+            type_info=type_info,
+        )
+
+    key: Tuple[Any, ...] = (schema, tuple(static_rules))
+    static_errors = cached.static_errors.get(key)
+    if static_errors is None:
+        static_errors = validate(
+            schema,
+            cached.document,
+            rules=tuple(static_rules),
+            max_errors=max_errors,
+            type_info=type_info,
+        )
+        cached.static_errors[key] = static_errors
+
+    return static_errors + errors
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+    @property
+    def formatted(self) -> dict:
+        return {"message": self.message, "extensions": {"code": self.code}}
+
+
+def _persisted_query_key(sha256_hash: str) -> str:
+    return f"graphql_persisted_query:{sha256_hash}"
+
+
+def _lookup_persisted_query(sha256_hash: str) -> Optional[str]:
+    query = _persisted_queries.get(sha256_hash)
+    if query is not None:
+        return query
+
+    try:
+        query = redis.get(_persisted_query_key(sha256_hash))
+    except RedisError:
+        # clients will send the full query next
+        log.warning("Failed to look up persisted query", exc_info=True)
+        return None
+    if query is None:
+        return None
+
+    query = query.decode("utf-8")
+    _persisted_queries.set(sha256_hash, query)
+    return query
+
+
+def _persisted_query_hash(data: Any) -> Optional[str]:
+    if not isinstance(data, dict):
+        return None
+    extensions = data.get("extensions")
+    if not isinstance(extensions, dict) or "persistedQuery" not in extensions:
+        return None
+
+    persisted_query = extensions["persistedQuery"]
+    if (
+        not isinstance(persisted_query, dict)
+        or persisted_query.get("version") != 1
+        or not isinstance(persisted_query.get("sha256Hash"), str)
+    ):
+        raise PersistedQueryError(
+            "Unsupported persisted query", PERSISTED_QUERY_NOT_SUPPORTED
+        )
+    return persisted_query["sha256Hash"].lower()
+
+
+def resolve_persisted_query(data: Any) -> Any:
+    """
+    Returns the request `data` with the query of the persisted query it references
+    filled in.  Requests that don't reference a persisted query, or come with its
+    query, are returned as-is.
+    """
+    sha256_hash = _persisted_query_hash(data)
+    if sha256_hash is None:
+        return data
+
+    query = data.get("query")
+    if isinstance(query, str) and query:
+        if query_hash(query) != sha256_hash:
+            raise PersistedQueryError(
+                "provided sha does not match query", PERSISTED_QUERY_HASH_MISMATCH
+            )
+        return data
+
+    query = _lookup_persisted_query(sha256_hash)
+    if query is None:
+        inc_counter(GQL_PERSISTED_QUERY_COUNTER, labels=dict(result="miss"))
+        raise PersistedQueryError("PersistedQueryNotFound", PERSISTED_QUERY_NOT_FOUND)
+
+    inc_counter(GQL_PERSISTED_QUERY_COUNTER, labels=dict(result="hit"))
+    return {**data, "query": query}
+
+
+def persist_query(data: Any) -> None:
+    """
+    Persists the query of a request registering a persisted query, see
+    `resolve_persisted_query`.  Only to be called once the query is known to be
+    valid.
+    """
+    sha256_hash = _persisted_query_hash(data)
+    query = data.get("query") if sha256_hash is not None else None
+    if not isinstance(query, str) or not query:
+        return
+    if sha256_hash in _persisted_queries:
+        # already persisted, or just looked up
+        return
+    if len(query) > PERSISTED_QUERY_MAX_LENGTH:
+        inc_counter(GQL_PERSISTED_QUERY_COUNTER, labels=dict(result="too_large"))
+        return
+
+    try:
+        redis.set(_persisted_query_key(sha256_hash), query, ex=PERSISTED_QUERY_TTL)
+    except RedisError:
+        log.warning("Failed to persist query", exc_info=True)
+        return
+    _persisted_queries.set(sha256_hash, query)
+    inc_counter(GQL_PERSISTED_QUERY_COUNTER, labels=dict(result="registered"))
@@ -1,13 +1,166 @@
+import hashlib
+import importlib.metadata
+import logging
+import os
 import pathlib
+import pickle
+from typing import List, Optional, Union
 
-from ariadne import load_schema_from_path
+import graphql
+from ariadne import SchemaBindable, convert_schema_names, make_executable_schema
+from ariadne.enums_default_values import (
+    repair_schema_default_enum_values,
+    validate_schema_default_enum_values,
+)
+from ariadne.executable_schema import SchemaBindables, normalize_bindables
+from ariadne.load_schema import read_graphql_file, walk_graphql_files
+from graphql import (
+    DocumentNode,
+    GraphQLSchema,
+    GraphQLSyntaxError,
+    assert_valid_schema,
+    build_ast_schema,
+    parse,
+)
+from graphql.validation.validate import assert_valid_sdl
+
+log = logging.getLogger(__name__)
+
+# bump when the layout of schema artifacts changes
+SCHEMA_ARTIFACT_VERSION = 1
+
+# every file loaded by `ariadne_load_local_graphql`, to report syntax errors by file
+graphql_files: List[str] = []
 
 
 def ariadne_load_local_graphql(current_file, graphql_file):
     """
     Given the current_file (__file__) of the caller and a graphql file name
-    import that file and load it with ariadne.load_schema_from_path
+    import that file or, given a directory, all the graphql files within it
+
+    Unlike ariadne.load_schema_from_path files aren't parsed when loaded, the
+    schema built out of them is either parsed once as a whole or prebuilt (see
+    `make_executable_schema_from_artifact`)
     """
     current_dir = pathlib.Path(current_file).parent.absolute()
     graphql_file_path = current_dir.joinpath(graphql_file)
-    return load_schema_from_path(graphql_file_path)
+    if os.path.isdir(graphql_file_path):
+        paths = sorted(walk_graphql_files(graphql_file_path))
+    else:
+        paths = [os.path.abspath(graphql_file_path)]
+
+    schema_list = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            schema_list.append(f.read())
+    graphql_files.extend(paths)
+    return "\n".join(schema_list)
+
+
+def join_type_defs(type_defs: List[str]) -> str:
+    # same as ariadne's make_executable_schema
+    return "\n\n".join(t.strip() for t in type_defs)
+
+
+def type_defs_checksum(type_defs: str) -> str:
+    # the artifact is a pickled AST, whose classes belong to graphql-core, and
+    # loading it replays parts of ariadne's private make_executable_schema
+    ariadne_version = importlib.metadata.version("ariadne")
+    key = (
+        f"{SCHEMA_ARTIFACT_VERSION}:{graphql.__version__}:{ariadne_version}:{type_defs}"
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _check_graphql_files() -> None:
+    # raises an error pointing at the culprit file instead of the joined schema
+    for path in graphql_files:
+        read_graphql_file(path)
+
+
+def build_schema_artifact(
+    type_defs: List[str], artifact_path: Union[str, os.PathLike]
+) -> str:
+    """
+    Parses and validates `type_defs` into an artifact, for
+    `make_executable_schema_from_artifact` to load instead of parsing them.
+    Returns the checksum of the type definitions it was built from.
+    """
+    joined = join_type_defs(type_defs)
+    try:
+        document = parse(joined, no_location=True)
+    except GraphQLSyntaxError:
+        _check_graphql_files()
+        raise
+    assert_valid_sdl(document)
+
+    checksum = type_defs_checksum(joined)
+    artifact = {"checksum": checksum, "document": document}
+    # written aside first so that workers never load a partial artifact
+    tmp_path = f"{artifact_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, artifact_path)
+    return checksum
+
+
+def load_schema_artifact(
+    artifact_path: Union[str, os.PathLike], checksum: str
+) -> Optional[DocumentNode]:
+    """
+    The parsed type definitions of the artifact at `artifact_path`, unless
+    there's none or it was built from type definitions other than `checksum`'s.
+    """
+    try:
+        with open(artifact_path, "rb") as f:
+            # artifacts are built along with the code, never from user input
+            artifact = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        log.warning("Failed to load the GraphQL schema artifact", exc_info=True)
+        return None
+
+    if artifact.get("checksum") != checksum:
+        log.info("GraphQL schema artifact is stale, building the schema from source")
+        return None
+    return artifact["document"]
+
+
+def make_executable_schema_from_artifact(
+    type_defs: List[str],
+    *bindables: SchemaBindables,
+    artifact_path: Union[str, os.PathLike],
+    convert_names_case: bool = False,
+) -> GraphQLSchema:
+    """
+    Same as ariadne's make_executable_schema, but the type definitions are
+    loaded from the artifact at `artifact_path` if it was built from them,
+    skipping their parsing and validation.
+    """
+    joined = join_type_defs(type_defs)
+    document = load_schema_artifact(artifact_path, type_defs_checksum(joined))
+    if document is None:
+        try:
+            return make_executable_schema(
+                joined, *bindables, convert_names_case=convert_names_case
+            )
+        except GraphQLSyntaxError:
+            _check_graphql_files()
+            raise
+
+    # the rest is ariadne's make_executable_schema, the SDL was validated when
+    # building the artifact
+    schema = build_ast_schema(document, assume_valid_sdl=True)
+    for bindable in normalize_bindables(*bindables):
+        if isinstance(bindable, SchemaBindable):
+            bindable.bind_to_schema(schema)
+
+    assert_valid_schema(schema)
+    validate_schema_default_enum_values(schema)
+    repair_schema_default_enum_values(schema)
+
+    if convert_names_case:
+        convert_schema_names(schema, None)
+
+    return schema
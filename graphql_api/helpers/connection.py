@@ -1,14 +1,14 @@
 import enum
-from base64 import b64decode
 from dataclasses import dataclass
 from functools import cached_property
 from typing import Any, Dict, List, Optional
 
 from asgiref.sync import sync_to_async
-from cursor_pagination import CursorPage, CursorPaginator, InvalidCursor
 from django.db.models import QuerySet
 
 from codecov.commands.exceptions import ValidationError
+from graphql_api.helpers.counts import CountResult, count_queryset
+from graphql_api.helpers.keyset import KeysetPage, KeysetPaginator
 from graphql_api.types.enums import OrderingDirection
 
 
@@ -18,6 +18,7 @@ def build_connection_graphql(connection_name, type_node):
         type {connection_name} {{
           edges: [{edge_name}]
           totalCount: Int!
+          isApproximate: Boolean!
           pageInfo: PageInfo!
         }}
 
@@ -39,8 +40,10 @@ def field_order(field, ordering):
 @dataclass
 class Connection:
     queryset: QuerySet
-    paginator: CursorPaginator
-    page: CursorPage
+    paginator: KeysetPaginator
+    page: KeysetPage
+    # cached counts of the queryset are invalidated on writes to this scope
+    count_scope: Optional[str] = None
 
     @cached_property
     def edges(self):
@@ -49,9 +52,17 @@ class Connection:
             for pos, node in enumerate(self.page)
         ]
 
+    @cached_property
+    def count(self) -> CountResult:
+        return count_queryset(self.queryset, scope=self.count_scope)
+
     @sync_to_async
     def total_count(self, *args, **kwargs):
-        return self.queryset.count()
+        return self.count.count
+
+    @sync_to_async
+    def is_approximate(self, *args, **kwargs):
+        return self.count.is_approximate
 
     @cached_property
     def start_cursor(self):
@@ -158,6 +169,10 @@ class ArrayConnection:
         """Total number of items in the original data"""
         return len(self.data)
 
+    @property
+    def is_approximate(self) -> bool:
+        return False
+
     @property
     def start_cursor(self) -> Optional[str]:
         """Cursor for the first item in the page"""
@@ -181,61 +196,6 @@ class ArrayConnection:
         }
 
 
-class DictCursorPaginator(CursorPaginator):
-    NULL_VALUE_REPR = "\x1f"
-    """
-    WARNING: DictCursorPaginator does not work for dict objects where a key contains the following string: "__"
-    TODO: if instance is a dictionary and not an object, don't split the ordering
-
-    ordering = "test__name"
-    Django object:
-    -> obj.test.name
-
-    Dict:
-    -> obj["test"]["name"] X wrong
-    we want obj["test__name"]
-
-    overrides CursorPaginator's position_from_instance method
-    because it assumes that instance's fields are attributes on the
-    instance. This doesn't work with the aggregate_test_results query
-    because since it uses annotate() and values() the instance is actually
-    a dict and the fields are keys in that dict.
-
-    So if getattr fails to find the attribute on the instance then we try getting the "attr"
-    via a dict access
-
-    if the dict access fails then it throws an exception, although it would be a different
-    """
-
-    def decode_cursor(self, cursor):
-        try:
-            orderings = b64decode(cursor.encode("ascii")).decode("utf8")
-            orderings = orderings.split(self.delimiter)
-            return [
-                None if ordering == self.NULL_VALUE_REPR else ordering
-                for ordering in orderings
-            ]
-        except (TypeError, ValueError):
-            raise InvalidCursor(self.invalid_cursor_message)
-
-    def position_from_instance(self, instance):
-        position = []
-        for order in self.ordering:
-            parts = order.lstrip("-").split("__")
-            attr = instance
-            while parts:
-                try:
-                    attr = getattr(attr, parts[0])
-                except AttributeError as attr_err:
-                    try:
-                        attr = attr[parts[0]]
-                    except (KeyError, TypeError):
-                        raise attr_err from None
-                parts.pop(0)
-            position.append(self.NULL_VALUE_REPR if attr is None else str(attr))
-        return position
-
-
 def queryset_to_connection_sync(
     data: QuerySet | list,
     *,
@@ -245,10 +205,12 @@ def queryset_to_connection_sync(
     after=None,
     last=None,
     before=None,
+    count_scope=None,
 ):
     """
     A method to take a queryset or an array and return it in paginated order based on the cursor pattern.
     Handles both QuerySets (database queries) and arrays (in-memory data).
+    `count_scope` is the scope the total count of a queryset is cached in, see `graphql_api.helpers.counts`.
     """
     if not first and not last:
         first = 25
@@ -261,9 +223,9 @@ def queryset_to_connection_sync(
 
     else:
         ordering = tuple(field_order(field, ordering_direction) for field in ordering)
-        paginator = DictCursorPaginator(data, ordering=ordering)
+        paginator = KeysetPaginator(data, ordering=ordering)
         page = paginator.page(first=first, after=after, last=last, before=before)
-        return Connection(data, paginator, page)
+        return Connection(data, paginator, page, count_scope=count_scope)
 
 
 @sync_to_async
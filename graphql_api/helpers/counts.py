@@ -0,0 +1,118 @@
+"""
+Counts of the querysets behind GraphQL connections.
+
+Exact counts of large querysets, e.g. the commits of repositories with millions of
+them, are too expensive to run on every page view.  Querysets are therefore counted
+up to `GRAPHQL_EXACT_COUNT_THRESHOLD` rows first, which is cheap whatever their size:
+
+- under that many rows the count is exact,
+- above it, querysets whose planner estimate is under
+  `GRAPHQL_ESTIMATED_COUNT_THRESHOLD` rows are counted exactly once and then served
+  from Redis, until a write to the count's scope (e.g. a new commit in the
+  repository) invalidates it or it expires,
+- and the planner estimate itself is used for the others.
+
+Cached counts may lag behind writes made outside of the API, so they're flagged as
+approximate, as are estimates.
+"""
+
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from redis.exceptions import RedisError
+from shared.helpers.redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+COUNT_CACHE_TTL = 60 * 60
+
+
+@dataclass(frozen=True)
+class CountResult:
+    count: int
+    is_approximate: bool = False
+
+
+def repository_count_scope(repoid: int) -> str:
+    return f"repository:{repoid}"
+
+
+def owner_count_scope(ownerid: int) -> str:
+    return f"owner:{ownerid}"
+
+
+def _version_key(scope: str) -> str:
+    return f"connection_count_version:{scope}"
+
+
+def invalidate_counts(scope: str) -> None:
+    """
+    Invalidates the cached counts of every queryset counted within `scope`.
+    """
+    # a fresh token rather than a counter: once the version expires, counts cached
+    # under a previous one are expired too, whereas a counter would start over and
+    # bring them back
+    redis.set(_version_key(scope), uuid.uuid4().hex, ex=COUNT_CACHE_TTL)
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    The number of rows of `queryset` as estimated by the query planner.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        (plan,) = cursor.fetchone()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_key(queryset: QuerySet, scope: str) -> str:
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha256(f"{sql}:{params!r}".encode("utf-8")).hexdigest()
+    version = (redis.get(_version_key(scope)) or b"").decode()
+    return f"connection_count:{scope}:{version}:{digest}"
+
+
+def count_queryset(queryset: QuerySet, scope: Optional[str] = None) -> CountResult:
+    """
+    Counts `queryset`, see the module's docstring.  Only querysets with a `scope`
+    have their counts cached, they're invalidated by `invalidate_counts(scope)`.
+    """
+    threshold = settings.GRAPHQL_EXACT_COUNT_THRESHOLD
+    count = queryset.order_by()[: threshold + 1].count()
+    if count <= threshold:
+        return CountResult(count)
+
+    key = None
+    if scope is not None:
+        try:
+            key = _count_key(queryset, scope)
+            cached = redis.get(key)
+        except RedisError:
+            log.warning("Failed to read cached count", exc_info=True)
+            cached = None
+        if cached is not None:
+            return CountResult(int(cached), is_approximate=True)
+
+    estimate = estimate_count(queryset)
+    if estimate >= settings.GRAPHQL_ESTIMATED_COUNT_THRESHOLD:
+        return CountResult(estimate, is_approximate=True)
+
+    count = queryset.count()
+    if key is not None:
+        try:
+            redis.set(key, count, ex=COUNT_CACHE_TTL)
+        except RedisError:
+            log.warning("Failed to cache count", exc_info=True)
+    return CountResult(count)
@@ -0,0 +1,255 @@
+"""
+Keyset pagination of querysets for GraphQL connections.
+
+The ordering of a connection is compiled once into the keys rows are compared on:
+their column, direction, nullability, the field converting cursor values back to
+Python and an accessor reading their value from fetched rows.  A page is then a
+single query filtered on the keyset predicate of its cursor, fetching one extra
+row to know whether there's another page.  When no key is nullable the predicate
+is a row comparison, e.g. `(timestamp, id) < (%s, %s)`, which Postgres can serve
+straight from a composite index.
+
+Like with `django-cursor-pagination`, which this replaces, nulls sort last and
+cursors are the base64 encoded, `|` separated positions of rows.
+"""
+
+from base64 import b64decode, b64encode
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import reduce
+from operator import attrgetter, itemgetter, or_
+from typing import Any, Callable, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import BooleanField, Expression, F, Field, Q, QuerySet, Value
+from django.db.models.query import ModelIterable, ValuesIterable
+
+from codecov.commands.exceptions import ValidationError
+
+DELIMITER = "|"
+NULL_VALUE_REPR = "\x1f"
+
+
+class KeysetPage(Sequence):
+    def __init__(
+        self, items: List[Any], has_next: bool = False, has_previous: bool = False
+    ):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+
+@dataclass(frozen=True)
+class _Key:
+    name: str
+    descending: bool
+    nullable: bool
+    field: Field
+    accessor: Callable[[Any], Any]
+
+
+class _RowComparison(Expression):
+    """
+    `(lhs, ...) <operator> (rhs, ...)`
+    """
+
+    def __init__(self, lhs: List[Any], operator: str, rhs: List[Any]):
+        super().__init__(output_field=BooleanField())
+        self.lhs = list(lhs)
+        self.operator = operator
+        self.rhs = list(rhs)
+
+    def get_source_expressions(self):
+        return [*self.lhs, *self.rhs]
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[: len(self.lhs)], exprs[len(self.lhs) :]
+
+    def as_sql(self, compiler, connection):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        lhs, rhs = sqls[: len(self.lhs)], sqls[len(self.lhs) :]
+        return f"({', '.join(lhs)}) {self.operator} ({', '.join(rhs)})", params
+
+
+def _model_field(model, name: str) -> Tuple[Field, bool]:
+    nullable = False
+    for part in name.split("__"):
+        field = model._meta.get_field(part)
+        nullable = nullable or field.null
+        if field.is_relation:
+            model = field.related_model
+    return field, nullable
+
+
+class KeysetPaginator:
+    """
+    Paginates `queryset` ordered by `ordering`, e.g. `("-timestamp",)`.  Unless rows
+    are dicts (`.values()` querysets) the primary key is added to the ordering as a
+    tiebreaker if it isn't there already, so that pages never skip rows.
+    """
+
+    def __init__(self, queryset: QuerySet, ordering: Tuple[str, ...]):
+        if issubclass(queryset._iterable_class, ValuesIterable):
+            rows_are_dicts = True
+        elif issubclass(queryset._iterable_class, ModelIterable):
+            rows_are_dicts = False
+        else:
+            raise ValueError("Only model and .values() querysets can be paginated")
+
+        ordering = tuple(ordering)
+        if not rows_are_dicts and ordering:
+            pk = queryset.model._meta.pk
+            names = {order.lstrip("-") for order in ordering}
+            if names.isdisjoint({"pk", pk.name, pk.attname}):
+                descending = ordering[-1].startswith("-")
+                ordering += (f"-{pk.name}" if descending else pk.name,)
+
+        self.ordering = ordering
+        self.keys = [
+            self._compile_key(queryset, order, rows_are_dicts) for order in ordering
+        ]
+        self.queryset = queryset.order_by(*self._order_by())
+
+    @staticmethod
+    def _compile_key(queryset: QuerySet, order: str, rows_are_dicts: bool) -> _Key:
+        name = order.lstrip("-")
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            field, nullable = annotation.output_field, True
+        else:
+            field, nullable = _model_field(queryset.model, name)
+
+        return _Key(
+            name=name,
+            descending=order.startswith("-"),
+            nullable=nullable,
+            field=field,
+            accessor=(
+                itemgetter(name)
+                if rows_are_dicts
+                else attrgetter(name.replace("__", "."))
+            ),
+        )
+
+    def _order_by(self, reverse: bool = False) -> List[Any]:
+        # nulls come last, so they come first when fetching backwards
+        nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+        return [
+            F(key.name).desc(**nulls)
+            if key.descending != reverse
+            else F(key.name).asc(**nulls)
+            for key in self.keys
+        ]
+
+    def position(self, row: Any) -> List[str]:
+        position = []
+        for key in self.keys:
+            value = key.accessor(row)
+            position.append(NULL_VALUE_REPR if value is None else str(value))
+        return position
+
+    def cursor(self, row: Any) -> str:
+        return b64encode(DELIMITER.join(self.position(row)).encode("utf8")).decode(
+            "ascii"
+        )
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        try:
+            values = b64decode(cursor.encode("ascii")).decode("utf8").split(DELIMITER)
+            if len(values) > len(self.keys):
+                raise ValueError(cursor)
+            # cursors may lack the tiebreaker if they predate it
+            return [
+                None if value == NULL_VALUE_REPR else key.field.to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (DjangoValidationError, TypeError, ValueError):
+            # includes base64 and unicode decoding errors
+            raise ValidationError("Invalid cursor")
+
+    def _keyset_filter(self, position: List[Any], after: bool) -> Q | Expression:
+        """
+        Rows after (or before) `position`, in the order of the paginator.
+        """
+        keys = self.keys[: len(position)]
+        if (
+            None not in position
+            and not any(key.nullable for key in keys)
+            and len({key.descending for key in keys}) == 1
+        ):
+            operator = ">" if after != keys[0].descending else "<"
+            return _RowComparison(
+                [F(key.name) for key in keys],
+                operator,
+                [
+                    Value(value, output_field=key.field)
+                    for key, value in zip(keys, position)
+                ],
+            )
+
+        branches = []
+        equal = Q()
+        for key, value in zip(keys, position):
+            if value is None:
+                # nulls come last, only non-null values come before them
+                if not after:
+                    branches.append(equal & Q(**{f"{key.name}__isnull": False}))
+                equal &= Q(**{f"{key.name}__isnull": True})
+                continue
+
+            lookup = "lt" if key.descending == after else "gt"
+            branch = Q(**{f"{key.name}__{lookup}": value})
+            if after and key.nullable:
+                branch |= Q(**{f"{key.name}__isnull": True})
+            branches.append(equal & branch)
+            equal &= Q(**{key.name: value})
+
+        if not branches:
+            return Q(pk__in=[])
+        return reduce(or_, branches)
+
+    def page(
+        self,
+        first: Optional[int] = None,
+        last: Optional[int] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> KeysetPage:
+        if first is not None and last is not None:
+            raise ValidationError("Cannot provide both 'first' and 'last'")
+
+        queryset = self.queryset
+        if after is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(self.decode_cursor(after), after=True)
+            )
+        if before is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(self.decode_cursor(before), after=False)
+            )
+
+        if last is not None:
+            rows = list(queryset.order_by(*self._order_by(reverse=True))[: last + 1])
+            items = rows[:last]
+            items.reverse()
+            return KeysetPage(
+                items, has_next=bool(before), has_previous=len(rows) > last
+            )
+
+        if first is None:
+            return KeysetPage(list(queryset))
+
+        rows = list(queryset[: first + 1])
+        return KeysetPage(
+            rows[:first], has_next=len(rows) > first, has_previous=bool(after)
+        )
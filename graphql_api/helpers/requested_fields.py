@@ -1,6 +1,8 @@
 # This was adapted from <https://github.com/mirumee/ariadne/discussions/1116#discussioncomment-6508603>
-from collections.abc import Generator, Iterable
+from collections.abc import Generator, Iterable, Mapping
+from dataclasses import dataclass
 
+from django.db.models import Prefetch, QuerySet
 from graphql import GraphQLResolveInfo
 from graphql.language import (
     FieldNode,
@@ -57,3 +59,90 @@ def _fields_from_selections(
 
             case _:
                 raise NotImplementedError(f"field type {type(selection)} not supported")
+
+
+@dataclass(frozen=True)
+class FieldRequirements:
+    """
+    What the objects of a queryset need to resolve some of their GraphQL fields:
+    `annotations` name queryset methods adding annotations, e.g.
+    `with_recent_coverage`, the others are passed to the queryset methods of the
+    same name.
+    """
+
+    annotations: tuple[str, ...] = ()
+    select_related: tuple[str, ...] = ()
+    prefetch_related: tuple[str | Prefetch, ...] = ()
+
+
+class QuerysetShape:
+    """
+    Maps the GraphQL fields of a type to the requirements of the queryset its
+    objects are fetched with, so that queries only pay for the fields selected.
+
+    Fields are paths as returned by `selected_fields`, relative to the objects, and
+    their requirements cover their subfields too.  Selected fields that aren't
+    mapped get the `default` requirements.
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, FieldRequirements],
+        default: FieldRequirements = FieldRequirements(),
+    ):
+        self.fields = fields
+        self.default = default
+
+    def requirements(
+        self, requested_fields: Iterable[str], prefix: str = ""
+    ) -> list[FieldRequirements]:
+        """
+        The requirements of the `requested_fields` under `prefix`, e.g. `edges.node`
+        for the nodes of a connection.
+        """
+        requirements = []
+        for field in requested_fields:
+            if prefix:
+                if not field.startswith(f"{prefix}."):
+                    continue
+                field = field[len(prefix) + 1 :]
+
+            parts = field.split(".")
+            mapped = [
+                self.fields[path]
+                for path in (".".join(parts[:i]) for i in range(1, len(parts) + 1))
+                if path in self.fields
+            ]
+            if mapped:
+                requirements.extend(mapped)
+            elif not any(path.startswith(f"{field}.") for path in self.fields):
+                # subfields of a field that is mapped have their own requirements
+                requirements.append(self.default)
+        return requirements
+
+    def apply(
+        self,
+        queryset: QuerySet,
+        requested_fields: Iterable[str],
+        prefix: str = "",
+        extra: Iterable[FieldRequirements] = (),
+    ) -> QuerySet:
+        """
+        `queryset` with what the `requested_fields` under `prefix` and the `extra`
+        requirements (e.g. of the ordering) need.
+        """
+        annotations: dict[str, None] = {}
+        select_related: dict[str, None] = {}
+        prefetch_related: dict[str | Prefetch, None] = {}
+        for requirement in [*self.requirements(requested_fields, prefix), *extra]:
+            annotations.update(dict.fromkeys(requirement.annotations))
+            select_related.update(dict.fromkeys(requirement.select_related))
+            prefetch_related.update(dict.fromkeys(requirement.prefetch_related))
+
+        for annotation in annotations:
+            queryset = getattr(queryset, annotation)()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
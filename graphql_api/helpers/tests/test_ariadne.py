@@ -0,0 +1,151 @@
+from unittest.mock import patch
+
+import pytest
+from ariadne import ObjectType, graphql_sync
+from ariadne.exceptions import GraphQLFileSyntaxError
+from graphql import GraphQLSyntaxError, print_schema
+
+from graphql_api.helpers import ariadne as ariadne_helpers
+from graphql_api.helpers.ariadne import (
+    ariadne_load_local_graphql,
+    build_schema_artifact,
+    join_type_defs,
+    load_schema_artifact,
+    make_executable_schema_from_artifact,
+    type_defs_checksum,
+)
+from graphql_api.schema import get_schema
+from graphql_api.types import types
+
+type_defs = [
+    """
+    type Query {
+        repository: Repository
+    }
+    """,
+    """
+    type Repository {
+        name: String!
+        updatedAt: String
+    }
+    """,
+]
+
+
+def _bindables():
+    query = ObjectType("Query")
+    query.set_field("repository", lambda *_: {"updated_at": "today"})
+    repository = ObjectType("Repository")
+    repository.set_field("name", lambda *_: "codecov-api")
+    return [query, repository]
+
+
+def _execute(schema):
+    _, result = graphql_sync(schema, {"query": "{ repository { name updatedAt } }"})
+    return result
+
+
+def test_schema_from_artifact(tmp_path):
+    artifact_path = tmp_path / "schema.artifact"
+    build_schema_artifact(type_defs, artifact_path)
+
+    with patch("graphql_api.helpers.ariadne.make_executable_schema") as from_source:
+        schema = make_executable_schema_from_artifact(
+            type_defs,
+            *_bindables(),
+            artifact_path=artifact_path,
+            convert_names_case=True,
+        )
+    assert not from_source.called
+
+    expected = make_executable_schema_from_artifact(
+        type_defs,
+        *_bindables(),
+        artifact_path=tmp_path / "missing.artifact",
+        convert_names_case=True,
+    )
+    assert print_schema(schema) == print_schema(expected)
+    assert _execute(schema) == _execute(expected)
+    assert _execute(schema) == {
+        "data": {"repository": {"name": "codecov-api", "updatedAt": "today"}}
+    }
+
+
+def test_stale_artifact(tmp_path):
+    artifact_path = tmp_path / "schema.artifact"
+    build_schema_artifact(
+        type_defs[:1] + ["type Repository { name: String! }"], artifact_path
+    )
+
+    schema = make_executable_schema_from_artifact(
+        type_defs, *_bindables(), artifact_path=artifact_path, convert_names_case=True
+    )
+    assert "updatedAt" in schema.type_map["Repository"].fields
+
+
+def test_corrupt_artifact(tmp_path):
+    artifact_path = tmp_path / "schema.artifact"
+    artifact_path.write_bytes(b"not a pickle")
+
+    schema = make_executable_schema_from_artifact(
+        type_defs, *_bindables(), artifact_path=artifact_path, convert_names_case=True
+    )
+    assert _execute(schema)["data"]["repository"]["name"] == "codecov-api"
+
+
+def test_syntax_errors_are_reported_by_file(tmp_path):
+    (tmp_path / "broken.graphql").write_text("type Repository {")
+
+    with patch.object(ariadne_helpers, "graphql_files", []):
+        broken = ariadne_load_local_graphql(tmp_path / "schema.py", "broken.graphql")
+        assert ariadne_helpers.graphql_files == [str(tmp_path / "broken.graphql")]
+
+        with pytest.raises(GraphQLFileSyntaxError, match="broken.graphql"):
+            build_schema_artifact(type_defs + [broken], tmp_path / "schema.artifact")
+        with pytest.raises(GraphQLFileSyntaxError, match="broken.graphql"):
+            make_executable_schema_from_artifact(
+                type_defs + [broken], artifact_path=tmp_path / "schema.artifact"
+            )
+
+    with patch.object(ariadne_helpers, "graphql_files", []):
+        with pytest.raises(GraphQLSyntaxError):
+            build_schema_artifact(type_defs + [broken], tmp_path / "schema.artifact")
+
+
+def test_codecov_schema_from_artifact(tmp_path):
+    artifact_path = tmp_path / "schema.artifact"
+    build_schema_artifact(types, artifact_path)
+
+    with patch("graphql_api.schema.SCHEMA_ARTIFACT_PATH", artifact_path):
+        get_schema.cache_clear()
+        try:
+            with patch(
+                "graphql_api.helpers.ariadne.make_executable_schema"
+            ) as from_source:
+                schema = get_schema()
+            assert not from_source.called
+        finally:
+            get_schema.cache_clear()
+
+    # same schema as built from source by ariadne
+    with patch("graphql_api.schema.SCHEMA_ARTIFACT_PATH", tmp_path / "missing"):
+        get_schema.cache_clear()
+        try:
+            expected = get_schema()
+        finally:
+            get_schema.cache_clear()
+
+    assert print_schema(schema) == print_schema(expected)
+
+
+def test_artifact_is_stale_across_ariadne_versions(tmp_path):
+    artifact_path = tmp_path / "schema.artifact"
+    checksum = build_schema_artifact(type_defs, artifact_path)
+    assert load_schema_artifact(artifact_path, checksum) is not None
+
+    with patch(
+        "graphql_api.helpers.ariadne.importlib.metadata.version",
+        return_value="0.0.0",
+    ):
+        checksum = type_defs_checksum(join_type_defs(type_defs))
+    assert load_schema_artifact(artifact_path, checksum) is None
@@ -156,8 +156,9 @@ class RepositoryQuerySetTests(TestCase):
         with self.assertRaises(ValidationError):
             queryset_to_connection_sync(data, first=3, after="invalid")
 
-    def test_dict_cursor_paginator_null_encoding(self):
-        from graphql_api.helpers.connection import DictCursorPaginator, field_order
+    def test_keyset_paginator_null_encoding(self):
+        from graphql_api.helpers.connection import field_order
+        from graphql_api.helpers.keyset import KeysetPaginator
 
         repo_1 = RepositoryFactory(name="a", active=None)
         repo_2 = RepositoryFactory(name="b", active=True)
@@ -168,8 +169,8 @@ class RepositoryQuerySetTests(TestCase):
             field_order(field, OrderingDirection.ASC) for field in ("active",)
         )
 
-        paginator = DictCursorPaginator(r, ordering=ordering)
+        paginator = KeysetPaginator(r, ordering=ordering)
 
-        assert paginator.position_from_instance(repo_1) == ["\x1f"]
-        assert paginator.position_from_instance(repo_2) == ["True"]
-        assert paginator.position_from_instance(repo_3) == ["False"]
+        assert paginator.position(repo_1) == ["\x1f", str(repo_1.repoid)]
+        assert paginator.position(repo_2) == ["True", str(repo_2.repoid)]
+        assert paginator.position(repo_3) == ["False", str(repo_3.repoid)]
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from shared.django_apps.core.tests.factories import OwnerFactory, RepositoryFactory
+
+from core.models import Repository
+from graphql_api.helpers.connection import queryset_to_connection_sync
+from graphql_api.helpers.counts import (
+    CountResult,
+    count_queryset,
+    estimate_count,
+    invalidate_counts,
+    owner_count_scope,
+)
+from graphql_api.types.enums import OrderingDirection
+
+
+@override_settings(
+    GRAPHQL_EXACT_COUNT_THRESHOLD=1, GRAPHQL_ESTIMATED_COUNT_THRESHOLD=1000
+)
+class CountQuerysetTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("graphql_api.helpers.counts.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
+        self.owner = OwnerFactory()
+        RepositoryFactory(author=self.owner, name="a")
+        RepositoryFactory(author=self.owner, name="b")
+        self.queryset = Repository.objects.filter(author=self.owner)
+        self.scope = owner_count_scope(self.owner.ownerid)
+
+    def test_estimate_count(self):
+        assert estimate_count(self.queryset) >= 0
+        assert estimate_count(self.queryset.none()) == 0
+        assert estimate_count(Repository.objects.filter(repoid__in=[])) == 0
+
+    @override_settings(GRAPHQL_EXACT_COUNT_THRESHOLD=10)
+    @patch("graphql_api.helpers.counts.estimate_count")
+    def test_exact_under_threshold(self, estimate_count):
+        # small querysets are counted without asking the planner
+        with self.assertNumQueries(1):
+            assert count_queryset(self.queryset, self.scope) == CountResult(2)
+        estimate_count.assert_not_called()
+        assert self.redis.keys("connection_count:*") == []
+
+    @patch("graphql_api.helpers.counts.estimate_count", return_value=5000)
+    def test_estimate_above_threshold(self, _):
+        # the count is bounded by the threshold
+        with self.assertNumQueries(1):
+            result = count_queryset(self.queryset, self.scope)
+        assert result == CountResult(5000, is_approximate=True)
+
+    @patch("graphql_api.helpers.counts.estimate_count", return_value=500)
+    def test_cached_until_invalidated(self, _):
+        assert count_queryset(self.queryset, self.scope) == CountResult(2)
+        with self.assertNumQueries(1):
+            result = count_queryset(self.queryset, self.scope)
+        assert result == CountResult(2, is_approximate=True)
+
+        # saving a repository of the owner invalidates the owner's counts
+        RepositoryFactory(author=self.owner, name="c")
+        assert count_queryset(self.queryset, self.scope) == CountResult(3)
+
+    @patch("graphql_api.helpers.counts.estimate_count", return_value=500)
+    def test_invalidated_after_version_expired(self, _):
+        invalidate_counts(self.scope)
+        assert count_queryset(self.queryset, self.scope) == CountResult(2)
+        RepositoryFactory(author=self.owner, name="c")
+
+        # versions never repeat, counts cached under a previous one aren't served
+        # again once the current one expires
+        self.redis.delete(f"connection_count_version:{self.scope}")
+        invalidate_counts(self.scope)
+        assert count_queryset(self.queryset, self.scope) == CountResult(3)
+
+    @patch("graphql_api.helpers.counts.estimate_count", return_value=500)
+    def test_not_cached_without_scope(self, _):
+        assert count_queryset(self.queryset) == CountResult(2)
+        assert count_queryset(self.queryset) == CountResult(2)
+        assert self.redis.keys("connection_count:*") == []
+
+    @patch("graphql_api.helpers.counts.estimate_count", return_value=5000)
+    def test_connection_is_approximate(self, _):
+        connection = queryset_to_connection_sync(
+            self.queryset,
+            ordering=("name",),
+            ordering_direction=OrderingDirection.ASC,
+            count_scope=self.scope,
+        )
+
+        assert async_to_sync(connection.total_count)() == 5000
+        assert async_to_sync(connection.is_approximate)() is True
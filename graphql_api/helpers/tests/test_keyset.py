@@ -0,0 +1,112 @@
+import pytest
+from django.test import TestCase
+from shared.django_apps.core.tests.factories import OwnerFactory, RepositoryFactory
+
+from codecov.commands.exceptions import ValidationError
+from core.models import Repository
+from graphql_api.helpers.keyset import KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        owner = OwnerFactory()
+        self.repos = [
+            RepositoryFactory(author=owner, name="a", active=True),
+            RepositoryFactory(author=owner, name="b", active=None),
+            RepositoryFactory(author=owner, name="b", active=False),
+            RepositoryFactory(author=owner, name="b", active=None),
+            RepositoryFactory(author=owner, name="c", active=True),
+        ]
+        self.queryset = Repository.objects.filter(author=owner)
+
+    def _walk_forward(self, paginator, first):
+        seen, after = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page = paginator.page(first=first, after=after)
+            seen.extend(page)
+            if not page.has_next:
+                return seen
+            after = paginator.cursor(page[-1])
+
+    def _walk_backward(self, paginator, last):
+        seen, before = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page = paginator.page(last=last, before=before)
+            seen = list(page) + seen
+            if not page.has_previous:
+                return seen
+            before = paginator.cursor(page[0])
+
+    def test_ties_are_broken_by_primary_key(self):
+        paginator = KeysetPaginator(self.queryset, ordering=("name",))
+        assert paginator.ordering == ("name", "repoid")
+
+        expected = sorted(self.repos, key=lambda repo: (repo.name, repo.repoid))
+        assert self._walk_forward(paginator, first=2) == expected
+        assert self._walk_backward(paginator, last=2) == expected
+
+    def test_descending(self):
+        paginator = KeysetPaginator(self.queryset, ordering=("-name",))
+        assert paginator.ordering == ("-name", "-repoid")
+
+        expected = sorted(
+            self.repos, key=lambda repo: (repo.name, repo.repoid), reverse=True
+        )
+        assert self._walk_forward(paginator, first=1) == expected
+        assert self._walk_backward(paginator, last=3) == expected
+
+    def test_nulls_last(self):
+        paginator = KeysetPaginator(self.queryset, ordering=("active",))
+
+        expected = [
+            self.repos[2],
+            self.repos[0],
+            self.repos[4],
+            self.repos[1],
+            self.repos[3],
+        ]
+        assert self._walk_forward(paginator, first=2) == expected
+        assert self._walk_backward(paginator, last=2) == expected
+
+    def test_page_info(self):
+        paginator = KeysetPaginator(self.queryset, ordering=("repoid",))
+
+        page = paginator.page(first=5)
+        assert len(page) == 5
+        assert not page.has_next
+        assert not page.has_previous
+
+        page = paginator.page(first=2, after=paginator.cursor(self.repos[0]))
+        assert list(page) == self.repos[1:3]
+        assert page.has_next
+        assert page.has_previous
+
+        page = paginator.page(last=2, before=paginator.cursor(self.repos[3]))
+        assert list(page) == self.repos[1:3]
+        assert page.has_next
+        assert page.has_previous
+
+    def test_values_queryset(self):
+        paginator = KeysetPaginator(
+            self.queryset.values("name", "repoid"), ordering=("-name", "-repoid")
+        )
+
+        page = paginator.page(first=2)
+        assert [row["repoid"] for row in page] == [
+            self.repos[4].repoid,
+            self.repos[3].repoid,
+        ]
+        page = paginator.page(first=2, after=paginator.cursor(page[-1]))
+        assert [row["repoid"] for row in page] == [
+            self.repos[2].repoid,
+            self.repos[1].repoid,
+        ]
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(self.queryset, ordering=("repoid",))
+
+        for cursor in ["not base64!", "YWJj", "MXwyfDM="]:
+            with pytest.raises(ValidationError):
+                paginator.page(first=2, after=cursor)
@@ -0,0 +1,391 @@
+"""
+An opt-in profiler of GraphQL resolvers.
+
+`ResolverProfilerExtension` records, per field (`ParentType.fieldName`), the
+wall time of its resolvers, the database queries they ran and their calls to
+Redis, storage and git providers, along with the batch sizes of the
+DataLoaders. Requests are profiled when `GRAPHQL_PROFILER_ENABLED` is set,
+which exports the profiles as Prometheus histograms and logs the requests
+running more queries than their `GRAPHQL_QUERY_BUDGETS`, or when staff users
+send an `X-GraphQL-Profile` header, which returns a summary of the profile in
+the response (see `AsyncGraphqlView.post`).
+
+Queries and calls are attributed to the field being resolved through context
+variables, which asgiref carries into `sync_to_async` threads.
+"""
+
+import functools
+import importlib
+import inspect
+import logging
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from ariadne.types import Extension, Resolver
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from graphql import GraphQLResolveInfo
+from graphql.pyutils import is_awaitable
+from shared.metrics import Histogram
+
+log = logging.getLogger(__name__)
+
+GQL_RESOLVER_LATENCIES = Histogram(
+    "api_gql_timers_resolver_seconds",
+    "Total runtime in seconds of the resolvers of a field in a query",
+    ["field"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10],
+)
+
+GQL_RESOLVER_QUERIES = Histogram(
+    "api_gql_resolver_db_queries",
+    "Number of database queries run by the resolvers of a field in a query",
+    ["field"],
+    buckets=[0, 1, 2, 5, 10, 25, 50, 100, 250, 500],
+)
+
+GQL_RESOLVER_QUERY_LATENCIES = Histogram(
+    "api_gql_timers_resolver_db_seconds",
+    "Total runtime in seconds of the database queries of a field in a query",
+    ["field"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10],
+)
+
+GQL_RESOLVER_CALLS = Histogram(
+    "api_gql_resolver_calls",
+    "Number of Redis, storage or provider calls made by the resolvers of a field in a query",
+    ["field", "kind"],
+    buckets=[0, 1, 2, 5, 10, 25, 50, 100],
+)
+
+GQL_DATALOADER_BATCH_SIZES = Histogram(
+    "api_gql_dataloader_batch_size",
+    "Number of keys loaded by a DataLoader batch",
+    ["loader"],
+    buckets=[1, 2, 5, 10, 25, 50, 100, 250, 500],
+)
+
+# the header of the requests returning their profile
+PROFILE_HEADER = "HTTP_X_GRAPHQL_PROFILE"
+
+# what queries and calls made outside of any resolver are attributed to
+REQUEST = "(request)"
+
+# (module, class, methods, kind) of the calls which are counted
+INSTRUMENTED_CALLS = [
+    ("redis.client", "Redis", ("execute_command",), "redis"),
+    ("redis.client", "Pipeline", ("execute",), "redis"),
+    *(
+        (
+            f"shared.storage.{module}",
+            cls,
+            (
+                "read_file",
+                "write_file",
+                "append_to_file",
+                "delete_file",
+                "delete_files",
+                "list_folder_contents",
+            ),
+            "storage",
+        )
+        for module, cls in [
+            ("minio", "MinioStorageService"),
+            ("gcp", "GCPStorageService"),
+            ("aws", "AWSStorageService"),
+        ]
+    ),
+    ("shared.torngit.github", "Github", ("api",), "provider"),
+    ("shared.torngit.gitlab", "Gitlab", ("api",), "provider"),
+    ("shared.torngit.bitbucket", "Bitbucket", ("api",), "provider"),
+]
+
+
+@dataclass
+class FieldProfile:
+    resolved: int = 0
+    duration: float = 0
+    queries: int = 0
+    query_duration: float = 0
+    calls: Counter = field(default_factory=Counter)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "resolved": self.resolved,
+            "duration": round(self.duration * 1e3, 3),
+            "queries": self.queries,
+            "queryDuration": round(self.query_duration * 1e3, 3),
+            "calls": dict(self.calls),
+        }
+
+
+class Profile:
+    def __init__(self) -> None:
+        self.operation_name: Optional[str] = None
+        self.fields: defaultdict[str, FieldProfile] = defaultdict(FieldProfile)
+        self.batches: defaultdict[str, list[int]] = defaultdict(list)
+        self.start: float = time.perf_counter()
+        self.duration: float = 0
+
+    @property
+    def queries(self) -> int:
+        return sum(field_profile.queries for field_profile in self.fields.values())
+
+    @property
+    def query_duration(self) -> float:
+        return sum(
+            field_profile.query_duration for field_profile in self.fields.values()
+        )
+
+    def top_fields(self, limit: int) -> list[tuple[str, FieldProfile]]:
+        return sorted(
+            self.fields.items(),
+            key=lambda item: (item[1].queries, item[1].duration),
+            reverse=True,
+        )[:limit]
+
+    def summary(self, limit: int = 50) -> dict[str, Any]:
+        calls: Counter = Counter()
+        for field_profile in self.fields.values():
+            calls.update(field_profile.calls)
+        return {
+            "operationName": self.operation_name,
+            "duration": round(self.duration * 1e3, 3),
+            "queries": self.queries,
+            "queryDuration": round(self.query_duration * 1e3, 3),
+            "calls": dict(calls),
+            "fields": {
+                name: field_profile.summary()
+                for name, field_profile in self.top_fields(limit)
+            },
+            "dataloaders": dict(self.batches),
+        }
+
+    def server_timing(self, limit: int = 5) -> str:
+        """
+        The summary of the profile as a `Server-Timing` header, shown by browsers'
+        developer tools.
+        """
+        metrics = [
+            f"total;dur={self.duration * 1e3:.1f}",
+            f'db;dur={self.query_duration * 1e3:.1f};desc="{self.queries} queries"',
+        ]
+        metrics += [
+            f'{name};dur={field_profile.duration * 1e3:.1f};desc="{field_profile.queries} queries"'
+            for name, field_profile in self.top_fields(limit)
+        ]
+        return ", ".join(metrics)
+
+    def export(self) -> None:
+        for name, field_profile in self.fields.items():
+            GQL_RESOLVER_LATENCIES.labels(field=name).observe(field_profile.duration)
+            GQL_RESOLVER_QUERIES.labels(field=name).observe(field_profile.queries)
+            GQL_RESOLVER_QUERY_LATENCIES.labels(field=name).observe(
+                field_profile.query_duration
+            )
+            for kind, count in field_profile.calls.items():
+                GQL_RESOLVER_CALLS.labels(field=name, kind=kind).observe(count)
+        for loader, sizes in self.batches.items():
+            for size in sizes:
+                GQL_DATALOADER_BATCH_SIZES.labels(loader=loader).observe(size)
+
+    def check_budget(self) -> None:
+        budget = settings.GRAPHQL_QUERY_BUDGETS.get(
+            self.operation_name, settings.GRAPHQL_QUERY_BUDGET
+        )
+        queries = self.queries
+        if budget is not None and queries > budget:
+            log.warning(
+                "GraphQL query budget exceeded",
+                extra=dict(
+                    operation_name=self.operation_name,
+                    queries=queries,
+                    budget=budget,
+                    fields={
+                        name: field_profile.queries
+                        for name, field_profile in self.top_fields(5)
+                    },
+                ),
+            )
+
+
+_profile: ContextVar[Optional[Profile]] = ContextVar("graphql_profile", default=None)
+_field: ContextVar[str] = ContextVar("graphql_profile_field", default=REQUEST)
+
+
+def _current_field() -> Optional[FieldProfile]:
+    profile = _profile.get()
+    if profile is None:
+        return None
+    return profile.fields[_field.get()]
+
+
+def profile_requested(request: Any) -> bool:
+    """
+    Whether `request` asked for its profile, which only staff users (or anyone
+    when `DEBUG` is set) can do.
+    """
+    if PROFILE_HEADER not in request.META:
+        return False
+    user = getattr(request, "user", None)
+    return settings.DEBUG or bool(user and getattr(user, "is_staff", False))
+
+
+def record_query(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """
+    A database execute wrapper (see `connection.execute_wrapper`) counting the
+    queries of the field being resolved.
+    """
+    field_profile = _current_field()
+    if field_profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        field_profile.queries += 1
+        field_profile.query_duration += time.perf_counter() - start
+
+
+def record_call(kind: str) -> None:
+    field_profile = _current_field()
+    if field_profile is not None:
+        field_profile.calls[kind] += 1
+
+
+def profile_batch_load_fn(
+    name: str, batch_load_fn: Callable[[list], Awaitable[list]]
+) -> Callable[[list], Awaitable[list]]:
+    """
+    Records the batch sizes of a DataLoader created while profiling, attributing
+    its queries to it rather than to the field that first loaded a key.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return batch_load_fn
+
+    async def profiled_batch_load_fn(keys: list) -> list:
+        profile.batches[name].append(len(keys))
+        token = _field.set(name)
+        start = time.perf_counter()
+        try:
+            return await batch_load_fn(keys)
+        finally:
+            _field.reset(token)
+            field_profile = profile.fields[name]
+            field_profile.resolved += 1
+            field_profile.duration += time.perf_counter() - start
+
+    return profiled_batch_load_fn
+
+
+def _instrument(cls: type, name: str, kind: str) -> None:
+    method = getattr(cls, name)
+    if getattr(method, "profiled", False):
+        return
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            record_call(kind)
+            return await method(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            record_call(kind)
+            return method(*args, **kwargs)
+
+    wrapper.profiled = True  # type: ignore
+    setattr(cls, name, wrapper)
+
+
+def _install_query_recorder(sender: Any, connection: Any, **kwargs: Any) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install() -> None:
+    """
+    Instruments the database connections and the clients of `INSTRUMENTED_CALLS`,
+    which only record anything while a request is profiled.
+    """
+    connection_created.connect(_install_query_recorder)
+    for module_name, class_name, methods, kind in INSTRUMENTED_CALLS:
+        try:
+            cls = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            log.debug(
+                "Not instrumenting missing client",
+                extra=dict(module=module_name, cls=class_name),
+            )
+            continue
+        for method in methods:
+            if hasattr(cls, method):
+                _instrument(cls, method, kind)
+
+
+class ResolverProfilerExtension(Extension):
+    """
+    Profiles the resolvers of a request, see the module docstring.
+    """
+
+    def __init__(self) -> None:
+        self.profile = Profile()
+        self.token = None
+
+    def request_started(self, context: dict[str, Any]) -> None:
+        context["profile"] = self.profile
+        self.profile.start = time.perf_counter()
+        self.token = _profile.set(self.profile)
+
+    def request_finished(self, context: dict[str, Any]) -> None:
+        self.profile.duration = time.perf_counter() - self.profile.start
+        if self.token is not None:
+            _profile.reset(self.token)
+            self.token = None
+        if settings.GRAPHQL_PROFILER_ENABLED:
+            self.profile.export()
+            self.profile.check_budget()
+
+    def resolve(
+        self, next_: Resolver, obj: Any, info: GraphQLResolveInfo, **kwargs: Any
+    ) -> Any:
+        if self.profile.operation_name is None and info.operation.name:
+            self.profile.operation_name = info.operation.name.value
+
+        name = f"{info.parent_type.name}.{info.field_name}"
+        field_profile = self.profile.fields[name]
+        field_profile.resolved += 1
+
+        token = _field.set(name)
+        start = time.perf_counter()
+        try:
+            result = next_(obj, info, **kwargs)
+        finally:
+            _field.reset(token)
+            field_profile.duration += time.perf_counter() - start
+
+        if is_awaitable(result):
+            return self._resolve_async(name, field_profile, result)
+        return result
+
+    async def _resolve_async(
+        self, name: str, field_profile: FieldProfile, result: Awaitable
+    ) -> Any:
+        # the body of async resolvers only runs once they're awaited
+        token = _field.set(name)
+        start = time.perf_counter()
+        try:
+            return await result
+        finally:
+            _field.reset(token)
+            field_profile.duration += time.perf_counter() - start
@@ -1,7 +1,26 @@
-from ariadne import make_executable_schema
+from functools import lru_cache
+from pathlib import Path
 
+from graphql import GraphQLSchema
+
+from .helpers.ariadne import make_executable_schema_from_artifact
 from .types import bindables, types
 
-# convert_names_case automatically converts the field name from camelCase
-# to snake_case. See: https://ariadnegraphql.org/docs/api-reference#optional-arguments-10
-schema = make_executable_schema(types, *bindables, convert_names_case=True)
+# built by `manage.py build_graphql_schema`, see `make_executable_schema_from_artifact`
+SCHEMA_ARTIFACT_PATH = Path(__file__).parent / "schema.artifact"
+
+
+@lru_cache(maxsize=None)
+def get_schema() -> GraphQLSchema:
+    """
+    The executable schema, built the first time it's needed rather than when
+    the URLconf is loaded (e.g. by `manage.py check`).
+    """
+    # convert_names_case automatically converts the field name from camelCase
+    # to snake_case. See: https://ariadnegraphql.org/docs/api-reference#optional-arguments-10
+    return make_executable_schema_from_artifact(
+        types,
+        *bindables,
+        artifact_path=SCHEMA_ARTIFACT_PATH,
+        convert_names_case=True,
+    )
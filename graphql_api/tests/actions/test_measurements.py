@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from shared.django_apps.core.tests.factories import OwnerFactory, RepositoryFactory
+
+from graphql_api.actions.measurements import (
+    measurements_last_uploaded_before_start_date,
+    measurements_last_uploaded_by_ids,
+    measurements_with_carryover,
+)
+from timeseries.tests.factories import MeasurementFactory
+
+NAME = "bundle_analysis_asset_size"
+
+
+class MeasurementsCarryoverTests(TestCase):
+    databases = {"default", "timeseries"}
+
+    def setUp(self):
+        self.org = OwnerFactory()
+        self.repo = RepositoryFactory(author=self.org)
+
+        for measurable_id, timestamp, value, branch in [
+            ("a", "2024-06-01T10:00:00", 100, "main"),
+            ("a", "2024-06-03T10:00:00", 150, "main"),
+            ("a", "2024-06-04T10:00:00", 175, "feature"),
+            ("b", "2024-06-02T10:00:00", 200, "main"),
+            ("c", "2024-06-08T10:00:00", 300, "main"),
+        ]:
+            MeasurementFactory(
+                name=NAME,
+                owner_id=self.org.pk,
+                repo_id=self.repo.pk,
+                branch=branch,
+                measurable_id=measurable_id,
+                timestamp=timestamp,
+                value=value,
+            )
+
+    def test_last_uploaded_before_start_date(self):
+        start_date = datetime(2024, 6, 5, tzinfo=timezone.utc)
+        with self.assertNumQueries(1, using="timeseries"):
+            last = measurements_last_uploaded_before_start_date(
+                owner_id=self.org.pk,
+                repo_id=self.repo.pk,
+                measurable_name=NAME,
+                measurable_ids=["a", "b", "c", "d"],
+                start_date=start_date,
+                branch="main",
+            )
+
+        assert set(last.keys()) == {"a", "b"}
+        assert last["a"]["value"] == 150
+        assert last["b"]["value"] == 200
+
+    def test_last_uploaded_by_ids(self):
+        last = measurements_last_uploaded_by_ids(
+            owner_id=self.org.pk,
+            repo_id=self.repo.pk,
+            measurable_name=NAME,
+            measurable_ids=["a", "c"],
+        )
+
+        assert {row["measurable_id"]: row["last_uploaded"] for row in last} == {
+            "a": datetime(2024, 6, 4, 10, tzinfo=timezone.utc),
+            "c": datetime(2024, 6, 8, 10, tzinfo=timezone.utc),
+        }
+
+    def test_measurements_with_carryover(self):
+        after = datetime(2024, 6, 5, 12, tzinfo=timezone.utc)
+        in_range = {
+            "timestamp_bin": datetime(2024, 6, 8, tzinfo=timezone.utc),
+            "min": 300,
+            "max": 300,
+            "avg": 300,
+        }
+        measurements = {"a": [], "b": [in_range], "d": []}
+
+        with self.assertNumQueries(1, using="timeseries"):
+            result = measurements_with_carryover(
+                measurements,
+                repository=self.repo,
+                measurable_name=NAME,
+                after=after,
+                branch="main",
+            )
+
+        start = datetime(2024, 6, 5, tzinfo=timezone.utc)
+        assert result["a"] == [
+            {
+                "timestamp_bin": start,
+                "min": Decimal(150),
+                "max": Decimal(150),
+                "avg": Decimal(150),
+            }
+        ]
+        assert result["b"] == [
+            {
+                "timestamp_bin": start,
+                "min": Decimal(200),
+                "max": Decimal(200),
+                "avg": Decimal(200),
+            },
+            in_range,
+        ]
+        assert result["d"] == []
+
+    def test_measurements_with_carryover_no_start_date(self):
+        measurements = {"a": []}
+        with self.assertNumQueries(0, using="timeseries"):
+            assert (
+                measurements_with_carryover(
+                    measurements, repository=self.repo, measurable_name=NAME, after=None
+                )
+                == measurements
+            )
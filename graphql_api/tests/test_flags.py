@@ -1,3 +1,4 @@
+from base64 import b64encode
 from unittest.mock import patch
 
 import pytest
@@ -700,8 +701,11 @@ class TestFlags(GraphQLTestHelper, TestCase):
                 }
             }
         """
-        RepositoryFlagFactory(repository=self.repo, flag_name="flag1")
-        RepositoryFlagFactory(repository=self.repo, flag_name="flag2")
+        flag1 = RepositoryFlagFactory(repository=self.repo, flag_name="flag1")
+        flag2 = RepositoryFlagFactory(repository=self.repo, flag_name="flag2")
+        # cursors are the base64 encoded name and id of the flags
+        flag1_cursor = b64encode(f"flag1|{flag1.id}".encode()).decode()
+        flag2_cursor = b64encode(f"flag2|{flag2.id}".encode()).decode()
         variables = {
             "org": self.org.username,
             "repo": self.repo.name,
@@ -717,13 +721,13 @@ class TestFlags(GraphQLTestHelper, TestCase):
                                     "node": {
                                         "name": "flag1",
                                     },
-                                    "cursor": "ZmxhZzE=",
+                                    "cursor": flag1_cursor,
                                 },
                                 {
                                     "node": {
                                         "name": "flag2",
                                     },
-                                    "cursor": "ZmxhZzI=",
+                                    "cursor": flag2_cursor,
                                 },
                             ]
                         }
@@ -734,7 +738,7 @@ class TestFlags(GraphQLTestHelper, TestCase):
         variables = {
             "org": self.org.username,
             "repo": self.repo.name,
-            "after": "ZmxhZzE=",
+            "after": flag1_cursor,
         }
         data = self.gql_request(query, variables=variables)
         assert data == {
@@ -747,7 +751,7 @@ class TestFlags(GraphQLTestHelper, TestCase):
                                     "node": {
                                         "name": "flag2",
                                     },
-                                    "cursor": "ZmxhZzI=",
+                                    "cursor": flag2_cursor,
                                 },
                             ]
                         }
@@ -0,0 +1,158 @@
+from unittest.mock import Mock, patch
+
+from ariadne import ObjectType, graphql, make_executable_schema
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, override_settings
+
+from graphql_api.dataloader.loader import BaseLoader
+from graphql_api.profiler import (
+    PROFILE_HEADER,
+    Profile,
+    ResolverProfilerExtension,
+    profile_requested,
+    record_call,
+    record_query,
+)
+
+type_defs = """
+    type Query {
+        repository: Repository
+        repositories: [Repository]
+    }
+
+    type Repository {
+        name: String
+        latestCommit: String
+    }
+"""
+
+
+def _execute_query(*args, **kwargs):
+    return "result"
+
+
+class NameLoader(BaseLoader):
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        for _ in keys:
+            record_query(_execute_query, "SELECT 1", None, False, {})
+        return [f"repo-{key}" for key in keys]
+
+
+def _schema():
+    query = ObjectType("Query")
+    repository = ObjectType("Repository")
+
+    @query.field("repository")
+    def resolve_repository(_, info):
+        record_query(_execute_query, "SELECT 1", None, False, {})
+        return {"id": 1}
+
+    @query.field("repositories")
+    def resolve_repositories(_, info):
+        return [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    @repository.field("name")
+    def resolve_name(repository, info):
+        return NameLoader.loader(info).load(repository["id"])
+
+    @repository.field("latestCommit")
+    async def resolve_latest_commit(repository, info):
+        await sync_to_async(record_query)(_execute_query, "SELECT 1", None, False, {})
+        record_call("redis")
+        return "abc"
+
+    return make_executable_schema(type_defs, query, repository)
+
+
+class ResolverProfilerExtensionTestCase(SimpleTestCase):
+    async def _profile(self, query):
+        context = {}
+        success, result = await graphql(
+            _schema(),
+            {"query": query},
+            context_value=context,
+            extensions=[ResolverProfilerExtension],
+        )
+        assert success, result
+        return context["profile"]
+
+    async def test_profile(self):
+        profile = await self._profile(
+            "query Repositories { repository { latestCommit } "
+            "repositories { name latestCommit } }"
+        )
+
+        assert profile.operation_name == "Repositories"
+        assert profile.queries == 8
+        assert profile.duration > 0
+        assert profile.fields["Query.repository"].resolved == 1
+        assert profile.fields["Query.repository"].queries == 1
+        assert profile.fields["Repository.latestCommit"].resolved == 4
+        assert profile.fields["Repository.latestCommit"].queries == 4
+        assert profile.fields["Repository.latestCommit"].calls == {"redis": 4}
+        # the queries of the DataLoader are attributed to it
+        assert profile.fields["Repository.name"].queries == 0
+        assert profile.fields["NameLoader"].queries == 3
+        assert profile.batches == {"NameLoader": [3]}
+
+        summary = profile.summary()
+        assert summary["queries"] == 8
+        assert summary["calls"] == {"redis": 4}
+        assert summary["dataloaders"] == {"NameLoader": [3]}
+        assert list(summary["fields"])[0] == "Repository.latestCommit"
+        assert profile.server_timing().startswith("total;dur=")
+
+    async def test_nothing_recorded_outside_profiled_requests(self):
+        profile = await self._profile("{ repository { name } }")
+        record_query(_execute_query, "SELECT 1", None, False, {})
+        record_call("redis")
+        assert profile.queries == 2
+        assert "(request)" not in profile.fields
+
+    @override_settings(GRAPHQL_PROFILER_ENABLED=True)
+    @patch("graphql_api.profiler.Profile.export")
+    async def test_export_when_enabled(self, export):
+        await self._profile("{ repository { name } }")
+        export.assert_called_once()
+
+
+class ProfileTestCase(SimpleTestCase):
+    def _profile(self, operation_name, queries):
+        profile = Profile()
+        profile.operation_name = operation_name
+        profile.fields["Query.repository"].queries = queries
+        return profile
+
+    @override_settings(GRAPHQL_QUERY_BUDGET=10, GRAPHQL_QUERY_BUDGETS={"Pulls": 50})
+    @patch("logging.Logger.warning")
+    def test_check_budget(self, warning):
+        self._profile("Repository", 10).check_budget()
+        self._profile("Pulls", 25).check_budget()
+        assert not warning.called
+
+        self._profile("Repository", 11).check_budget()
+        warning.assert_called_once_with(
+            "GraphQL query budget exceeded",
+            extra=dict(
+                operation_name="Repository",
+                queries=11,
+                budget=10,
+                fields={"Query.repository": 11},
+            ),
+        )
+
+    @override_settings(DEBUG=False)
+    def test_profile_requested(self):
+        staff = Mock(META={PROFILE_HEADER: "1"}, user=Mock(is_staff=True))
+        user = Mock(META={PROFILE_HEADER: "1"}, user=Mock(is_staff=False))
+        anonymous = Mock(META={PROFILE_HEADER: "1"}, user=None)
+        no_header = Mock(META={}, user=Mock(is_staff=True))
+
+        assert profile_requested(staff)
+        assert not profile_requested(user)
+        assert not profile_requested(anonymous)
+        assert not profile_requested(no_header)
+
+        with override_settings(DEBUG=True):
+            assert profile_requested(anonymous)
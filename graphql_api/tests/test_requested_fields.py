@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock
+
 from graphql import GraphQLResolveInfo
 from graphql.language import (
     FragmentDefinitionNode,
@@ -5,7 +7,11 @@ from graphql.language import (
     parse,
 )
 
-from graphql_api.helpers.requested_fields import selected_fields
+from graphql_api.helpers.requested_fields import (
+    FieldRequirements,
+    QuerysetShape,
+    selected_fields,
+)
 
 
 def parse_into_resolveinfo(source: str) -> GraphQLResolveInfo:
@@ -206,3 +212,70 @@ def test_requested_fields():
     assert "owner.repositories.edges.node.oldestCommitAt" not in fields
     assert "owner.repositories.edges.node.coverageAnalytics" in fields
     assert "owner.repositories.edges.node.coverageAnalytics.percentCovered" in fields
+
+
+COVERAGE = FieldRequirements(annotations=("with_recent_coverage",))
+COMMITS = FieldRequirements(
+    annotations=("with_latest_commit_at",), prefetch_related=("commits",)
+)
+AUTHOR = FieldRequirements(select_related=("author",))
+
+shape = QuerysetShape(
+    {
+        "coverageAnalytics.percentCovered": COVERAGE,
+        "coverageAnalytics.commitSha": COVERAGE,
+        "latestCommitAt": COMMITS,
+        "name": FieldRequirements(),
+    },
+    default=AUTHOR,
+)
+
+
+def test_shape_requirements():
+    info = parse_into_resolveinfo(QUERY_ReposForOwner)
+    fields = selected_fields(info)
+
+    requirements = shape.requirements(fields, prefix="owner.repositories.edges.node")
+    assert COVERAGE in requirements
+    assert COMMITS in requirements
+
+    # the coverage fields are mapped, `coverageAnalytics` itself isn't
+    assert shape.requirements(
+        ["coverageAnalytics", "coverageAnalytics.percentCovered"]
+    ) == [COVERAGE]
+    # subfields are covered by their field
+    assert shape.requirements(["latestCommitAt.year"]) == [COMMITS]
+    assert shape.requirements(["coverageAnalytics.lines", "private"]) == [
+        AUTHOR,
+        AUTHOR,
+    ]
+    assert shape.requirements(["name", "totalCount"], prefix="edges.node") == []
+
+
+def test_shape_apply():
+    queryset = MagicMock()
+    shape.apply(
+        queryset,
+        [
+            "edges.node.coverageAnalytics.percentCovered",
+            "edges.node.coverageAnalytics.commitSha",
+            "edges.node.private",
+            "totalCount",
+        ],
+        prefix="edges.node",
+        extra=[COMMITS],
+    )
+
+    queryset.with_recent_coverage.assert_called_once_with()
+    queryset = queryset.with_recent_coverage.return_value
+    queryset.with_latest_commit_at.assert_called_once_with()
+    queryset = queryset.with_latest_commit_at.return_value
+    queryset.select_related.assert_called_once_with("author")
+    queryset = queryset.select_related.return_value
+    queryset.prefetch_related.assert_called_once_with("commits")
+
+
+def test_shape_apply_nothing_requested():
+    queryset = MagicMock()
+    assert shape.apply(queryset, ["edges.node.name"], prefix="edges.node") is queryset
+    assert not queryset.method_calls
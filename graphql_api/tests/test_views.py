@@ -1,15 +1,22 @@
+import hashlib
 import json
+from datetime import datetime, timezone
+from decimal import Decimal
 from unittest.mock import Mock, patch
 
+import fakeredis
 from ariadne import ObjectType, gql, make_executable_schema
 from ariadne.validation import cost_directive
+from django.http import JsonResponse
 from django.test import RequestFactory, TestCase, override_settings
 from django.urls import ResolverMatch
+from graphql import parse, validate
 from prometheus_client import REGISTRY
 
 from codecov.commands.exceptions import Unauthorized
 
-from ..views import AsyncGraphqlView, QueryMetricsExtension
+from ..documents import PERSISTED_QUERY_TTL, _document_cache, _persisted_queries
+from ..views import AsyncGraphqlView, GraphQLJsonResponse, QueryMetricsExtension
 from .helper import GraphQLTestHelper
 
 
@@ -59,11 +66,23 @@ def generate_schema_with_required_variables():
 
 
 class AriadneViewTestCase(GraphQLTestHelper, TestCase):
-    async def do_query(self, schema, query="{ failing }", variables=None):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("graphql_api.documents.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        _document_cache.clear()
+        _persisted_queries.clear()
+
+    async def do_query(
+        self, schema, query="{ failing }", variables=None, extensions=None
+    ):
         view = AsyncGraphqlView.as_view(schema=schema)
-        data = {"query": query}
+        data = {"query": query} if query is not None else {}
         if variables is not None:
             data["variables"] = variables
+        if extensions is not None:
+            data["extensions"] = extensions
 
         request = RequestFactory().post(
             "/graphql/gh", data, content_type="application/json"
@@ -327,5 +346,175 @@ class AriadneViewTestCase(GraphQLTestHelper, TestCase):
         assert response.status_code == 400
         assert json.loads(response.content) == {
             "status": 400,
-            "detail": "Invalid JSON response received.",
+            "detail": "Request body is not valid JSON.",
+        }
+
+    async def test_required_variable_missing_cached_document(self):
+        schema = generate_schema_with_required_variables()
+
+        query = """
+        query ($name: String!) {
+            person_exists(name: $name)
+        }
+        """
+
+        data = await self.do_query(schema, query=query, variables={"name": "Bob"})
+        assert data["data"]["person_exists"] is True
+        assert len(_document_cache) == 1
+
+        # variables are checked again even though the document is cached
+        data = await self.do_query(schema, query=query, variables={})
+        assert data == {"detail": "Missing required variables: name", "status": 400}
+
+    @patch("graphql_api.documents.validate")
+    @patch("graphql_api.documents.parse")
+    async def test_document_is_parsed_and_validated_once(
+        self, mocked_parse, mocked_validate
+    ):
+        mocked_parse.side_effect = parse
+        mocked_validate.side_effect = validate
+        schema = generate_schema_with_required_variables()
+
+        for name in ["Bob", "Alice"]:
+            data = await self.do_query(
+                schema,
+                query="query ($name: String!) { person_exists(name: $name) }",
+                variables={"name": name},
+            )
+            assert data["data"]["person_exists"] is True
+
+        assert mocked_parse.call_count == 1
+        # static rules once, variable-dependent rules for every request
+        assert mocked_validate.call_count == 3
+
+    @override_settings(DEBUG=True)
+    async def test_cached_document_validated_per_schema(self):
+        data = await self.do_query(
+            generate_schema_with_required_variables(), query="{ stuff }"
+        )
+        assert data == {"data": {"stuff": None}}
+
+        data = await self.do_query(
+            generate_schema_that_raise_with(Exception("hello")), query="{ stuff }"
+        )
+        assert data["errors"][0]["message"] == (
+            "Cannot query field 'stuff' on type 'Query'."
+        )
+
+    async def test_persisted_query(self):
+        schema = generate_schema_with_required_variables()
+        query = "{ stuff }"
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(query.encode()).hexdigest(),
+            }
+        }
+
+        data = await self.do_query(schema, query=None, extensions=extensions)
+        assert data == {
+            "errors": [
+                {
+                    "message": "PersistedQueryNotFound",
+                    "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+                }
+            ]
         }
+
+        data = await self.do_query(schema, query=query, extensions=extensions)
+        assert data == {"data": {"stuff": None}}
+        key = f"graphql_persisted_query:{extensions['persistedQuery']['sha256Hash']}"
+        assert 0 < self.redis.ttl(key) <= PERSISTED_QUERY_TTL
+
+        # persisted queries are shared through redis
+        _persisted_queries.clear()
+        data = await self.do_query(schema, query=None, extensions=extensions)
+        assert data == {"data": {"stuff": None}}
+
+    async def test_persisted_query_hash_mismatch(self):
+        schema = generate_schema_with_required_variables()
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(b"{ other }").hexdigest(),
+            }
+        }
+
+        data = await self.do_query(schema, query="{ stuff }", extensions=extensions)
+        assert data["errors"][0]["extensions"] == {
+            "code": "PERSISTED_QUERY_HASH_MISMATCH"
+        }
+        assert self.redis.keys("graphql_persisted_query:*") == []
+
+    async def test_persisted_query_only_persists_valid_queries(self):
+        schema = generate_schema_with_required_variables()
+        query = "{ other }"
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(query.encode()).hexdigest(),
+            }
+        }
+
+        data = await self.do_query(schema, query=query, extensions=extensions)
+        assert data["errors"][0]["message"] == (
+            "Cannot query field 'other' on type 'Query'."
+        )
+        assert self.redis.keys("graphql_persisted_query:*") == []
+
+    @patch("graphql_api.documents.PERSISTED_QUERY_MAX_LENGTH", 8)
+    async def test_persisted_query_too_large(self):
+        schema = generate_schema_with_required_variables()
+        query = "{ stuff }"
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(query.encode()).hexdigest(),
+            }
+        }
+
+        data = await self.do_query(schema, query=query, extensions=extensions)
+        assert data == {"data": {"stuff": None}}
+        assert self.redis.keys("graphql_persisted_query:*") == []
+
+    def test_json_response_matches_django_encoding(self):
+        data = {
+            "data": {
+                "coverage": Decimal("85.50"),
+                "updatedAt": datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+                "names": ["a", None],
+            }
+        }
+
+        response = GraphQLJsonResponse(data, status=400)
+        assert response.status_code == 400
+        assert response["Content-Type"] == "application/json"
+        assert json.loads(response.content) == json.loads(JsonResponse(data).content)
+
+    @override_settings(DEBUG=True)
+    async def test_profile_header(self):
+        schema = generate_schema_with_required_variables()
+        view = AsyncGraphqlView.as_view(schema=schema)
+        request = RequestFactory().post(
+            "/graphql/gh",
+            {"query": "query Stuff { stuff }"},
+            content_type="application/json",
+            headers={"X-GraphQL-Profile": "1"},
+        )
+        request.resolver_match = ResolverMatch(
+            func=lambda: None, args=(), kwargs={"service": "github"}
+        )
+        request.user = None
+        request.current_owner = None
+
+        res = await view(request, service="gh")
+        profile = json.loads(res.content)["extensions"]["profile"]
+        assert profile["operationName"] == "Stuff"
+        assert profile["fields"]["Query.stuff"]["resolved"] == 1
+        assert res["Server-Timing"].startswith("total;dur=")
+
+    async def test_no_profile_without_header(self):
+        data = await self.do_query(
+            generate_schema_with_required_variables(), "{ stuff }"
+        )
+        assert "extensions" not in data
@@ -5,6 +5,7 @@ from graphql import GraphQLResolveInfo
 
 from core.models import Branch, Commit
 from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.helpers.requested_fields import selected_fields
 
 branch_bindable = ObjectType("Branch")
 
@@ -22,4 +23,4 @@ async def resolve_head_commit(
     head = branch.head
     if head:
         loader = CommitLoader.loader(info, branch.repository_id)
-        return await loader.load(head)
+        return await loader.load(head, selected_fields(info))
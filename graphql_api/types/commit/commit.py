@@ -72,7 +72,7 @@ def resolve_author(commit: Commit, info: GraphQLResolveInfo) -> Owner | None:
 def resolve_parent(commit: Commit, info: GraphQLResolveInfo) -> Commit | None:
     if commit.parent_commit_id:
         return CommitLoader.loader(info, commit.repository_id).load(
-            commit.parent_commit_id
+            commit.parent_commit_id, selected_fields(info)
         )
 
 
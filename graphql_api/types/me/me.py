@@ -12,12 +12,13 @@ from graphql_api.actions.owner import (
     get_user_tokens,
     search_my_owners,
 )
-from graphql_api.actions.repository import search_repos
+from graphql_api.actions.repository import search_repos, shape_repositories
 from graphql_api.helpers.ariadne import ariadne_load_local_graphql
 from graphql_api.helpers.connection import (
     build_connection_graphql,
     queryset_to_connection,
 )
+from graphql_api.helpers.requested_fields import selected_fields
 from graphql_api.types.enums import OrderingDirection, RepositoryOrdering
 
 me = ariadne_load_local_graphql(__file__, "me.graphql")
@@ -62,6 +63,9 @@ def resolve_viewable_repositories(
     queryset = search_repos(
         current_user, filters, okta_authenticated_accounts, exclude_okta_enforced_repos
     )
+    queryset = shape_repositories(
+        queryset, selected_fields(info), prefix="edges.node", ordering=ordering
+    )
     return queryset_to_connection(
         queryset,
         ordering=(ordering, RepositoryOrdering.ID),
@@ -28,13 +28,20 @@ from codecov_auth.models import (
 )
 from codecov_auth.views.okta_cloud import OKTA_SIGNED_IN_ACCOUNTS_SESSION_KEY
 from core.models import Repository
-from graphql_api.actions.repository import list_repository_for_owner
+from graphql_api.actions.repository import (
+    OLDEST_COMMIT_AT,
+    RECENT_COVERAGE,
+    REPOSITORY_SHAPE,
+    list_repository_for_owner,
+    shape_repositories,
+)
 from graphql_api.helpers.ariadne import ariadne_load_local_graphql
 from graphql_api.helpers.connection import (
     Connection,
     build_connection_graphql,
     queryset_to_connection_sync,
 )
+from graphql_api.helpers.counts import owner_count_scope
 from graphql_api.helpers.mutation import (
     require_part_of_org,
     require_shared_account_or_part_of_org,
@@ -78,11 +85,15 @@ def resolve_repositories(
     queryset = list_repository_for_owner(
         current_owner, owner, filters, okta_account_auths, exclude_okta_enforced_repos
     )
+    queryset = shape_repositories(
+        queryset, selected_fields(info), prefix="edges.node", ordering=ordering
+    )
 
     return queryset_to_connection_sync(
         queryset,
         ordering=(ordering, RepositoryOrdering.ID),
         ordering_direction=ordering_direction,
+        count_scope=owner_count_scope(owner.ownerid),
         **kwargs,
     )
 
@@ -157,16 +168,6 @@ def resolve_ownerid(owner: Owner, info: GraphQLResolveInfo) -> int:
     return owner.ownerid
 
 
-COVERAGE_FIELDS = {
-    "coverageAnalytics.percentCovered",
-    "coverageAnalytics.commitSha",
-    "coverageAnalytics.hits",
-    "coverageAnalytics.misses",
-    "coverageAnalytics.lines",
-}
-COMMITS_FIELDS = {"oldestCommitAt"}
-
-
 @owner_bindable.field("repository")
 async def resolve_repository(
     owner: Owner, info: GraphQLResolveInfo, name: str
@@ -181,9 +182,9 @@ async def resolve_repository(
     # This means we do not want to filter out the Okta enforced repos
     exclude_okta_enforced_repos = not is_impersonation
 
-    requested_fields = selected_fields(info)
-    needs_coverage = not requested_fields.isdisjoint(COVERAGE_FIELDS)
-    needs_commits = not requested_fields.isdisjoint(COMMITS_FIELDS)
+    requirements = REPOSITORY_SHAPE.requirements(selected_fields(info))
+    needs_coverage = RECENT_COVERAGE in requirements
+    needs_commits = OLDEST_COMMIT_AT in requirements
 
     repository: Repository | None = await command.fetch_repository(
         owner,
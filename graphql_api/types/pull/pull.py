@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, Optional, Union
 
 import sentry_sdk
@@ -14,7 +15,9 @@ from graphql_api.dataloader.bundle_analysis import load_bundle_analysis_comparis
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.pull import is_first_pull
 from graphql_api.helpers.connection import Connection, queryset_to_connection_sync
+from graphql_api.helpers.requested_fields import selected_fields
 from graphql_api.types.comparison.comparison import (
     FirstPullRequest,
     MissingBaseCommit,
@@ -44,19 +47,18 @@ def resolve_author(pull: Pull, info: GraphQLResolveInfo) -> Optional[Owner]:
 def resolve_head(pull: Pull, info: GraphQLResolveInfo) -> Optional[Commit]:
     if pull.head is None:
         return None
-    return CommitLoader.loader(info, pull.repository_id).load(pull.head)
+    return CommitLoader.loader(info, pull.repository_id).load(
+        pull.head, selected_fields(info)
+    )
 
 
 @pull_bindable.field("comparedTo")
 def resolve_base(pull: Pull, info: GraphQLResolveInfo) -> Optional[Commit]:
     if pull.compared_to is None:
         return None
-    return CommitLoader.loader(info, pull.repository_id).load(pull.compared_to)
-
-
-@sync_to_async
-def is_first_pull_request(pull: Pull) -> bool:
-    return pull.repository.pull_requests.order_by("id").first() == pull
+    return CommitLoader.loader(info, pull.repository_id).load(
+        pull.compared_to, selected_fields(info)
+    )
 
 
 @pull_bindable.field("compareWithBase")
@@ -65,7 +67,7 @@ async def resolve_compare_with_base(
     pull: Pull, info: GraphQLResolveInfo, **kwargs: Any
 ) -> Union[CommitComparison, Any]:
     if not pull.compared_to:
-        if await is_first_pull_request(pull):
+        if await is_first_pull(info, pull):
             return FirstPullRequest()
         else:
             return MissingBaseCommit()
@@ -90,13 +92,12 @@ async def resolve_compare_with_base(
 
 
 @pull_bindable.field("bundleAnalysisCompareWithBase")
-@sync_to_async
 @sentry_sdk.trace
-def resolve_bundle_analysis_compare_with_base(
+async def resolve_bundle_analysis_compare_with_base(
     pull: Pull, info: GraphQLResolveInfo, **kwargs: Any
 ) -> Union[BundleAnalysisComparison, Any]:
     if not pull.compared_to:
-        if pull.repository.pull_requests.order_by("id").first() == pull:
+        if await is_first_pull(info, pull):
             return FirstPullRequest()
         else:
             return MissingBaseCommit()
@@ -107,13 +108,14 @@ def resolve_bundle_analysis_compare_with_base(
     # over to the head commit
     head_commit_sha = pull.head if pull.head else pull.compared_to
 
-    bundle_analysis_comparison = load_bundle_analysis_comparison(
-        Commit.objects.filter(
-            commitid=pull.compared_to, repository=pull.repository
-        ).first(),
-        Commit.objects.filter(
-            commitid=head_commit_sha, repository=pull.repository
-        ).first(),
+    # the comparison doesn't read the commits' coverage reports
+    commit_loader = CommitLoader.loader(info, pull.repository_id)
+    base_commit, head_commit = await asyncio.gather(
+        commit_loader.load(pull.compared_to, ()),
+        commit_loader.load(head_commit_sha, ()),
+    )
+    bundle_analysis_comparison = await sync_to_async(load_bundle_analysis_comparison)(
+        base_commit, head_commit
     )
 
     # Store the created SQLite DB path in info.context
@@ -159,7 +161,6 @@ def resolve_behind_by_commit(
 
 
 @pull_bindable.field("firstPull")
-@sync_to_async
-def resolve_first_pull(pull: Pull, info: GraphQLResolveInfo) -> bool:
+async def resolve_first_pull(pull: Pull, info: GraphQLResolveInfo) -> bool:
     # returns true if this pull is/was the 1st for a repo
-    return pull.repository.pull_requests.order_by("id").first() == pull
+    return await is_first_pull(info, pull)
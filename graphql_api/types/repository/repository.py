@@ -17,6 +17,7 @@ from graphql_api.actions.commits import load_commit_statuses, repo_commits
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.owner import OwnerLoader
 from graphql_api.helpers.connection import queryset_to_connection
+from graphql_api.helpers.counts import repository_count_scope
 from graphql_api.helpers.requested_fields import selected_fields
 from graphql_api.types.coverage_analytics.coverage_analytics import (
     CoverageAnalyticsProps,
@@ -76,7 +77,7 @@ def resolve_author(repository: Repository, info: GraphQLResolveInfo) -> Owner:
 @repository_bindable.field("commit")
 def resolve_commit(repository: Repository, info: GraphQLResolveInfo, id: str) -> Commit:
     loader = CommitLoader.loader(info, repository.pk)
-    commit = loader.load(id)
+    commit = loader.load(id, selected_fields(info))
 
     if commit:
         sentry_sdk.set_tag("commit_sha", id)
@@ -120,6 +121,7 @@ async def resolve_pulls(
         queryset,
         ordering=("pullid",),
         ordering_direction=ordering_direction,
+        count_scope=repository_count_scope(repository.repoid),
         **kwargs,
     )
 
@@ -136,11 +138,14 @@ async def resolve_commits(
     filters: Optional[Dict[str, Any]] = None,
     **kwargs: Any,
 ) -> List[Commit]:
+    requested_fields = selected_fields(info)
     queryset = await sync_to_async(repo_commits)(repository, filters)
+    queryset = CommitLoader.shape.apply(queryset, requested_fields, prefix="edges.node")
     connection = await queryset_to_connection(
         queryset,
         ordering=("timestamp",),
         ordering_direction=OrderingDirection.DESC,
+        count_scope=repository_count_scope(repository.repoid),
         **kwargs,
     )
 
@@ -150,7 +155,6 @@ async def resolve_commits(
         loader = CommitLoader.loader(info, repository.repoid)
         loader.cache(commit)
 
-    requested_fields = selected_fields(info)
     should_load_statuses = not requested_fields.isdisjoint(STATUS_FIELDS)
 
     if should_load_statuses:
@@ -175,6 +179,7 @@ async def resolve_branches(
         queryset,
         ordering=("updatestamp",),
         ordering_direction=OrderingDirection.DESC,
+        count_scope=repository_count_scope(repository.repoid),
         **kwargs,
     )
 
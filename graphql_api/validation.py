@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any, Dict, Type
 
 from graphql import GraphQLError, ValidationRule
@@ -54,6 +55,9 @@ def create_required_variables_rule(variables: Dict) -> Type[ValidationRule]:
     return RequiredVariablesValidationRule
 
 
+# the same rule class is returned for the same limit, so that validation results of
+# documents can be cached per rule (see `graphql_api.documents`)
+@lru_cache(maxsize=None)
 def create_max_depth_rule(max_depth: int) -> Type[ValidationRule]:
     class MaxDepthRule(ValidationRule):
         def __init__(self, context: ValidationContext) -> None:
@@ -86,6 +90,7 @@ def create_max_depth_rule(max_depth: int) -> Type[ValidationRule]:
     return MaxDepthRule
 
 
+@lru_cache(maxsize=None)
 def create_max_aliases_rule(max_aliases: int) -> Type[ValidationRule]:
     class MaxAliasesRule(ValidationRule):
         def __init__(self, context: ValidationContext) -> None:
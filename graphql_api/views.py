@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import socket
@@ -6,21 +5,19 @@ import time
 from asyncio import iscoroutine
 from typing import Any, Collection, Optional
 
+import orjson
 import regex
-from ariadne import format_error
+from ariadne import format_error, graphql
+from ariadne.exceptions import HttpBadRequestError
 from ariadne.types import Extension
 from ariadne.validation import cost_validator
 from ariadne_django.views import GraphQLAsyncView
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
-from django.http import (
-    HttpResponse,
-    HttpResponseBadRequest,
-    HttpResponseNotAllowed,
-    JsonResponse,
-)
-from graphql import DocumentNode
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
+from graphql import DocumentNode, GraphQLError, GraphQLSchema, TypeInfo
 from sentry_sdk import capture_exception
 from shared.helpers.redis import get_redis_connection
 from shared.metrics import Counter, Histogram, inc_counter
@@ -29,7 +26,17 @@ from codecov.commands.exceptions import BaseException
 from codecov.commands.executor import get_executor_from_request
 from services import ServiceException
 
-from .schema import schema
+from .documents import (
+    PERSISTED_QUERY_NOT_FOUND,
+    CachedDocument,
+    PersistedQueryError,
+    get_document,
+    persist_query,
+    resolve_persisted_query,
+    validate_document,
+)
+from .profiler import ResolverProfilerExtension, profile_requested
+from .schema import get_schema
 from .validation import (
     MissingVariablesError,
     create_max_aliases_rule,
@@ -154,6 +161,23 @@ class QueryMetricsExtension(Extension):
         ).inc(len(errors))
 
 
+class GraphQLJsonResponse(HttpResponse):
+    """
+    A `JsonResponse` serialized with orjson.  Dates and values orjson doesn't support
+    (e.g. `Decimal`) are still serialized by `DjangoJSONEncoder`, so that they're
+    formatted the same as before.
+    """
+
+    def __init__(self, data: dict[str, Any], **kwargs: Any) -> None:
+        kwargs.setdefault("content_type", "application/json")
+        content = orjson.dumps(
+            data,
+            default=DjangoJSONEncoder().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        super().__init__(content=content, **kwargs)
+
+
 class RequestFinalizer:
     """
     A context manager class used as a teardown step after the GraphQL request is fully handled.
@@ -194,29 +218,83 @@ class RequestFinalizer:
 
 
 class AsyncGraphqlView(GraphQLAsyncView):
-    schema = schema
+    # defaults to `get_schema()`, which is built on the first request
+    schema: Optional[GraphQLSchema] = None
     extensions = [QueryMetricsExtension]
     introspection = settings.GRAPHQL_INTROSPECTION_ENABLED
 
+    # the decoded request body, with the query of its persisted query filled in
+    request_data: Optional[Any] = None
+    cached_document: Optional[CachedDocument] = None
+    variable_rules: Collection = ()
+
     def get_validation_rules(
         self,
         context_value: Optional[Any],
         document: DocumentNode,
         data: dict,
     ) -> Optional[Collection]:
-        return [
+        # these depend on the request's variables and can't be cached with the document
+        self.variable_rules = [
             create_required_variables_rule(variables=data.get("variables", {})),
-            create_max_aliases_rule(max_aliases=settings.GRAPHQL_MAX_ALIASES),
-            create_max_depth_rule(max_depth=settings.GRAPHQL_MAX_DEPTH),
             cost_validator(
                 maximum_cost=settings.GRAPHQL_QUERY_COST_THRESHOLD,
                 default_cost=1,
                 variables=data.get("variables"),
             ),
         ]
+        return [
+            self.variable_rules[0],
+            create_max_aliases_rule(max_aliases=settings.GRAPHQL_MAX_ALIASES),
+            create_max_depth_rule(max_depth=settings.GRAPHQL_MAX_DEPTH),
+            self.variable_rules[1],
+        ]
 
     validation_rules = get_validation_rules  # type: ignore
 
+    def get_extensions_for_request(
+        self, request: WSGIRequest, context: Optional[Any]
+    ) -> list:
+        extensions = list(super().get_extensions_for_request(request, context) or [])
+        if settings.GRAPHQL_PROFILER_ENABLED or profile_requested(request):
+            extensions.append(ResolverProfilerExtension)
+        return extensions
+
+    def get_kwargs_graphql(self, request: WSGIRequest) -> dict[str, Any]:
+        kwargs = super().get_kwargs_graphql(request)
+        kwargs["query_parser"] = self.parse_query
+        kwargs["query_validator"] = self.validate_query
+        return kwargs
+
+    def parse_query(self, context_value: Optional[Any], data: dict) -> DocumentNode:
+        self.cached_document = get_document(data["query"])
+        return self.cached_document.document
+
+    def validate_query(
+        self,
+        schema: GraphQLSchema,
+        document_ast: DocumentNode,
+        rules: Collection,
+        max_errors: Optional[int] = None,
+        type_info: Optional[TypeInfo] = None,
+    ) -> list[GraphQLError]:
+        cached_document = self.cached_document
+        if cached_document is None or cached_document.document is not document_ast:
+            # the document wasn't parsed by `parse_query`
+            cached_document = CachedDocument(document=document_ast)
+        errors = validate_document(
+            schema,
+            cached_document,
+            static_rules=[rule for rule in rules if rule not in self.variable_rules],
+            variable_rules=[rule for rule in rules if rule in self.variable_rules],
+            max_errors=max_errors,
+            type_info=type_info,
+        )
+        if not errors:
+            # only valid queries are persisted
+            persist_query(self.request_data)
+        return errors
+
     def get_clean_query(self, request_body: dict[str, Any]) -> str | None:
         # clean up graphql query to remove new lines and extra spaces
         if "query" in request_body and isinstance(request_body["query"], str):
@@ -234,8 +312,14 @@ class AsyncGraphqlView(GraphQLAsyncView):
         self, request: WSGIRequest, *args: Any, **kwargs: Any
     ) -> HttpResponse:
         await self._get_user(request)
-        # get request body information for logging
-        req_body = json.loads(request.body.decode("utf-8")) if request.body else {}
+        # the request body is decoded once, here, and shared with Ariadne and the context
+        try:
+            self.request_data = self.extract_data_from_request(request)
+        except HttpBadRequestError:
+            self.request_data = None
+        req_body = (
+            dict(self.request_data) if isinstance(self.request_data, dict) else {}
+        )
 
         # get request path information for logging
         req_path = request.get_full_path()
@@ -268,9 +352,36 @@ class AsyncGraphqlView(GraphQLAsyncView):
                 status=429,
             )
 
+        if self.request_data is None:
+            return JsonResponse(
+                data={
+                    "status": 400,
+                    "detail": "Request body is not valid JSON.",
+                },
+                status=400,
+            )
+
+        try:
+            self.request_data = resolve_persisted_query(self.request_data)
+        except PersistedQueryError as e:
+            inc_counter(
+                GQL_ERROR_TYPE_COUNTER,
+                labels=dict(error_type="persisted_query", path=req_path),
+            )
+            # clients retry with the full query when it isn't found
+            return JsonResponse(
+                data={"errors": [e.formatted]},
+                status=200 if e.code == PERSISTED_QUERY_NOT_FOUND else 400,
+            )
+
         with RequestFinalizer(request):
+            kwargs = self.get_kwargs_graphql(request)
             try:
-                response = await super().post(request, *args, **kwargs)
+                success, result = await graphql(
+                    self.schema or get_schema(),
+                    self.request_data,
+                    **kwargs,
+                )
             except MissingVariablesError as e:
                 return JsonResponse(
                     data={
@@ -280,54 +391,46 @@ class AsyncGraphqlView(GraphQLAsyncView):
                     status=400,
                 )
 
-            content = response.content.decode("utf-8")
-            try:
-                data = json.loads(content)
-            except json.JSONDecodeError:
-                log.error(
-                    "Failed to decode JSON response",
-                    extra={"content": content, "request_body": req_body},
-                )
-                return JsonResponse(
-                    data={
-                        "status": 400,
-                        "detail": "Invalid JSON response received.",
-                    },
-                    status=400,
-                )
-
-            if "errors" in data:
+            errors = result.get("errors")
+            if errors:
                 inc_counter(
                     GQL_ERROR_TYPE_COUNTER,
                     labels=dict(error_type="all", path=req_path),
                 )
-                try:
-                    if data["errors"][0]["extensions"]["cost"]:
-                        costs = data["errors"][0]["extensions"]["cost"]
-                        log.error(
-                            "Query Cost Exceeded",
-                            extra=dict(
-                                requested_cost=costs.get("requestedQueryCost"),
-                                maximum_cost=costs.get("maximumAvailable"),
-                                request_body=req_body,
-                            ),
-                        )
-                        inc_counter(
-                            GQL_ERROR_TYPE_COUNTER,
-                            labels=dict(
-                                error_type="query_cost_exceeded",
-                                path=req_path,
-                            ),
-                        )
-                        return HttpResponseBadRequest(
-                            JsonResponse("Your query is too costly.")
-                        )
-                except Exception:
-                    pass
+                costs = (errors[0].get("extensions") or {}).get("cost")
+                if costs:
+                    log.error(
+                        "Query Cost Exceeded",
+                        extra=dict(
+                            requested_cost=costs.get("requestedQueryCost"),
+                            maximum_cost=costs.get("maximumAvailable"),
+                            request_body=req_body,
+                        ),
+                    )
+                    inc_counter(
+                        GQL_ERROR_TYPE_COUNTER,
+                        labels=dict(
+                            error_type="query_cost_exceeded",
+                            path=req_path,
+                        ),
+                    )
+            # see `graphql_api.profiler`
+            profile = kwargs["context_value"].get("profile")
+            if profile is None or not profile_requested(request):
+                return GraphQLJsonResponse(result, status=200 if success else 400)
+            result.setdefault("extensions", {})["profile"] = profile.summary()
+            response = GraphQLJsonResponse(result, status=200 if success else 400)
+            response["Server-Timing"] = profile.server_timing()
             return response
 
+    def extract_data_from_json_request(self, request: WSGIRequest) -> Any:
+        try:
+            return orjson.loads(request.body)
+        except orjson.JSONDecodeError as e:
+            raise HttpBadRequestError("Request body is not a valid JSON") from e
+
     def context_value(self, request: WSGIRequest, *_args: Any) -> dict[str, Any]:
-        request_body = json.loads(request.body.decode("utf-8")) if request.body else {}
+        request_body = self.request_data if isinstance(self.request_data, dict) else {}
         self.request = request
 
         return {
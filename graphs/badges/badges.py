@@ -97,3 +97,47 @@ unknown_badge = """<svg xmlns="http://www.w3.org/2000/svg" width="137" height="2
     </svg>
 </svg>
 """
+
+unknown_bundle_badge = """<svg xmlns="http://www.w3.org/2000/svg" width="106" height="20">
+    <linearGradient id="CodecovBadgeGradient" x2="0" y2="100%">
+        <stop offset="0" stop-color="#bbb" stop-opacity=".1" />
+        <stop offset="1" stop-opacity=".1" />
+    </linearGradient>
+    <mask id="CodecovBadgeMask106px">
+        <rect width="106" height="20" rx="3" fill="#fff" />
+    </mask>
+    <g mask="url(#CodecovBadgeMask106px)">
+        <path fill="#555" d="M0 0h47v20H0z" />
+        <path fill="#2C2433" d="M47 0h59v20H47z" />
+        <path fill="url(#CodecovBadgeGradient)" d="M0 0h106v20H0z" />
+    </g>
+    <g fill="#fff" text-anchor="left" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
+        <text x="5" y="15" fill="#010101" fill-opacity=".3">bundle</text>
+        <text x="5" y="14">bundle</text>
+        <text x="52" y="15" fill="#010101" fill-opacity=".3">unknown</text>
+        <text x="52" y="14">unknown</text>
+    </g>
+</svg>
+"""
+
+bundle_badge = """<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="20">
+    <linearGradient id="CodecovBadgeGradient" x2="0" y2="100%">
+        <stop offset="0" stop-color="#bbb" stop-opacity=".1" />
+        <stop offset="1" stop-opacity=".1" />
+    </linearGradient>
+    <mask id="CodecovBadgeMask{0}px">
+        <rect width="{0}" height="20" rx="3" fill="#fff" />
+    </mask>
+    <g mask="url(#CodecovBadgeMask{0}px)">
+        <path fill="#555" d="M0 0h47v20H0z" />
+        <path fill="#2C2433" d="M47 0h{1}v20H47z" />
+        <path fill="url(#CodecovBadgeGradient)" d="M0 0h{0}v20H0z" />
+    </g>
+    <g fill="#fff" text-anchor="left" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
+        <text x="5" y="15" fill="#010101" fill-opacity=".3">bundle</text>
+        <text x="5" y="14">bundle</text>
+        <text x="52" y="15" fill="#010101" fill-opacity=".3">{2}</text>
+        <text x="52" y="14">{2}</text>
+    </g>
+</svg>
+"""
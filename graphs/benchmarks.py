@@ -0,0 +1,146 @@
+"""
+Micro-benchmarks for the graph and badge renderers. They don't need a database,
+run them with:
+
+    python -m graphs.benchmarks [name ...]
+"""
+
+import random
+import sys
+import timeit
+from typing import Callable
+from unittest.mock import patch
+
+from graphs.helpers import graphs
+from graphs.helpers.badge import render_badge, render_bundle_badge
+from graphs.helpers.graph_utils import _layout
+
+BENCHMARKS: dict[str, Callable[[], None]] = {}
+
+
+def benchmark(func: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _report(name: str, stmt: Callable, number: int) -> None:
+    elapsed = min(timeit.repeat(stmt, number=number, repeat=5))
+    sys.stdout.write(f"{name:<40} {elapsed / number * 1e6:10.2f} us/call\n")
+
+
+@benchmark
+def badge():
+    coverages = [f"{i / 100:.2f}" for i in range(10000)]
+
+    for precision in ("0", "1", "2"):
+        _report(
+            f"render_badge (precision={precision})",
+            lambda: render_badge(coverages[4242], [70, 100], precision),
+            number=100000,
+        )
+    _report(
+        "render_badge (10k distinct coverages)",
+        lambda: [render_badge(c, [70, 100], "2") for c in coverages],
+        number=10,
+    )
+    _report(
+        "render_badge (unknown)", lambda: render_badge(None, [70, 100], "0"), 100000
+    )
+    _report(
+        "render_bundle_badge", lambda: render_bundle_badge(7777777, 2), number=100000
+    )
+
+
+def _reference_squarify(values, left, top, width, height, **kwargs):
+    """
+    The original recursive squarify implementation, which lays out every
+    candidate row to find its worst aspect ratio. Kept to check that the
+    current implementation produces identical geometry.
+    """
+
+    def worst_ratio(areas, left, top, width, height):
+        rectangles, _ = _layout(areas, left, top, width, height)
+        return max(
+            max(
+                (rect[2] / rect[3]) if rect[3] > 0 else 0,
+                (rect[3] / rect[2]) if rect[2] > 0 else 0,
+            )
+            for rect in rectangles
+        )
+
+    if len(values) == 0:
+        return []
+    if len(values) == 1:
+        return _layout(values, left, top, width, height)[0]
+    i = 1
+    while i < len(values) and worst_ratio(
+        values[:i], left, top, width, height
+    ) >= worst_ratio(values[: (i + 1)], left, top, width, height):
+        i += 1
+    rectangles, leftover_space = _layout(values[:i], left, top, width, height)
+    return rectangles + _reference_squarify(values[i:], *leftover_space)
+
+
+def _flare(files: int, files_per_directory: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+
+    def node(name, children=None):
+        lines = (
+            sum(child["lines"] for child in children)
+            if children
+            else rng.randint(0, 2000)
+        )
+        result = {"name": name, "lines": lines, "color": "#e05d44", "_class": None}
+        if children:
+            result["children"] = children
+        return result
+
+    level = [node(f"file_{i}.py") for i in range(files)]
+    depth = 0
+    while len(level) > files_per_directory:
+        level = [
+            node(f"dir_{depth}_{i}", level[i : i + files_per_directory])
+            for i in range(0, len(level), files_per_directory)
+        ]
+        depth += 1
+    return [node("root", level)]
+
+
+@benchmark
+def treemap():
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    for files, files_per_directory in ((50000, 1000), (50000, 5000)):
+        flare = _flare(files, files_per_directory)
+        label = f"{files} files, {files_per_directory} per dir"
+
+        with patch.object(graphs, "_squarify", _reference_squarify):
+            reference = graphs.tree(flare, width=500, height=500)
+        assert graphs.tree(flare, width=500, height=500) == reference
+
+        with patch.object(graphs, "_squarify", _reference_squarify):
+            _report(
+                f"tree, reference ({label})",
+                lambda: graphs.tree(flare, width=500, height=500),
+                number=1,
+            )
+        _report(
+            f"tree ({label})",
+            lambda: graphs.tree(flare, width=500, height=500),
+            number=1,
+        )
+        _report(
+            f"icicle ({label})",
+            lambda: graphs.icicle(flare, width=750, height=150),
+            number=1,
+        )
+        _report(
+            f"sunburst ({label})",
+            lambda: graphs.sunburst(flare, width=300, height=300),
+            number=1,
+        )
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        sys.stdout.write(f"== {name}\n")
+        BENCHMARKS[name]()
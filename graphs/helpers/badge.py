@@ -1,6 +1,79 @@
+import re
+from functools import lru_cache
+
 from shared.helpers.color import coverage_to_color
 
-from graphs.badges.badges import large_badge, medium_badge, small_badge, unknown_badge
+from graphs.badges.badges import (
+    bundle_badge,
+    large_badge,
+    medium_badge,
+    small_badge,
+    unknown_badge,
+    unknown_bundle_badge,
+)
+
+_placeholder = re.compile(r"\{(\d+)\}")
+
+
+class BadgeTemplate:
+    """
+    A badge template precompiled into its static byte segments, so rendering
+    it is a single `bytes.join` of those segments and the placeholder values.
+    Placeholders are positional, `{0}`, `{1}`, ..., as in `str.format`.
+    """
+
+    def __init__(self, template: str):
+        parts = _placeholder.split(template)
+        self.segments = tuple(part.encode() for part in parts[::2])
+        self.indexes = tuple(int(index) for index in parts[1::2])
+
+    def render(self, *values: bytes) -> bytes:
+        rendered = [self.segments[0]]
+        for index, segment in zip(self.indexes, self.segments[1:]):
+            rendered.append(values[index])
+            rendered.append(segment)
+        return b"".join(rendered)
+
+
+_small_badge = BadgeTemplate(small_badge.strip())
+_medium_badge = BadgeTemplate(medium_badge.strip())
+_large_badge = BadgeTemplate(large_badge.strip())
+_unknown_badge = unknown_badge.encode()
+_bundle_badge = BadgeTemplate(bundle_badge)
+_unknown_bundle_badge = unknown_bundle_badge.encode()
+
+
+@lru_cache(maxsize=4096)
+def _badge_values(low: float, high: float, coverage: str) -> tuple[bytes, bytes]:
+    """
+    Color and text for a badge, `coverage` is already rounded to the badge's
+    precision so there's a small, bounded set of possible values.
+    """
+    color = coverage_to_color(low, high)(coverage)
+    return color.hex.encode(), coverage.encode()
+
+
+def render_badge(
+    coverage: str | None, coverage_range: list[int], precision: str
+) -> bytes:
+    """
+    Returns the SVG coverage badge as bytes, see `get_badge`
+    """
+    if coverage is None:
+        return _unknown_badge
+
+    precision = int(precision)
+    # Use medium badge to fit coverage of 100%
+    if float(coverage) == 100:
+        badge = _medium_badge
+    # Use badge size based on precision (0 = small, 1 = medium, 2 = large)
+    elif precision == 0:
+        badge = _small_badge
+    elif precision == 1:
+        badge = _medium_badge
+    else:
+        badge = _large_badge
+    return badge.render(*_badge_values(*coverage_range, str(coverage)))
 
 
 def get_badge(coverage: str | None, coverage_range: list[int], precision: str):
@@ -14,26 +87,7 @@ def get_badge(coverage: str | None, coverage_range: list[int], precision: str):
         coverage_range[1] (int): coverage high threshold to use green as badge color
     precision: (str): amount of decimals to be displayed in badge
     """
-    precision = int(precision)
-    if coverage is not None:
-        # Get color for badge
-        color = coverage_to_color(*coverage_range)(coverage)
-        # Use medium badge to fit coverage of 100%
-        if float(coverage) == 100:
-            badge = medium_badge
-        # Use badge size based on precision (0 = small, 1 = medium, 2 = large)
-        elif precision == 0:
-            badge = small_badge
-        elif precision == 1:
-            badge = medium_badge
-        else:
-            badge = large_badge
-    else:
-        badge = unknown_badge
-
-    return (
-        badge.format(color.hex, coverage).strip() if badge != unknown_badge else badge
-    )
+    return render_badge(coverage, coverage_range, precision).decode()
 
 
 def format_coverage_precision(coverage: float | None, precision: int):
@@ -52,30 +106,13 @@ def format_coverage_precision(coverage: float | None, precision: int):
     return ("%%.%sf" % precision) % coverage
 
 
-def get_bundle_badge(bundle_size_bytes: int | None, precision: int):
+def render_bundle_badge(bundle_size_bytes: int | None, precision: int) -> bytes:
+    """
+    Returns the SVG bundle size badge as bytes, see `get_bundle_badge`
+    """
     if bundle_size_bytes is None:
         # Returns text 'unknown' instead of bundle size
-        return """<svg xmlns="http://www.w3.org/2000/svg" width="106" height="20">
-    <linearGradient id="CodecovBadgeGradient" x2="0" y2="100%">
-        <stop offset="0" stop-color="#bbb" stop-opacity=".1" />
-        <stop offset="1" stop-opacity=".1" />
-    </linearGradient>
-    <mask id="CodecovBadgeMask106px">
-        <rect width="106" height="20" rx="3" fill="#fff" />
-    </mask>
-    <g mask="url(#CodecovBadgeMask106px)">
-        <path fill="#555" d="M0 0h47v20H0z" />
-        <path fill="#2C2433" d="M47 0h59v20H47z" />
-        <path fill="url(#CodecovBadgeGradient)" d="M0 0h106v20H0z" />
-    </g>
-    <g fill="#fff" text-anchor="left" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
-        <text x="5" y="15" fill="#010101" fill-opacity=".3">bundle</text>
-        <text x="5" y="14">bundle</text>
-        <text x="52" y="15" fill="#010101" fill-opacity=".3">unknown</text>
-        <text x="52" y="14">unknown</text>
-    </g>
-</svg>
-"""
+        return _unknown_bundle_badge
 
     bundle_size_string = format_bundle_bytes(bundle_size_bytes, precision)
     char_width = 7  # approximate, looks good on all reasonable inputs
@@ -84,27 +121,15 @@ def get_bundle_badge(bundle_size_bytes: int | None, precision: int):
 
     width = static_width + width_in_pixels
 
-    return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="20">
-    <linearGradient id="CodecovBadgeGradient" x2="0" y2="100%">
-        <stop offset="0" stop-color="#bbb" stop-opacity=".1" />
-        <stop offset="1" stop-opacity=".1" />
-    </linearGradient>
-    <mask id="CodecovBadgeMask{width}px">
-        <rect width="{width}" height="20" rx="3" fill="#fff" />
-    </mask>
-    <g mask="url(#CodecovBadgeMask{width}px)">
-        <path fill="#555" d="M0 0h47v20H0z" />
-        <path fill="#2C2433" d="M47 0h{width_in_pixels + 10}v20H47z" />
-        <path fill="url(#CodecovBadgeGradient)" d="M0 0h{width}v20H0z" />
-    </g>
-    <g fill="#fff" text-anchor="left" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
-        <text x="5" y="15" fill="#010101" fill-opacity=".3">bundle</text>
-        <text x="5" y="14">bundle</text>
-        <text x="52" y="15" fill="#010101" fill-opacity=".3">{bundle_size_string}</text>
-        <text x="52" y="14">{bundle_size_string}</text>
-    </g>
-</svg>
-"""
+    return _bundle_badge.render(
+        str(width).encode(),
+        str(width_in_pixels + 10).encode(),
+        bundle_size_string.encode(),
+    )
+
+
+def get_bundle_badge(bundle_size_bytes: int | None, precision: int):
+    return render_bundle_badge(bundle_size_bytes, precision).decode()
 
 
 def format_bundle_bytes(bytes: int, precision: int):
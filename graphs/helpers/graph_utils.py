@@ -14,24 +14,67 @@ style_n_defs = """
 
 
 def _squarify(values, left, top, width, height, **kwargs):
-    # values should add up to width * height
-    if len(values) == 0:
-        return []
+    """
+    Squarified treemap layout of `values` (sorted in decreasing order, adding up
+    to width * height) into the given rectangle.
 
-    if len(values) == 1:
-        return _layout(values, left, top, width, height)[0]
+    Rows are grown one value at a time for as long as that doesn't make the row's
+    worst aspect ratio worse. The worst ratio of a row is always that of its
+    largest or its smallest non-zero value, so it is updated incrementally from
+    a running sum rather than laying out every candidate row.
+    """
+    rectangles = []
+    start, count = 0, len(values)
+    while count - start > 1:
+        # rows are laid out along the shorter side of the remaining space
+        side = height if width >= height else width
+        largest = smallest = values[start]
+        row_sum = largest
+        worst = _row_worst_ratio(largest, smallest, row_sum, side)
+        end = start + 1
+        while end < count:
+            candidate_smallest = values[end] if values[end] > 0 else smallest
+            candidate_sum = row_sum + values[end]
+            candidate_worst = _row_worst_ratio(
+                largest, candidate_smallest, candidate_sum, side
+            )
+            if worst < candidate_worst:
+                break
+            smallest, row_sum, worst = (
+                candidate_smallest,
+                candidate_sum,
+                candidate_worst,
+            )
+            end += 1
 
-    i = 1
-    while i < len(values) and _worst_ratio(
-        values[:i], left, top, width, height
-    ) >= _worst_ratio(values[: (i + 1)], left, top, width, height):
-        i += 1
+        row, (left, top, width, height) = _layout(
+            values[start:end], left, top, width, height
+        )
+        rectangles.extend(row)
+        start = end
 
-    current = values[:i]
-    remaining = values[i:]
+    if count - start == 1:
+        rectangles.extend(_layout(values[start:], left, top, width, height)[0])
+    return rectangles
 
-    rectangles, leftover_space = _layout(current, left, top, width, height)
-    return rectangles + _squarify(remaining, *leftover_space)
+
+def _row_worst_ratio(largest, smallest, row_sum, side):
+    """
+    Largest aspect ratio among the rectangles of a row adding up to `row_sum`
+    laid out along `side`, given the row's largest and smallest non-zero areas.
+    """
+    thickness = row_sum / side
+    return max(
+        _aspect_ratio(thickness, largest / thickness),
+        _aspect_ratio(thickness, smallest / thickness),
+    )
+
+
+def _aspect_ratio(thickness, length):
+    return max(
+        (thickness / length) if length > 0 else 0,
+        (length / thickness) if thickness > 0 else 0,
+    )
 
 
 def _layout(areas, left, top, width, height, **kwargs):
@@ -57,18 +100,6 @@ def _layout(areas, left, top, width, height, **kwargs):
     return rectangles, leftover_space
 
 
-def _worst_ratio(areas, left, top, width, height, **kwargs):
-    rectangles, leftover = _layout(areas, left, top, width, height)
-    return max(map(_max_aspect_ratio, rectangles))
-
-
-def _max_aspect_ratio(rect):
-    return max(
-        (rect[2] / rect[3]) if rect[3] > 0 else 0,
-        (rect[3] / rect[2]) if rect[2] > 0 else 0,
-    )
-
-
 def _svg_rect(x, y, width, height, fill, stroke, stroke_width, _class=None, title=None):
     """http://www.w3schools.com/svg/svg_rect.asp"""
     if title is None:
@@ -1,5 +1,3 @@
-from operator import itemgetter
-
 from graphs.settings import settings
 
 from .graph_utils import (
@@ -32,21 +30,21 @@ def tree(parsed_data, href=None, classes=None, **kwargs):
         _sum_values = sum(values)
         if _sum_values > 0:
             correction = width * height / _sum_values
-            sorted_values = sorted(
-                enumerate(value * correction for value in values),
-                key=itemgetter(1),
-                reverse=True,
+            corrected_values = [value * correction for value in values]
+            indices = sorted(
+                range(len(items)), key=corrected_values.__getitem__, reverse=True
+            )
+            rectangles = _squarify(
+                [corrected_values[index] for index in indices],
+                left,
+                top,
+                width,
+                height,
             )
-            indices = [x[0] for x in sorted_values]
-            values = [x[1] for x in sorted_values]
-            rectangles = _squarify(values, left, top, width, height)
-            for rect, color, _class, children, name in zip(
-                rectangles,
-                (items[index]["color"] for index in indices),
-                (items[index]["_class"] for index in indices),
-                (items[index].get("children", None) for index in indices),
-                (items[index]["name"] for index in indices),
-            ):
+            for rect, index in zip(rectangles, indices):
+                item = items[index]
+                name = item["name"]
+                children = item.get("children", None)
                 step.append(name)
                 if children:
                     recursively_draw(children, step, *rect)
@@ -58,10 +56,10 @@ def tree(parsed_data, href=None, classes=None, **kwargs):
                         rect[1],
                         rect[2],
                         rect[3],
-                        fill=color,
+                        fill=item["color"],
                         stroke=options["border_color"],
                         stroke_width=options["border_size"],
-                        _class=_class,
+                        _class=item["_class"],
                         title=path,
                     )
                     svg_elements.append(rect)
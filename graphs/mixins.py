@@ -1,12 +1,23 @@
+import hashlib
 from typing import Any
 
 from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 
 class GraphBadgeAPIMixin(object):
+    def get_etag(self, request: Request, *args: Any, **kwargs: Any) -> str | None:
+        """
+        Identifies the response without rendering it, e.g. by the version of the
+        commit it is rendered from, so that revalidations are answered before doing
+        any of the report work. Responses without one are tagged by their content.
+        """
+        return None
+
     def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         ext = self.kwargs.get("ext")
         if ext not in self.extensions:
@@ -17,12 +28,32 @@ class GraphBadgeAPIMixin(object):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        # Badges and graphs are embedded in READMEs and fetched through proxies and CDNs,
+        # a strong ETag lets them revalidate with a 304 instead of downloading it again
+        version = self.get_etag(request, *args, **kwargs)
+        if version is not None:
+            etag = quote_etag(hashlib.sha256(version.encode()).hexdigest())
+            conditional_response = get_conditional_response(request, etag=etag)
+            if conditional_response is not None:
+                return self.add_headers(conditional_response, etag)
+
         graph = self.get_object(
             request, *args, **kwargs
         )  # for badge handler this will get the badge, for graph it will get the graph
         # do all the header stuff and return the response
 
         response = HttpResponse(graph)
+        if version is None:
+            etag = quote_etag(hashlib.sha256(response.content).hexdigest())
+            conditional_response = get_conditional_response(
+                request, etag=etag, response=response
+            )
+            if conditional_response is not None:
+                response = conditional_response
+        return self.add_headers(response, etag)
+
+    def add_headers(self, response: HttpResponse, etag: str) -> HttpResponse:
+        response["ETag"] = etag
         if self.kwargs.get("ext") == "svg":
             response["Content-Disposition"] = ' inline; filename="{}.svg"'.format(
                 self.filename
@@ -33,5 +64,5 @@ class GraphBadgeAPIMixin(object):
             response["Access-Control-Expose-Headers"] = (
                 "Content-Type, Cache-Control, Expires, Etag, Last-Modified"
             )
-            response["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
+            response["Cache-Control"] = "no-cache, must-revalidate, max-age=0"
         return response
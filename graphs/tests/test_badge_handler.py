@@ -1,5 +1,6 @@
 from unittest.mock import PropertyMock, patch
 
+import fakeredis
 from rest_framework import status
 from rest_framework.test import APITestCase
 from shared.django_apps.core.tests.factories import (
@@ -1689,3 +1690,98 @@ class TestBadgeHandler(APITestCase):
         expected_badge = [line.strip() for line in expected_badge.split("\n")]
         assert expected_badge == badge
         assert response.status_code == status.HTTP_200_OK
+
+    def test_svg_badge_etag(self):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        CommitFactory(repository=repo, author=gh_owner)
+        kwargs = {
+            "service": "gh",
+            "owner_username": gh_owner.username,
+            "repo_name": "repo1",
+            "ext": "svg",
+        }
+
+        response = self._get(kwargs=kwargs)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+        assert "no-store" not in response["Cache-Control"]
+
+        path = f"/gh/{gh_owner.username}/repo1/graphs/badge.svg"
+        with patch("graphs.views.render_badge") as render_badge:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response["ETag"] == etag
+        assert not render_badge.called
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH='"outdated"')
+        assert response.status_code == status.HTTP_200_OK
+
+        response = self.client.get(path, {"precision": "2"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        # the yaml sets the coverage range and components of badges
+        repo.yaml = {"coverage": {"range": [50, 100]}}
+        repo.save()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    @patch("core.models.Commit.full_report", new_callable=PropertyMock)
+    def test_flag_badge_coverage_is_cached_per_commit(self, full_report_mock):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        commit = CommitFactory(repository=repo, author=gh_owner)
+        full_report_mock.return_value = sample_report()
+        kwargs = {
+            "service": "gh",
+            "owner_username": gh_owner.username,
+            "repo_name": "repo1",
+            "ext": "txt",
+        }
+
+        with patch("graphs.views.redis", fakeredis.FakeStrictRedis()):
+            for _ in range(2):
+                response = self._get(kwargs=kwargs, data={"flag": "unittests"})
+                assert response.content.decode("utf-8") == "100"
+            assert full_report_mock.call_count == 2  # `flags` and its `None` check
+
+            # updating the commit invalidates the cached coverage
+            commit.save()
+            response = self._get(kwargs=kwargs, data={"flag": "unittests"})
+            assert response.content.decode("utf-8") == "100"
+            assert full_report_mock.call_count == 4
+
+    @patch("graphs.views.commit_components")
+    @patch("core.models.Commit.full_report", new_callable=PropertyMock)
+    def test_component_badge_coverage_is_cached_per_yaml(
+        self, full_report_mock, commit_components_mock
+    ):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        CommitFactory(repository=repo, author=gh_owner)
+        full_report_mock.return_value = sample_report()
+        commit_components_mock.return_value = []
+        kwargs = {
+            "service": "gh",
+            "owner_username": gh_owner.username,
+            "repo_name": "repo1",
+            "ext": "txt",
+        }
+
+        with patch("graphs.views.redis", fakeredis.FakeStrictRedis()):
+            for _ in range(2):
+                self._get(kwargs=kwargs, data={"component": "unittests"})
+            assert commit_components_mock.call_count == 1
+
+            # components are defined in the yaml
+            repo.yaml = {"component_management": {}}
+            repo.save()
+            self._get(kwargs=kwargs, data={"component": "unittests"})
+            assert commit_components_mock.call_count == 2
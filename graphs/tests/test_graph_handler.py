@@ -1,7 +1,13 @@
+from datetime import timedelta
 from unittest.mock import patch
 
+import fakeredis
+import shared.reports.api_report_service as report_service
+from django.utils import timezone
+from redis.exceptions import RedisError
 from rest_framework import status
 from rest_framework.test import APITestCase
+from shared.django_apps.core.models import Commit
 from shared.django_apps.core.tests.factories import (
     BranchFactory,
     CommitFactory,
@@ -11,9 +17,19 @@ from shared.django_apps.core.tests.factories import (
     RepositoryFactory,
 )
 
+from graphs.views import _flare_cache, _graph_cache
+
 
 @patch("shared.api_archive.archive.ArchiveService.read_chunks", lambda obj, _: "")
 class TestGraphHandler(APITestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("graphs.views.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        _flare_cache.clear()
+        _graph_cache.clear()
+
     def _get(self, graph_type, kwargs={}, data={}):
         path = f"/{kwargs.get('service')}/{kwargs.get('owner_username')}/{kwargs.get('repo_name')}/graphs/{graph_type}.{kwargs.get('ext')}"
         return self.client.get(path, data=data)
@@ -685,3 +701,118 @@ class TestGraphHandler(APITestCase):
             response.data["detail"]
             == "Not found. Note: file for chunks not found in storage"
         )
+
+    def _get_tree(self, owner, commit, width=None):
+        return self._get_commit(
+            "tree",
+            kwargs={
+                "service": "gh",
+                "owner_username": owner.username,
+                "repo_name": "repo1",
+                "ext": "svg",
+                "commit": commit.commitid,
+            },
+            data={"width": width} if width else {},
+        )
+
+    @patch(
+        "shared.reports.api_report_service.build_report_from_commit",
+        wraps=report_service.build_report_from_commit,
+    )
+    def test_commit_graph_is_cached(self, mocked_build_report):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        commit = CommitWithReportFactory(repository=repo, author=gh_owner)
+
+        first = self._get_tree(gh_owner, commit)
+        assert first.status_code == status.HTTP_200_OK
+        assert mocked_build_report.call_count == 1
+
+        # served from the in-process tier
+        second = self._get_tree(gh_owner, commit)
+        assert second.content == first.content
+        assert mocked_build_report.call_count == 1
+
+        # and from redis once the in-process tier is gone
+        _flare_cache.clear()
+        _graph_cache.clear()
+        third = self._get_tree(gh_owner, commit)
+        assert third.content == first.content
+        assert mocked_build_report.call_count == 1
+
+        # a new size renders a new graph from the cached flare, which isn't cached
+        resized = self._get_tree(gh_owner, commit, width=200)
+        assert resized.status_code == status.HTTP_200_OK
+        assert 'width="200"' in resized.content.decode()
+        assert mocked_build_report.call_count == 1
+        assert len(self.redis.keys("graph_svg:*")) == 1
+
+    @patch(
+        "shared.reports.api_report_service.build_report_from_commit",
+        wraps=report_service.build_report_from_commit,
+    )
+    def test_commit_graph_revalidated_without_rendering(self, mocked_build_report):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        commit = CommitWithReportFactory(repository=repo, author=gh_owner)
+        path = f"/gh/{gh_owner.username}/repo1/commit/{commit.commitid}/graphs/tree.svg"
+
+        etag = self._get_tree(gh_owner, commit)["ETag"]
+        _flare_cache.clear()
+        _graph_cache.clear()
+        with patch("graphs.views._get_cached_graph") as get_cached_graph:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not get_cached_graph.called
+        assert mocked_build_report.call_count == 1
+
+        # another size is another graph
+        response = self.client.get(path, {"width": 200}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        Commit.objects.filter(repository=repo, commitid=commit.commitid).update(
+            updatestamp=timezone.now() + timedelta(minutes=1)
+        )
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    @patch(
+        "shared.reports.api_report_service.build_report_from_commit",
+        wraps=report_service.build_report_from_commit,
+    )
+    def test_commit_graph_cache_invalidated_on_update(self, mocked_build_report):
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        commit = CommitWithReportFactory(repository=repo, author=gh_owner)
+
+        self._get_tree(gh_owner, commit)
+        assert mocked_build_report.call_count == 1
+
+        Commit.objects.filter(repository=repo, commitid=commit.commitid).update(
+            updatestamp=timezone.now() + timedelta(minutes=1)
+        )
+        response = self._get_tree(gh_owner, commit)
+        assert response.status_code == status.HTTP_200_OK
+        assert mocked_build_report.call_count == 2
+
+    @patch("graphs.views.redis")
+    def test_commit_graph_redis_unavailable(self, mocked_redis):
+        mocked_redis.get.side_effect = RedisError
+        mocked_redis.set.side_effect = RedisError
+        gh_owner = OwnerFactory(service="github")
+        repo = RepositoryFactory(
+            author=gh_owner, active=True, private=False, name="repo1"
+        )
+        commit = CommitWithReportFactory(repository=repo, author=gh_owner)
+
+        response = self._get_tree(gh_owner, commit)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.decode().startswith("<svg")
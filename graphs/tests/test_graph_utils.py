@@ -1,7 +1,38 @@
-from graphs.helpers.graph_utils import _tree_height
+import random
+
+import pytest
+
+from graphs.benchmarks import _reference_squarify
+from graphs.helpers.graph_utils import _squarify, _tree_height
 
 
 class TestGraphsUtils(object):
+    def test_squarify_matches_reference_layout(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            values = [
+                rng.choice([0, 1, 2, rng.randint(1, 1000), rng.random() * 100])
+                for _ in range(rng.randint(1, 40))
+            ]
+            if sum(values) == 0:
+                values[0] = 1
+            width, height = rng.choice([(500, 500), (750, 150), (300, 301)])
+            correction = width * height / sum(values)
+            values = sorted((value * correction for value in values), reverse=True)
+            assert _squarify(values, 0, 0, width, height) == _reference_squarify(
+                values, 0, 0, width, height
+            )
+
+    def test_squarify_many_values(self):
+        # used to recurse once per row
+        values = [1.0] * 20000
+        rectangles = _squarify(values, 0, 0, 100, 200)
+        assert len(rectangles) == 20000
+        assert sum(rect[2] * rect[3] for rect in rectangles) == pytest.approx(20000)
+
+    def test_squarify_empty(self):
+        assert _squarify([], 0, 0, 100, 100) == []
+
     def test_tree_height(self):
         tree = [{"name": "name_0"}]
 
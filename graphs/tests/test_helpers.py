@@ -1,12 +1,41 @@
 from graphs.helpers.badge import (
+    BadgeTemplate,
     format_bundle_bytes,
     format_coverage_precision,
     get_badge,
     get_bundle_badge,
+    render_badge,
+    render_bundle_badge,
 )
 
 
 class TestGraphsHelpers(object):
+    def test_badge_template(self):
+        template = BadgeTemplate('<a fill="{0}">{1}%</a><b>{1}%</b>')
+        assert template.segments == (b'<a fill="', b'">', b"%</a><b>", b"%</b>")
+        assert template.render(b"#fff", b"91.1") == (
+            b'<a fill="#fff">91.1%</a><b>91.1%</b>'
+        )
+
+    def test_render_badge_bytes(self):
+        # samples rendered by `get_badge` and `get_bundle_badge` before badges
+        # were rendered from byte templates
+        for sample, coverage, precision in [
+            ("badge_small", "80", "0"),
+            ("badge_medium", "91.1", "1"),
+            ("badge_large", "60.52", "2"),
+            ("badge_unknown", None, "2"),
+        ]:
+            with open(f"./graphs/tests/samples/{sample}.svg", "rb") as f:
+                assert render_badge(coverage, [70, 100], precision) == f.read()
+
+        for sample, bundle_size_bytes in [
+            ("bundle_badge", 7777777),
+            ("bundle_badge_unknown", None),
+        ]:
+            with open(f"./graphs/tests/samples/{sample}.svg", "rb") as f:
+                assert render_bundle_badge(bundle_size_bytes, 2) == f.read()
+
     def test_format_coverage_precision(self):
         coverage = "91.1111"
         precision = "1"
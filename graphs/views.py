@@ -1,32 +1,52 @@
+import hashlib
+import json
 import logging
+import zlib
+from typing import Callable
 
 import shared.reports.api_report_service as report_service
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import Http404
+from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from rest_framework import exceptions
 from rest_framework.exceptions import NotFound
 from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from shared.django_apps.core.models import Commit
+from shared.helpers.redis import get_redis_connection
 from shared.metrics import Counter, inc_counter
 
 from api.shared.mixins import RepoPropertyMixin
-from core.models import Branch, Pull
+from codecov_auth.models import Owner
+from core.models import Branch, Pull, Repository
 from graphs.settings import settings
 from services.bundle_analysis import load_report
 from services.components import commit_components
+from utils.lru_cache import LRUCache
 
 from .helpers.badge import (
     format_bundle_bytes,
     format_coverage_precision,
-    get_badge,
-    get_bundle_badge,
+    render_badge,
+    render_bundle_badge,
 )
 from .helpers.graphs import icicle, sunburst, tree
 from .mixins import GraphBadgeAPIMixin
 
 log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+# Flag and component coverage is cached per head commit version, so a new branch
+# head or updated commit totals naturally result in a different cache key
+BADGE_COVERAGE_CACHE_TTL = 60 * 60
+
+# Flares and rendered graphs are cached the same way; both are kept in Redis
+# and in a small per-process LRU so repeated requests skip deserialization too
+GRAPH_CACHE_TTL = 60 * 60 * 24
+_flare_cache = LRUCache(maxsize=16)
+_graph_cache = LRUCache(maxsize=256)
 
 FLARE_USE_COUNTER = Counter(
     "graph_activity",
@@ -44,6 +64,75 @@ FLARE_SUCCESS_COUNTER = Counter(
 )
 
 
+def commit_cache_version(commit: Commit) -> str:
+    """
+    Identifies the current version of `commit`; its `updatestamp` changes whenever
+    the commit's report does, which invalidates anything cached under this version.
+    """
+    return "{}:{}:{}".format(
+        commit.repository_id,
+        commit.commitid,
+        commit.updatestamp.timestamp() if commit.updatestamp else None,
+    )
+
+
+def yaml_cache_version(owner: Owner, repository: Repository) -> str:
+    """
+    Identifies the current owner and repository yaml, which badges depend on (e.g.
+    their components and coverage range) but which the commit doesn't change with.
+    """
+    yaml = json.dumps([owner.yaml, repository.yaml], sort_keys=True, default=str)
+    return hashlib.sha256(yaml.encode()).hexdigest()[:16]
+
+
+def _get_cached_flare(key: str) -> list | None:
+    flare = _flare_cache.get(key)
+    if flare is not None:
+        return flare
+    try:
+        cached = redis.get(key)
+    except RedisError:
+        log.warning("Error reading flare from cache", exc_info=True)
+        return None
+    if cached is None:
+        return None
+    flare = json.loads(zlib.decompress(cached))
+    _flare_cache.set(key, flare)
+    return flare
+
+
+def _set_cached_flare(key: str, flare: list) -> None:
+    _flare_cache.set(key, flare)
+    try:
+        redis.set(key, zlib.compress(json.dumps(flare).encode()), ex=GRAPH_CACHE_TTL)
+    except RedisError:
+        log.warning("Error writing flare to cache", exc_info=True)
+
+
+def _get_cached_graph(key: str) -> str | None:
+    graph = _graph_cache.get(key)
+    if graph is not None:
+        return graph
+    try:
+        cached = redis.get(key)
+    except RedisError:
+        log.warning("Error reading graph from cache", exc_info=True)
+        return None
+    if cached is None:
+        return None
+    graph = cached.decode()
+    _graph_cache.set(key, graph)
+    return graph
+
+
+def _set_cached_graph(key: str, graph: str) -> None:
+    _graph_cache.set(key, graph)
+    try:
+        redis.set(key, graph, ex=GRAPH_CACHE_TTL)
+    except RedisError:
+        log.warning("Error writing graph to cache", exc_info=True)
+
+
 class IgnoreClientContentNegotiation(DefaultContentNegotiation):
     def select_parser(self, request, parsers):
         """
@@ -87,29 +176,36 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
         if self.kwargs.get("ext") == "txt":
             return coverage
 
-        return get_badge(coverage, coverage_range, precision)
+        return render_badge(coverage, coverage_range, precision)
 
-    def get_coverage(self):
-        """
-        Note: This endpoint has the behavior of returning a gray badge with the word 'unknown' instead of returning a 404
-              when the user enters an invalid service, owner, repo or when coverage is not found for a branch.
+    def get_etag(self, request, *args, **kwargs):
+        commit = self.head_commit
+        if commit is None:
+            return None
+        return "badge:{}:{}:{}:{}".format(
+            commit_cache_version(commit),
+            yaml_cache_version(self.owner, self.repo),
+            self.kwargs.get("ext"),
+            sorted(self.request.query_params.items()),
+        )
 
-              We also need to support service abbreviations for users already using them
+    @cached_property
+    def head_commit(self) -> Commit | None:
+        """
+        The head commit of the badge's branch, None when the badge can't be shown.
         """
-        coverage_range = [70, 100]
-
         try:
             repo = self.repo
         except Http404:
             log.warning("Repo not found", extra=dict(repo=self.kwargs.get("repo_name")))
-            return None, coverage_range
+            return None
 
         if repo.private and repo.image_token != self.request.query_params.get("token"):
             log.warning(
                 "Token provided does not match repo's image token",
                 extra=dict(repo=repo),
             )
-            return None, coverage_range
+            return None
 
         branch_name = self.kwargs.get("branch") or repo.branch
         branch = Branch.objects.filter(
@@ -120,24 +216,42 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
             log.warning(
                 "Branch not found", extra=dict(branch_name=branch_name, repo=repo)
             )
-            return None, coverage_range
+            return None
         try:
-            commit = repo.commits.filter(commitid=branch.head).first()
+            return repo.commits.filter(commitid=branch.head).first()
         except ObjectDoesNotExist:
             # if commit does not exist return None coverage
             log.warning("Commit not found", extra=dict(commit=branch.head))
+            return None
+
+    def get_coverage(self):
+        """
+        Note: This endpoint has the behavior of returning a gray badge with the word 'unknown' instead of returning a 404
+              when the user enters an invalid service, owner, repo or when coverage is not found for a branch.
+
+              We also need to support service abbreviations for users already using them
+        """
+        coverage_range = [70, 100]
+
+        commit = self.head_commit
+        if commit is None:
             return None, coverage_range
 
+        repo = self.repo
         if repo.yaml and repo.yaml.get("coverage", {}).get("range") is not None:
             coverage_range = repo.yaml.get("coverage", {}).get("range")
 
         flag = self.request.query_params.get("flag")
         if flag:
-            return self.flag_coverage(flag, commit), coverage_range
+            return self.cached_coverage(
+                commit, "flag", flag, self.flag_coverage
+            ), coverage_range
 
         component = self.request.query_params.get("component")
         if component:
-            return self.component_coverage(component, commit), coverage_range
+            return self.cached_coverage(
+                commit, "component", component, self.component_coverage
+            ), coverage_range
 
         coverage = (
             commit.totals.get("c")
@@ -147,6 +261,38 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
 
         return coverage, coverage_range
 
+    def cached_coverage(
+        self,
+        commit: Commit,
+        kind: str,
+        identifier: str,
+        compute: Callable[[str, Commit], float | None],
+    ) -> float | None:
+        """
+        Returns `compute(identifier, commit)`, caching it for the current version of `commit`
+        and of the yaml (which defines components) so that badges for the same head
+        commit don't rebuild its full report.
+        """
+        key = "badge_coverage:{}:{}:{}:{}".format(
+            commit_cache_version(commit),
+            yaml_cache_version(self.owner, self.repo),
+            kind,
+            identifier,
+        )
+        try:
+            cached = redis.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except RedisError:
+            log.warning("Error reading badge coverage from cache", exc_info=True)
+
+        coverage = compute(identifier, commit)
+        try:
+            redis.set(key, json.dumps(coverage), ex=BADGE_COVERAGE_CACHE_TTL)
+        except RedisError:
+            log.warning("Error writing badge coverage to cache", exc_info=True)
+        return coverage
+
     def flag_coverage(self, flag_name: str, commit: Commit):
         """
         Looks into a commit's report sessions and returns the coverage for a particular flag name.
@@ -222,7 +368,7 @@ class BundleBadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
                 else format_bundle_bytes(bundle_size_bytes, precision)
             )
 
-        return get_bundle_badge(bundle_size_bytes, precision)
+        return render_bundle_badge(bundle_size_bytes, precision)
 
     def get_bundle_size(self) -> int | None:
         try:
@@ -283,7 +429,6 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
     filename = "graph"
 
     def get_object(self, request, *args, **kwargs):
-        options = dict()
         graph = self.kwargs.get("graph")
 
         # a flare graph has been requested
@@ -293,84 +438,27 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
             extra=dict(position="start", graph_type=graph, kwargs=self.kwargs),
         )
 
-        flare = self.get_flare()
-        # flare success, will generate and return graph
-        inc_counter(FLARE_USE_COUNTER, labels=dict(position=20))
-
-        if graph == "tree":
-            options["width"] = int(
-                self.request.query_params.get(
-                    "width", settings["sunburst"]["options"]["width"] or 100
-                )
-            )
-            options["height"] = int(
-                self.request.query_params.get(
-                    "height", settings["sunburst"]["options"]["height"] or 100
-                )
-            )
-            inc_counter(FLARE_SUCCESS_COUNTER, labels=dict(graph_type=graph))
-            log.info(
-                msg="flare graph activity",
-                extra=dict(position="success", graph_type=graph, kwargs=self.kwargs),
-            )
-            return tree(flare, None, None, **options)
-        elif graph == "icicle":
-            options["width"] = int(
-                self.request.query_params.get(
-                    "width", settings["icicle"]["options"]["width"] or 100
-                )
-            )
-            options["height"] = int(
-                self.request.query_params.get(
-                    "height", settings["icicle"]["options"]["height"] or 100
-                )
-            )
-            inc_counter(FLARE_SUCCESS_COUNTER, labels=dict(graph_type=graph))
-            log.info(
-                msg="flare graph activity",
-                extra=dict(position="success", graph_type=graph, kwargs=self.kwargs),
-            )
-            return icicle(flare, **options)
-        elif graph == "sunburst":
-            options["width"] = int(
-                self.request.query_params.get(
-                    "width", settings["sunburst"]["options"]["width"] or 100
-                )
-            )
-            options["height"] = int(
-                self.request.query_params.get(
-                    "height", settings["sunburst"]["options"]["height"] or 100
-                )
-            )
-            inc_counter(FLARE_SUCCESS_COUNTER, labels=dict(graph_type=graph))
-            log.info(
-                msg="flare graph activity",
-                extra=dict(position="success", graph_type=graph, kwargs=self.kwargs),
-            )
-            return sunburst(flare, **options)
-
-    def get_flare(self):
+        options = self.get_graph_options(graph)
         pullid = self.kwargs.get("pullid")
 
-        if not pullid:
-            # pullid not in kwargs, try to generate flare from commit
-            inc_counter(FLARE_USE_COUNTER, labels=dict(position=12))
-            return self.get_commit_flare()
-        else:
-            # pullid was included in the request
+        if pullid:
+            # pull flares are stored on the pull itself, only the commit
+            # fallback goes through the flare cache
             inc_counter(FLARE_USE_COUNTER, labels=dict(position=1))
-            pull_flare = self.get_pull_flare(pullid)
-            if pull_flare is None:
+            flare = self.get_pull_flare(pullid)
+            if flare is None:
                 # failed to get flare from pull OR commit - graph request failed
                 inc_counter(FLARE_USE_COUNTER, labels=dict(position=15))
                 raise NotFound(
                     "Not found. Note: private repositories require ?token arguments"
                 )
-            return pull_flare
-
-    def get_commit_flare(self):
-        commit = self.get_commit()
+            # flare success, will generate and return graph
+            inc_counter(FLARE_USE_COUNTER, labels=dict(position=20))
+            return self.render_graph(graph, flare, options)
 
+        # pullid not in kwargs, try to generate flare from commit
+        inc_counter(FLARE_USE_COUNTER, labels=dict(position=12))
+        commit = self.commit
         if commit is None:
             # could not find a commit - graph request failed
             inc_counter(FLARE_USE_COUNTER, labels=dict(position=13))
@@ -378,6 +466,76 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
                 "Not found. Note: private repositories require ?token arguments"
             )
 
+        # only graphs of the default size are cached, other sizes are rare and
+        # would let any caller fill the cache by varying them
+        cacheable = options == self.get_default_graph_options(graph)
+        key = "graph_svg:{}:{}".format(commit_cache_version(commit), graph)
+        cached = _get_cached_graph(key) if cacheable else None
+        if cached is not None:
+            inc_counter(FLARE_SUCCESS_COUNTER, labels=dict(graph_type=graph))
+            return cached
+
+        flare = self.get_commit_flare(commit)
+        # flare success, will generate and return graph
+        inc_counter(FLARE_USE_COUNTER, labels=dict(position=20))
+        rendered = self.render_graph(graph, flare, options)
+        if rendered is not None and cacheable:
+            _set_cached_graph(key, rendered)
+        return rendered
+
+    def get_etag(self, request, *args, **kwargs):
+        # pull flares aren't versioned, their graphs are tagged by their content
+        if self.kwargs.get("pullid") or self.commit is None:
+            return None
+        graph = self.kwargs.get("graph")
+        options = self.get_graph_options(graph)
+        return "graph:{}:{}:{}:{}".format(
+            commit_cache_version(self.commit),
+            graph,
+            options["width"],
+            options["height"],
+        )
+
+    def get_default_graph_options(self, graph):
+        # the tree graph has historically shared the sunburst defaults
+        defaults = settings["icicle" if graph == "icicle" else "sunburst"]["options"]
+        return dict(width=defaults["width"] or 100, height=defaults["height"] or 100)
+
+    def get_graph_options(self, graph):
+        defaults = self.get_default_graph_options(graph)
+        return dict(
+            width=int(self.request.query_params.get("width", defaults["width"])),
+            height=int(self.request.query_params.get("height", defaults["height"])),
+        )
+
+    def render_graph(self, graph, flare, options):
+        if graph == "tree":
+            rendered = tree(flare, None, None, **options)
+        elif graph == "icicle":
+            rendered = icicle(flare, **options)
+        elif graph == "sunburst":
+            rendered = sunburst(flare, **options)
+        else:
+            return None
+
+        inc_counter(FLARE_SUCCESS_COUNTER, labels=dict(graph_type=graph))
+        log.info(
+            msg="flare graph activity",
+            extra=dict(position="success", graph_type=graph, kwargs=self.kwargs),
+        )
+        return rendered
+
+    def get_commit_flare(self, commit: Commit):
+        """
+        Returns the flare for `commit`, building its report only if the flare for
+        the current version of the commit isn't already cached.
+        """
+        key = "graph_flare:{}".format(commit_cache_version(commit))
+        flare = _get_cached_flare(key)
+        if flare is not None:
+            inc_counter(FLARE_USE_COUNTER, labels=dict(position=11))
+            return flare
+
         # will attempt to build a report from a commit
         inc_counter(FLARE_USE_COUNTER, labels=dict(position=10))
         report = report_service.build_report_from_commit(commit)
@@ -389,7 +547,9 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
 
         # report successfully generated
         inc_counter(FLARE_USE_COUNTER, labels=dict(position=11))
-        return report.flare(None, [70, 100])
+        flare = report.flare(None, [70, 100])
+        _set_cached_flare(key, flare)
+        return flare
 
     def get_pull_flare(self, pullid):
         try:
@@ -408,7 +568,16 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
                 return pull.flare
         # pull not found or pull does not have flare, try to generate flare
         inc_counter(FLARE_USE_COUNTER, labels=dict(position=5))
-        return self.get_commit_flare()
+        commit = self.commit
+        if commit is None:
+            # could not find a commit - graph request failed
+            inc_counter(FLARE_USE_COUNTER, labels=dict(position=13))
+            return None
+        return self.get_commit_flare(commit)
+
+    @cached_property
+    def commit(self) -> Commit | None:
+        return self.get_commit()
 
     def get_commit(self):
         try:
@@ -6,6 +6,10 @@ from labelanalysis.models import (
     LabelAnalysisRequest,
     LabelAnalysisRequestState,
 )
+from services.commit_ancestry import get_nearest_ancestor_with_static_analysis
+
+# how many parents of the base commit we look at when it has no static analysis
+MAX_FALLBACK_DEPTH = 10
 
 
 class CommitFromShaSerializerField(serializers.Field):
@@ -27,18 +31,18 @@ class CommitFromShaSerializerField(serializers.Field):
             return commit
         if not self.accepts_fallback:
             raise serializers.ValidationError("No static analysis found")
-        attempted_commits = []
-        for _ in range(10):
-            attempted_commits.append(commit.commitid)
-            commit = commit.parent_commit
-            if commit is None:
-                raise serializers.ValidationError(
-                    f"No possible commits have static analysis sent. Attempted commits: {','.join(attempted_commits)}"
-                )
-            if commit.staticanalysissuite_set.exists():
-                return commit
+        fallback_commit, ancestors = get_nearest_ancestor_with_static_analysis(
+            commit, max_depth=MAX_FALLBACK_DEPTH
+        )
+        if fallback_commit is not None:
+            return fallback_commit
+        attempted_commits = [ancestor.commitid for ancestor in ancestors]
+        if len(ancestors) > MAX_FALLBACK_DEPTH:
+            raise serializers.ValidationError(
+                f"No possible commits have static analysis sent. Attempted too many commits: {','.join(attempted_commits[:MAX_FALLBACK_DEPTH])}"
+            )
         raise serializers.ValidationError(
-            f"No possible commits have static analysis sent. Attempted too many commits: {','.join(attempted_commits)}"
+            f"No possible commits have static analysis sent. Attempted commits: {','.join(attempted_commits)}"
         )
 
 
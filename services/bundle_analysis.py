@@ -2,7 +2,6 @@ import enum
 import os
 from dataclasses import dataclass
 from datetime import datetime
-from decimal import Decimal
 from typing import Any, Dict, Iterable, List, Optional, Union
 
 import sentry_sdk
@@ -27,7 +26,7 @@ from shared.storage import get_appropriate_storage_service
 from core.models import Commit, Repository
 from graphql_api.actions.measurements import (
     measurements_by_ids,
-    measurements_last_uploaded_before_start_date,
+    measurements_with_carryover,
 )
 from reports.models import CommitReport
 from timeseries.helpers import fill_sparse_measurements
@@ -466,35 +465,13 @@ class BundleAnalysisMeasurementsService(object):
         ) or {measurable_ids[0]: []}
 
         # Carry over previous available value for start date if its value is null
-        for measurable_id, measurements in all_measurements.items():
-            if self.after is not None and (
-                not measurements or measurements[0]["timestamp_bin"] > self.after
-            ):
-                carryover_measurement = measurements_last_uploaded_before_start_date(
-                    owner_id=self.repository.author.ownerid,
-                    repo_id=self.repository.repoid,
-                    measurable_name=measurable_name,
-                    measurable_id=measurable_id,
-                    start_date=self.after,
-                    branch=self.branch,
-                )
-
-                # Create a new datapoint in the measurements and prepend it to the existing list
-                # If there isn't any measurements before the start date range, measurements will be untouched
-                if carryover_measurement:
-                    value = Decimal(carryover_measurement[0]["value"])
-                    carryover = dict(measurements[0]) if measurements else {}
-                    carryover["timestamp_bin"] = self.after.replace(
-                        hour=0, minute=0, second=0, microsecond=0
-                    )
-                    carryover["min"] = value
-                    carryover["max"] = value
-                    carryover["avg"] = value
-                    all_measurements[measurable_id] = [carryover] + all_measurements[
-                        measurable_id
-                    ]
-
-        return all_measurements
+        return measurements_with_carryover(
+            all_measurements,
+            repository=self.repository,
+            measurable_name=measurable_name,
+            after=self.after,
+            branch=self.branch,
+        )
 
     @sentry_sdk.trace
     def compute_asset(
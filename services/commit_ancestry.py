@@ -0,0 +1,75 @@
+from typing import List
+
+from django.db.models import Model
+
+from core.models import Commit
+from staticanalysis.models import StaticAnalysisSuite
+
+
+def get_commit_ancestors(
+    commit: Commit,
+    max_depth: int,
+    with_related: type[Model] = StaticAnalysisSuite,
+) -> List[Commit]:
+    """
+    Fetches `commit` and up to `max_depth` of its ancestors in a single recursive query,
+    following `parent_commit_id` within the commit's repository.
+
+    Commits are returned nearest first, each annotated with its `depth` (0 for `commit`
+    itself) and `has_related`, which tells whether any `with_related` row points to it
+    through its `commit` foreign key (static analysis suites by default).
+    The list is shorter than `max_depth + 1` when the ancestry ends before that.
+    """
+    commit_table = Commit._meta.db_table
+    parent_column = Commit._meta.get_field("parent_commit_id").column
+    repository_column = Commit._meta.get_field("repository").column
+    related_table = with_related._meta.db_table
+    related_column = with_related._meta.get_field("commit").column
+
+    return list(
+        Commit.objects.raw(
+            f"""
+            with recursive ancestors as (
+                select c.id, c.{parent_column} as parent, 0 as depth
+                from {commit_table} c
+                where c.id = %(commit_id)s
+                union all
+                select p.id, p.{parent_column}, a.depth + 1
+                from ancestors a
+                inner join {commit_table} p
+                    on p.{repository_column} = %(repository_id)s and p.commitid = a.parent
+                where a.depth < %(max_depth)s
+            )
+            select
+                {commit_table}.*,
+                ancestors.depth,
+                exists(
+                    select 1 from {related_table} r
+                    where r.{related_column} = ancestors.id
+                ) as has_related
+            from ancestors
+            inner join {commit_table} on {commit_table}.id = ancestors.id
+            order by ancestors.depth
+            """,
+            {
+                "commit_id": commit.id,
+                "repository_id": commit.repository_id,
+                "max_depth": max_depth,
+            },
+        )
+    )
+
+
+def get_nearest_ancestor_with_static_analysis(
+    commit: Commit, max_depth: int
+) -> tuple[Commit | None, List[Commit]]:
+    """
+    Finds the nearest commit, starting from `commit` itself and walking at most `max_depth`
+    parents, that has static analysis. Returns that commit (or `None`) and the commits
+    that were looked at, nearest first.
+    """
+    ancestors = get_commit_ancestors(commit, max_depth)
+    for ancestor in ancestors:
+        if ancestor.has_related:
+            return ancestor, ancestors
+    return None, ancestors
@@ -21,6 +21,7 @@ from shared.reports.types import ReportTotals
 from shared.torngit.base import TorngitBaseAdapter
 from shared.utils.merge import LineType, line_type
 
+from codecov.db.queries import queries
 from compare.models import CommitComparison
 from core.models import Commit, Pull
 from reports.models import CommitReport
@@ -1199,6 +1200,28 @@ class PullRequestComparison(Comparison):
         self.base_report.shift_lines_by_diff(self.pseudo_diff, forward=True)
 
 
+FETCH_PRECOMPUTED_COMPARISONS_QUERY = queries.register(
+    "comparison.fetch_precomputed",
+    f"""
+    select
+        {CommitComparison._meta.db_table}.*,
+        base_commit.commitid as base_commitid,
+        compare_commit.commitid as compare_commitid
+    from {CommitComparison._meta.db_table}
+    inner join {Commit._meta.db_table} base_commit
+        on base_commit.id = {CommitComparison._meta.db_table}.base_commit_id
+        and base_commit.repoid = %(repo_id)s::integer
+    inner join {Commit._meta.db_table} compare_commit
+        on compare_commit.id = {CommitComparison._meta.db_table}.compare_commit_id
+        and compare_commit.repoid = %(repo_id)s::integer
+    where (base_commit.commitid, compare_commit.commitid) in (
+        select * from unnest(%(base_commitids)s::text[], %(compare_commitids)s::text[])
+    )
+    """,
+    {"repo_id": "integer", "base_commitids": "text[]", "compare_commitids": "text[]"},
+)
+
+
 class CommitComparisonService:
     """
     Utilities for determining whether a commit comparison needs to be recomputed
@@ -1275,25 +1298,15 @@ class CommitComparisonService:
 
     @classmethod
     def fetch_precomputed(self, repo_id: int, keys: List[Tuple]) -> QuerySet:
-        comparison_table = CommitComparison._meta.db_table
-        commit_table = Commit._meta.db_table
-        queryset = CommitComparison.objects.raw(
-            f"""
-            select
-                {comparison_table}.*,
-                base_commit.commitid as base_commitid,
-                compare_commit.commitid as compare_commitid
-            from {comparison_table}
-            inner join {commit_table} base_commit
-                on base_commit.id = {comparison_table}.base_commit_id and base_commit.repoid = {repo_id}
-            inner join {commit_table} compare_commit
-                on compare_commit.id = {comparison_table}.compare_commit_id and compare_commit.repoid = {repo_id}
-            where (base_commit.commitid, compare_commit.commitid) in %s
-        """,
-            [tuple(keys)],
-        )
-
         # we need to make sure we're performing the query against the primary database
         # (and not the read replica) since we may have just inserted new comparisons
         # that we'd like to ensure are returned here
-        return queryset.using("default")
+        return FETCH_PRECOMPUTED_COMPARISONS_QUERY.raw(
+            CommitComparison,
+            {
+                "repo_id": repo_id,
+                "base_commitids": [base_commitid for base_commitid, _ in keys],
+                "compare_commitids": [compare_commitid for _, compare_commitid in keys],
+            },
+            using="default",
+        )
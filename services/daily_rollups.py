@@ -0,0 +1,270 @@
+"""
+Per-(repository, branch, day) values computed from commits, kept in Redis.
+
+Some reads aggregate the commits of whole repository histories on the primary
+database, e.g. coverage charts.  A `DailyRollup` keeps a value per day of every
+branch instead, which those reads aggregate further.  Rollups are built offline by
+the `refresh_daily_rollups` command, meant to run every few minutes, and reads
+never query the database for them: the repositories a read finds no up to date
+rollup for are built by the next refresh, and the read falls back to the database
+meanwhile.  Consumers only read rollups with `DAILY_ROLLUPS_ENABLED`, which is off by
+default and meant for deployments scheduling the command.
+
+Refreshes only recompute the days of the commits updated since the previous one,
+by their `updatestamp`, so commits the worker completes well after their
+`timestamp` are picked up too.  Rollups of repositories that aren't read anymore
+are dropped.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import QuerySet
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from shared.helpers.redis import get_redis_connection
+
+from core.models import Commit
+
+log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+# commits updated while a refresh runs, or on hosts with a skewed clock, are
+# picked up by the next one
+DAILY_ROLLUP_REFRESH_OVERLAP = timedelta(minutes=5)
+# rollups that weren't refreshed for this long aren't read, e.g. when refreshes stop
+DAILY_ROLLUP_MAX_STALENESS = timedelta(hours=1)
+# rollups of repositories that weren't read for this long are dropped
+DAILY_ROLLUP_TTL = timedelta(days=7)
+
+# repositories built from scratch per query
+_BUILD_BATCH_SIZE = 100
+
+RepositoryBranch = Tuple[int, str]
+DailyValues = Iterable[Tuple[int, str, date, Any]]
+
+
+class DailyRollup:
+    def __init__(self, name: str, compute: Callable[[QuerySet[Commit]], DailyValues]):
+        """
+        `compute` returns the (repoid, branch, day, value) of the days of the given
+        commits that have a value, which must be JSON serializable.
+        """
+        self.name = name
+        self.compute = compute
+
+    def _days_key(self, repoid: int, branch: str) -> str:
+        return f"daily_rollup:{self.name}:{repoid}:{branch}"
+
+    def _version_key(self, repoid: int, branch: str) -> str:
+        return f"daily_rollup:{self.name}:{repoid}:{branch}:version"
+
+    def _branches_key(self, repoid: int) -> str:
+        return f"daily_rollup:{self.name}:{repoid}:branches"
+
+    @property
+    def _refreshed_key(self) -> str:
+        # when the rollup of every repository was last refreshed, by repoid
+        return f"daily_rollup:{self.name}:refreshed"
+
+    @property
+    def _read_key(self) -> str:
+        # when the rollup of every repository was last read, by repoid
+        return f"daily_rollup:{self.name}:read"
+
+    def _read(self, branches: List[RepositoryBranch], pipeline) -> Optional[list]:
+        """
+        The results of the commands queued on `pipeline` for `branches`, or None if
+        some of their repositories don't have an up to date rollup.
+        """
+        repoids = sorted({repoid for repoid, _ in branches})
+        now = time.time()
+        pipeline.hset(self._read_key, mapping=dict.fromkeys(repoids, now))
+        pipeline.hmget(self._refreshed_key, repoids)
+        _, refreshed, *results = pipeline.execute()
+
+        oldest = now - DAILY_ROLLUP_MAX_STALENESS.total_seconds()
+        if any(at is None or float(at) < oldest for at in refreshed):
+            return None
+        return results
+
+    def days(
+        self, branches: List[RepositoryBranch]
+    ) -> Optional[Dict[RepositoryBranch, Dict[date, Any]]]:
+        """
+        The values of every day of `branches`, or None if some of their repositories
+        don't have an up to date rollup yet.
+        """
+        if not branches:
+            return {}
+        pipeline = redis.pipeline()
+        for repoid, branch in branches:
+            pipeline.hgetall(self._days_key(repoid, branch))
+        results = self._read(branches, pipeline)
+        if results is None:
+            return None
+        return {
+            repo_branch: {
+                date.fromisoformat(day.decode()): json.loads(value)
+                for day, value in days.items()
+            }
+            for repo_branch, days in zip(branches, results)
+        }
+
+    def versions(self, branches: List[RepositoryBranch]) -> Optional[List[str]]:
+        """
+        Identifies the current values of `branches`, which change whenever one of
+        their days does, or None if some of their repositories don't have an up to
+        date rollup yet.
+        """
+        if not branches:
+            return []
+        pipeline = redis.pipeline()
+        pipeline.mget(
+            [self._version_key(repoid, branch) for repoid, branch in branches]
+        )
+        results = self._read(branches, pipeline)
+        if results is None:
+            return None
+        return [version.decode() if version else "" for version in results[0]]
+
+    def _drop(self, repoids: List[int]) -> None:
+        pipeline = redis.pipeline()
+        for repoid in repoids:
+            pipeline.smembers(self._branches_key(repoid))
+        all_branches = pipeline.execute()
+
+        pipeline = redis.pipeline()
+        for repoid, branches in zip(repoids, all_branches):
+            for branch in branches:
+                pipeline.delete(
+                    self._days_key(repoid, branch.decode()),
+                    self._version_key(repoid, branch.decode()),
+                )
+            pipeline.delete(self._branches_key(repoid))
+        if repoids:
+            pipeline.hdel(self._refreshed_key, *repoids)
+            pipeline.hdel(self._read_key, *repoids)
+        pipeline.execute()
+
+    def _write(self, changes: Dict[RepositoryBranch, Dict[date, Any]]) -> None:
+        """
+        Writes the changed days of every branch, days without a value are removed.
+        """
+        pipeline = redis.pipeline()
+        for (repoid, branch), days in changes.items():
+            key = self._days_key(repoid, branch)
+            values = {
+                day.isoformat(): json.dumps(value)
+                for day, value in days.items()
+                if value is not None
+            }
+            removed = [day.isoformat() for day, value in days.items() if value is None]
+            if values:
+                pipeline.hset(key, mapping=values)
+            if removed:
+                pipeline.hdel(key, *removed)
+            pipeline.sadd(self._branches_key(repoid), branch)
+            # a fresh token rather than a counter, so that a version never repeats
+            pipeline.set(self._version_key(repoid, branch), uuid.uuid4().hex)
+        pipeline.execute()
+
+    def _changed_days(self, refreshed: Dict[int, float]) -> Dict[tuple, set]:
+        """
+        The days of the commits of the `refreshed` repositories updated since their
+        last refresh, by (repoid, branch).
+        """
+        since = min(refreshed.values()) - DAILY_ROLLUP_REFRESH_OVERLAP.total_seconds()
+        changed = (
+            Commit.objects.filter(
+                repository_id__in=list(refreshed),
+                updatestamp__gte=datetime.fromtimestamp(since, tz=timezone.utc),
+                branch__isnull=False,
+                timestamp__isnull=False,
+            )
+            .annotate(day=TruncDate("timestamp", tzinfo=timezone.utc))
+            .order_by()
+            .values_list("repository_id", "branch", "day")
+            .distinct()
+        )
+        days = defaultdict(set)
+        for repoid, branch, day in changed:
+            days[(repoid, branch)].add(day)
+        return days
+
+    def refresh(self) -> int:
+        """
+        Builds the rollups of the repositories that were read recently but don't
+        have one, and updates the others.  Returns the number of branches changed.
+        """
+        started = time.time()
+        read = {
+            int(repoid): float(at)
+            for repoid, at in redis.hgetall(self._read_key).items()
+        }
+        refreshed = {
+            int(repoid): float(at)
+            for repoid, at in redis.hgetall(self._refreshed_key).items()
+        }
+
+        expired = [
+            repoid
+            for repoid, at in read.items()
+            if at < started - DAILY_ROLLUP_TTL.total_seconds()
+        ]
+        self._drop(expired)
+        refreshed = {
+            repoid: at for repoid, at in refreshed.items() if repoid not in expired
+        }
+        missing = [
+            repoid
+            for repoid in read
+            if repoid not in refreshed and repoid not in expired
+        ]
+
+        changes: Dict[RepositoryBranch, Dict[date, Any]] = defaultdict(dict)
+        for i in range(0, len(missing), _BUILD_BATCH_SIZE):
+            repoids = missing[i : i + _BUILD_BATCH_SIZE]
+            for repoid, branch, day, value in self.compute(
+                Commit.objects.filter(repository_id__in=repoids)
+            ):
+                changes[(repoid, branch)][day] = value
+
+        if refreshed:
+            changed_days = self._changed_days(refreshed)
+            for repo_branch, days in changed_days.items():
+                # days left without a value are removed
+                changes[repo_branch].update(dict.fromkeys(days))
+            if changed_days:
+                commits = Commit.objects.filter(
+                    repository_id__in={repoid for repoid, _ in changed_days},
+                    branch__in={branch for _, branch in changed_days},
+                    timestamp__date__in=set().union(*changed_days.values()),
+                )
+                for repoid, branch, day, value in self.compute(commits):
+                    if day in changed_days.get((repoid, branch), ()):
+                        changes[(repoid, branch)][day] = value
+
+        self._write(changes)
+        refreshed_repoids = list(refreshed) + missing
+        if refreshed_repoids:
+            redis.hset(
+                self._refreshed_key,
+                mapping=dict.fromkeys(refreshed_repoids, started),
+            )
+        log.info(
+            "Refreshed daily rollups",
+            extra=dict(
+                rollup=self.name,
+                built=len(missing),
+                refreshed=len(refreshed),
+                dropped=len(expired),
+                changed_branches=len(changes),
+            ),
+        )
+        return len(changes)
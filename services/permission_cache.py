@@ -0,0 +1,89 @@
+"""
+Permission decisions of git providers, cached for a short while.
+
+Whether a user can read or write a repository, or administers an organization,
+is asked to the provider by the permission checks of every request that isn't
+settled by our own data, e.g. every write to a repository the user doesn't own.
+Decisions are cached by (owner, kind, target): grants for `PERMISSION_CACHE_TTL`,
+denials for `PERMISSION_CACHE_NEGATIVE_TTL` so that access granted on the
+provider shows up quickly.  All the decisions of an owner are invalidated by
+`invalidate_permissions`, e.g. when a membership webhook removes them from a
+repository or an organization.
+"""
+
+import json
+import logging
+import uuid
+from typing import Callable, Hashable, TypeVar
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.helpers.redis import get_redis_connection
+
+log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+PERMISSION_CACHE_TTL = 60 * 5
+PERMISSION_CACHE_NEGATIVE_TTL = 60
+
+# the (can_view, can_edit) permissions of a user on a repository
+REPOSITORY = "repository"
+# whether a user is an admin of an organization
+ADMIN = "admin"
+
+T = TypeVar("T")
+
+
+def _version_key(ownerid: int) -> str:
+    return f"permission_version:{ownerid}"
+
+
+def invalidate_permissions(ownerid: int) -> None:
+    """
+    Invalidates the cached permission decisions of the owner `ownerid`.
+    """
+    if not settings.PERMISSION_CACHE_ENABLED:
+        return
+    try:
+        # never reuse a version, or revoked grants cached under it would be served
+        redis.set(_version_key(ownerid), uuid.uuid4().hex, ex=PERMISSION_CACHE_TTL)
+    except RedisError:
+        log.warning(
+            "Failed to invalidate cached permissions",
+            extra=dict(ownerid=ownerid),
+            exc_info=True,
+        )
+
+
+def cached_permission(
+    ownerid: int,
+    kind: str,
+    target: Hashable,
+    decide: Callable[[], T],
+    granted: Callable[[T], bool] = bool,
+) -> T:
+    """
+    The cached decision of the provider on the permission `kind` of the owner
+    `ownerid` on `target`, calling `decide` for it if it isn't cached.  Decisions
+    must be JSON serializable, `granted` tells whether one grants the permission.
+    """
+    if not settings.PERMISSION_CACHE_ENABLED:
+        return decide()
+
+    try:
+        version = (redis.get(_version_key(ownerid)) or b"").decode()
+        key = f"permission:{ownerid}:{version}:{kind}:{target}"
+        cached = redis.get(key)
+    except RedisError:
+        log.warning("Failed to read cached permission", exc_info=True)
+        return decide()
+    if cached is not None:
+        return json.loads(cached)
+
+    decision = decide()
+    ttl = PERMISSION_CACHE_TTL if granted(decision) else PERMISSION_CACHE_NEGATIVE_TTL
+    try:
+        redis.set(key, json.dumps(decision), ex=ttl)
+    except RedisError:
+        log.warning("Failed to cache permission", exc_info=True)
+    return decision
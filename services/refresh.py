@@ -3,6 +3,7 @@ from json import dumps, loads
 from celery.result import result_from_tuple
 from shared.helpers.redis import get_redis_connection
 
+from services.permission_cache import invalidate_permissions
 from services.task import TaskService, celery_app
 
 
@@ -40,6 +41,8 @@ class RefreshService(object):
         using_integration=False,
         manual_trigger=False,
     ):
+        # the sync is asked for when the owner's access changed on the provider
+        invalidate_permissions(ownerid)
         if self.is_refreshing(ownerid):
             return
         resp = self.task_service.refresh(
@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from shared.django_apps.core.tests.factories import CommitFactory, RepositoryFactory
+
+from services.commit_ancestry import (
+    get_commit_ancestors,
+    get_nearest_ancestor_with_static_analysis,
+)
+from staticanalysis.tests.factories import StaticAnalysisSuiteFactory
+
+
+class CommitAncestryTest(TestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory()
+        self.commits = [CommitFactory(repository=self.repository)]
+        for _ in range(5):
+            self.commits.append(
+                CommitFactory(
+                    repository=self.repository,
+                    parent_commit_id=self.commits[-1].commitid,
+                )
+            )
+        # same sha as the root commit, but in another repository
+        CommitFactory(commitid=self.commits[1].commitid)
+
+    def test_get_commit_ancestors(self):
+        head = self.commits[-1]
+        with CaptureQueriesContext(connection) as queries:
+            ancestors = get_commit_ancestors(head, max_depth=3)
+        assert len(queries) == 1
+        assert [c.commitid for c in ancestors] == [
+            c.commitid for c in reversed(self.commits[2:])
+        ]
+        assert [c.depth for c in ancestors] == [0, 1, 2, 3]
+        assert not any(c.has_related for c in ancestors)
+
+    def test_get_commit_ancestors_end_of_history(self):
+        ancestors = get_commit_ancestors(self.commits[2], max_depth=10)
+        assert [c.commitid for c in ancestors] == [
+            c.commitid for c in reversed(self.commits[:3])
+        ]
+        assert all(c.repository_id == self.repository.repoid for c in ancestors)
+
+    def test_get_nearest_ancestor_with_static_analysis(self):
+        StaticAnalysisSuiteFactory(commit=self.commits[1])
+        StaticAnalysisSuiteFactory(commit=self.commits[3])
+        commit, attempted = get_nearest_ancestor_with_static_analysis(
+            self.commits[-1], max_depth=10
+        )
+        assert commit == self.commits[3]
+        assert commit.has_related
+
+        commit, attempted = get_nearest_ancestor_with_static_analysis(
+            self.commits[-1], max_depth=1
+        )
+        assert commit is None
+        assert [c.commitid for c in attempted] == [
+            self.commits[5].commitid,
+            self.commits[4].commitid,
+        ]
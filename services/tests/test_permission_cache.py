@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+from shared.django_apps.core.tests.factories import OwnerFactory, RepositoryFactory
+
+from api.internal.tests.test_utils import GetAdminProviderAdapter
+from api.shared.permissions import RepositoryPermissionsService, is_admin_on_provider
+from services.permission_cache import (
+    PERMISSION_CACHE_NEGATIVE_TTL,
+    PERMISSION_CACHE_TTL,
+    cached_permission,
+    invalidate_permissions,
+)
+
+
+@override_settings(PERMISSION_CACHE_ENABLED=True)
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("services.permission_cache.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        self.decisions = []
+
+    def _decide(self, decision):
+        def decide():
+            self.decisions.append(decision)
+            return decision
+
+        return decide
+
+    def _ttl(self, kind, target):
+        (key,) = self.redis.keys(f"permission:1:*:{kind}:{target}")
+        return self.redis.ttl(key)
+
+    def test_cached_permission(self):
+        assert cached_permission(1, "admin", 2, self._decide(True)) is True
+        assert cached_permission(1, "admin", 2, self._decide(False)) is True
+        assert self.decisions == [True]
+        assert 0 < self._ttl("admin", 2) <= PERMISSION_CACHE_TTL
+
+    def test_denials_are_cached_for_less_time(self):
+        assert cached_permission(1, "admin", 3, self._decide(False)) is False
+        assert cached_permission(1, "admin", 3, self._decide(True)) is False
+        assert self.decisions == [False]
+        assert 0 < self._ttl("admin", 3) <= PERMISSION_CACHE_NEGATIVE_TTL
+
+    def test_invalidate_permissions(self):
+        cached_permission(1, "admin", 2, self._decide(True))
+        cached_permission(4, "admin", 2, self._decide(True))
+        invalidate_permissions(1)
+
+        assert cached_permission(1, "admin", 2, self._decide(False)) is False
+        assert cached_permission(4, "admin", 2, self._decide(False)) is True
+        assert self.decisions == [True, True, False]
+
+    def test_invalidate_permissions_after_version_expired(self):
+        invalidate_permissions(1)
+        cached_permission(1, "admin", 2, self._decide(True))
+        invalidate_permissions(1)
+        assert cached_permission(1, "admin", 2, self._decide(False)) is False
+
+        # versions never repeat, revoked grants cached under a previous one don't
+        # come back once the current one expires
+        self.redis.delete("permission_version:1")
+        invalidate_permissions(1)
+        assert cached_permission(1, "admin", 2, self._decide(False)) is False
+        assert self.decisions == [True, False, False]
+
+    @override_settings(PERMISSION_CACHE_ENABLED=False)
+    def test_disabled(self):
+        cached_permission(1, "admin", 2, self._decide(True))
+        assert cached_permission(1, "admin", 2, self._decide(False)) is False
+        assert self.redis.keys("permission:*") == []
+
+    @patch("api.shared.repo.repository_accessors.RepoAccessors.get_repo_permissions")
+    def test_repository_permissions(self, get_repo_permissions):
+        get_repo_permissions.return_value = (True, False)
+        owner = OwnerFactory(permission=[])
+        repo = RepositoryFactory(private=True)
+        service = RepositoryPermissionsService()
+
+        assert service.has_write_permissions(owner, repo) is False
+        assert service.has_write_permissions(owner, repo) is False
+        assert service.has_read_permissions(owner, repo) is True
+        get_repo_permissions.assert_called_once_with(owner, repo)
+
+        # the read permission was recorded once
+        owner.refresh_from_db()
+        assert owner.permission == [repo.repoid]
+
+    @patch("api.shared.permissions.get_provider")
+    def test_is_admin_on_provider(self, get_provider):
+        get_provider.return_value = GetAdminProviderAdapter(result=True)
+        user = OwnerFactory()
+        org = OwnerFactory()
+
+        assert is_admin_on_provider(user, org) is True
+        assert is_admin_on_provider(user, org) is True
+        assert get_provider.call_count == 1
@@ -30,48 +30,33 @@ class CommitFromShaSerializerField(serializers.Field):
         return commit
 
 
-def _dict_to_suite_filepath(
-    analysis_suite,
-    repository,
-    archive_service,
-    existing_file_snapshots_mapping,
-    file_dict,
-):
-    if file_dict["file_hash"] in existing_file_snapshots_mapping:
-        db_element = existing_file_snapshots_mapping[file_dict["file_hash"]]
-        was_created = False
-    else:
-        path = MinioEndpoints.static_analysis_single_file.get_path(
-            version="v4",
-            repo_hash=archive_service.storage_hash,
-            location=f"{file_dict['file_hash']}.json",
-        )
-        # Using get or create in the case the object was already
-        # created somewhere else first, but also because get_or_create
-        # is internally get_or_create_or_get, so Django handles the conflicts
-        # that can arise on race conditions on the create step
-        # We might choose to change it if the number of extra GETs become too much
-        (
-            db_element,
-            was_created,
-        ) = StaticAnalysisSingleFileSnapshot.objects.get_or_create(
-            file_hash=file_dict["file_hash"],
-            repository=repository,
-            defaults=dict(
+def _create_missing_file_snapshots(repository, archive_service, file_hashes):
+    """
+    Creates the snapshots for `file_hashes` in a single `INSERT ... ON CONFLICT DO NOTHING`
+    and returns a mapping of file hash to snapshot for all of them.
+    Conflicts can happen when another suite for the same repository created some of the
+    snapshots concurrently, which is why they are fetched again after the insert.
+    """
+    StaticAnalysisSingleFileSnapshot.objects.bulk_create(
+        [
+            StaticAnalysisSingleFileSnapshot(
+                file_hash=file_hash,
+                repository=repository,
                 state_id=StaticAnalysisSingleFileSnapshotState.CREATED.db_id,
-                content_location=path,
-            ),
-        )
-    if was_created:
-        log.debug(
-            "Created new snapshot for repository",
-            extra=dict(repoid=repository.repoid, snapshot_id=db_element.id),
-        )
-    return StaticAnalysisSuiteFilepath(
-        filepath=file_dict["filepath"],
-        file_snapshot=db_element,
-        analysis_suite=analysis_suite,
+                content_location=MinioEndpoints.static_analysis_single_file.get_path(
+                    version="v4",
+                    repo_hash=archive_service.storage_hash,
+                    location=f"{file_hash}.json",
+                ),
+            )
+            for file_hash in file_hashes
+        ],
+        ignore_conflicts=True,
     )
+    created_snapshots = StaticAnalysisSingleFileSnapshot.objects.filter(
+        repository=repository, file_hash__in=file_hashes
+    )
+    return {val.file_hash: val for val in created_snapshots}
 
 
 class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
@@ -97,9 +82,15 @@ class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
         # TODO: This has a built-in ttl of 10 seconds.
         # We have to consider changing it in case customers are doing a few
         # thousand uploads on the first time
-        return self.context["archive_service"].create_presigned_put(
-            obj.file_snapshot.content_location
-        )
+        # Suites often list the same file snapshot under several filepaths,
+        # so each location is only signed once per request
+        presigned_urls = self.context.setdefault("presigned_urls", {})
+        location = obj.file_snapshot.content_location
+        if location not in presigned_urls:
+            presigned_urls[location] = self.context[
+                "archive_service"
+            ].create_presigned_put(location)
+        return presigned_urls[location]
 
 
 class FilepathListField(serializers.ListField):
@@ -135,14 +126,27 @@ class StaticAnalysisSuiteSerializer(serializers.ModelSerializer):
         existing_values = StaticAnalysisSingleFileSnapshot.objects.filter(
             repository=repository, file_hash__in=all_hashes
         )
-        existing_values_mapping = {val.file_hash: val for val in existing_values}
+        file_snapshots_mapping = {val.file_hash: val for val in existing_values}
+        missing_hashes = [
+            file_hash
+            for file_hash in dict.fromkeys(all_hashes)
+            if file_hash not in file_snapshots_mapping
+        ]
+        if missing_hashes:
+            file_snapshots_mapping.update(
+                _create_missing_file_snapshots(
+                    repository, archive_service, missing_hashes
+                )
+            )
+            log.debug(
+                "Created new snapshots for repository",
+                extra=dict(repoid=repository.repoid, created_count=len(missing_hashes)),
+            )
         created_filepaths = [
-            _dict_to_suite_filepath(
-                obj,
-                repository,
-                archive_service,
-                existing_values_mapping,
-                file_dict,
+            StaticAnalysisSuiteFilepath(
+                filepath=file_dict["filepath"],
+                file_snapshot=file_snapshots_mapping[file_dict["file_hash"]],
+                analysis_suite=obj,
             )
             for file_dict in file_metadata_array
         ]
@@ -2,6 +2,8 @@ import re
 from uuid import UUID, uuid4
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import NotFound, ValidationError
 from shared.api_archive.archive import ArchiveService
 from shared.django_apps.core.tests.factories import CommitFactory, RepositoryFactory
@@ -75,6 +77,29 @@ def test_filepath_field(db, mocker):
     }
 
 
+def test_filepath_field_signs_each_location_once(db, mocker):
+    sasfs = StaticAnalysisSingleFileSnapshotFactory.create()
+    first_fp = StaticAnalysisSuiteFilepathFactory.create(
+        filepath="first", file_snapshot=sasfs
+    )
+    second_fp = StaticAnalysisSuiteFilepathFactory.create(
+        filepath="second", file_snapshot=sasfs
+    )
+    fake_archive_service = mocker.MagicMock(
+        create_presigned_put=mocker.MagicMock(return_value="some_url_stuff")
+    )
+    serializer_field = StaticAnalysisSuiteFilepathField(
+        context={
+            "archive_service": fake_archive_service,
+        }
+    )
+    assert serializer_field.get_raw_upload_location(first_fp) == "some_url_stuff"
+    assert serializer_field.get_raw_upload_location(second_fp) == "some_url_stuff"
+    fake_archive_service.create_presigned_put.assert_called_once_with(
+        sasfs.content_location
+    )
+
+
 class TestStaticAnalysisSuiteSerializer(object):
     def test_to_internal_value_missing_filepaths(self, mocker, db):
         commit = CommitFactory.create()
@@ -329,3 +354,38 @@ class TestStaticAnalysisSuiteSerializer(object):
             fourth_filepath.file_snapshot.state_id
             == StaticAnalysisSingleFileSnapshotState.VALID.db_id
         )
+
+    def test_create_number_of_queries_does_not_depend_on_files(self, mocker, db):
+        commit = CommitFactory.create()
+        fake_request = mocker.MagicMock(
+            auth=mocker.MagicMock(
+                get_repositories=mocker.MagicMock(return_value=[commit.repository])
+            )
+        )
+        existing_snapshot = StaticAnalysisSingleFileSnapshotFactory.create(
+            repository=commit.repository
+        )
+
+        def create_suite(number_of_files):
+            serializer = StaticAnalysisSuiteSerializer(
+                context={"request": fake_request}
+            )
+            validated_data = {
+                "commit": commit,
+                "filepaths": [
+                    {
+                        "filepath": "existing.py",
+                        "file_hash": existing_snapshot.file_hash,
+                    }
+                ]
+                + [
+                    {"filepath": f"file_{i}.py", "file_hash": uuid4()}
+                    for i in range(number_of_files)
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                suite = serializer.create(validated_data)
+            assert suite.filepaths.count() == number_of_files + 1
+            return len(queries)
+
+        assert create_suite(2) == create_suite(50)
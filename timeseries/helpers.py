@@ -1,10 +1,10 @@
+import logging
 import math
-from datetime import datetime, timedelta
-from typing import Iterable, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
 
 import sentry_sdk
 from django.conf import settings
-from django.db import connections
 from django.db.models import (
     Avg,
     DateTimeField,
@@ -21,7 +21,9 @@ from django.db.models import (
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast
 from django.utils import timezone
+from redis.exceptions import RedisError
 
+from codecov.db.queries import queries
 from codecov_auth.models import Owner
 from core.models import Commit, Repository
 from services.task import TaskService
@@ -31,6 +33,12 @@ from timeseries.models import (
     MeasurementName,
     MeasurementSummary,
 )
+from timeseries.rollups import coverage_rollup
+
+log = logging.getLogger(__name__)
+
+# TimescaleDB aligns time buckets starting on 2000-01-03
+_BUCKET_ORIGIN = datetime(2000, 1, 3, tzinfo=timezone.utc)
 
 interval_deltas = {
     Interval.INTERVAL_1_DAY: timedelta(days=1),
@@ -39,6 +47,15 @@ interval_deltas = {
 }
 
 
+# procedures can't be prepared, this is only registered for its metrics
+REFRESH_CONTINUOUS_AGGREGATE_QUERY = queries.register(
+    "timeseries.refresh_continuous_aggregate",
+    "CALL refresh_continuous_aggregate(%(continuous_aggregate)s, %(start_date)s, %(end_date)s)",
+    {"continuous_aggregate": "regclass", "start_date": "text", "end_date": "text"},
+    prepare=False,
+)
+
+
 @sentry_sdk.trace
 def refresh_measurement_summaries(start_date: datetime, end_date: datetime) -> None:
     """
@@ -51,10 +68,15 @@ def refresh_measurement_summaries(start_date: datetime, end_date: datetime) -> N
         "timeseries_measurement_summary_7day",
         "timeseries_measurement_summary_30day",
     ]
-    with connections["timeseries"].cursor() as cursor:
-        for cagg in continuous_aggregates:
-            sql = f"CALL refresh_continuous_aggregate('{cagg}', '{start_date.isoformat()}', '{end_date.isoformat()}')"
-            cursor.execute(sql)
+    for cagg in continuous_aggregates:
+        REFRESH_CONTINUOUS_AGGREGATE_QUERY.execute(
+            {
+                "continuous_aggregate": cagg,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+            },
+            using="timeseries",
+        )
 
 
 @sentry_sdk.trace
@@ -93,11 +115,19 @@ def _filter_repos(
 ) -> QuerySet:
     """
     Filter the given generic queryset by a set of (repoid, branch) tuples.
+
+    `repos` only needs `repoid` and `branch` attributes, so named rows from
+    `values_list(..., named=True)` can be passed instead of model instances.
+    The pairs are sent as two array parameters and joined against with
+    `unnest`, which keeps the query and its plan small for owners with
+    thousands of repositories.
     """
     if repos:
         queryset = queryset.extra(
-            where=[f"({column_name}, branch) in %s"],
-            params=[tuple((repo.repoid, repo.branch) for repo in repos)],
+            where=[
+                f"({column_name}, branch) IN (SELECT * FROM unnest(%s::bigint[], %s::text[]))"
+            ],
+            params=[[repo.repoid for repo in repos], [repo.branch for repo in repos]],
         )
     return queryset
 
@@ -178,14 +208,11 @@ def aligned_start_date(interval: Interval, date: datetime) -> datetime:
     """
     delta = interval_deltas[interval]
 
-    # TimescaleDB aligns time buckets starting on 2000-01-03)
-    aligning_date = datetime(2000, 1, 3, tzinfo=timezone.utc)
-
     # number of full intervals between aligning date and the given date
-    intervals_before = math.floor((date - aligning_date) / delta)
+    intervals_before = math.floor((date - _BUCKET_ORIGIN) / delta)
 
     # starting date of time bucket that contains the given date
-    return aligning_date + (intervals_before * delta)
+    return _BUCKET_ORIGIN + (intervals_before * delta)
 
 
 @sentry_sdk.trace
@@ -289,6 +316,112 @@ def coverage_fallback_query(
         return commits.order_by("timestamp_bin")
 
 
+def _utc_date(value: datetime | str) -> date:
+    # dates may come straight from query params
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if timezone.is_naive(value):
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+
+def _coverage_rollup_measurements(
+    days: Dict[Any, Dict[date, list]],
+    interval: Interval,
+    start_date: Optional[datetime | str] = None,
+    end_date: Optional[datetime | str] = None,
+) -> List[dict]:
+    """
+    Same results as `coverage_fallback_query` aggregated from the daily coverage of
+    `coverage_rollup`, with whole days: the days of `start_date` and `end_date` are
+    included entirely.
+    """
+    start_day = _utc_date(start_date) if start_date is not None else None
+    end_day = _utc_date(end_date) if end_date is not None else None
+
+    # the (min, max, sum, count) of every day, across branches
+    totals: Dict[date, list] = {}
+    for branch_days in days.values():
+        for day, (min_, max_, sum_, count) in branch_days.items():
+            if end_day is not None and day > end_day:
+                continue
+            if day in totals:
+                total = totals[day]
+                totals[day] = [
+                    min(total[0], min_),
+                    max(total[1], max_),
+                    total[2] + sum_,
+                    total[3] + count,
+                ]
+            else:
+                totals[day] = [min_, max_, sum_, count]
+
+    bins: Dict[datetime, list] = {}
+    older_bin = None
+    for day in sorted(totals):
+        timestamp_bin = aligned_start_date(
+            interval, datetime.combine(day, datetime.min.time(), timezone.utc)
+        )
+        if start_day is not None and day < start_day:
+            # The first measurement of the specified range may be missing the first
+            # datapoint, the last bin before it is included to be carried forward
+            if older_bin != timestamp_bin:
+                bins.pop(older_bin, None)
+                older_bin = timestamp_bin
+        min_, max_, sum_, count = totals[day]
+        if timestamp_bin in bins:
+            total = bins[timestamp_bin]
+            bins[timestamp_bin] = [
+                min(total[0], min_),
+                max(total[1], max_),
+                total[2] + sum_,
+                total[3] + count,
+            ]
+        else:
+            bins[timestamp_bin] = [min_, max_, sum_, count]
+
+    return [
+        {"timestamp_bin": timestamp_bin, "min": min_, "max": max_, "avg": sum_ / count}
+        for timestamp_bin, (min_, max_, sum_, count) in sorted(bins.items())
+    ]
+
+
+def coverage_rollup_or_fallback(
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    repos: Optional[List[Repository]] = None,
+    branch: Optional[str] = None,
+):
+    """
+    Coverage timeseries served from the interim daily coverage rollups if they're
+    enabled, falling back to querying the primary database directly until they're
+    built.
+    """
+    days = None
+    if settings.DAILY_ROLLUPS_ENABLED:
+        try:
+            days = coverage_rollup.days(
+                [(repo.repoid, branch or repo.branch) for repo in repos]
+            )
+        except RedisError:
+            log.warning("Error reading coverage rollups", exc_info=True)
+    if days is not None:
+        return _coverage_rollup_measurements(days, interval, start_date, end_date)
+
+    if branch is not None:
+        return coverage_fallback_query(
+            interval,
+            start_date=start_date,
+            end_date=end_date,
+            repository_id__in=[repo.repoid for repo in repos],
+            branch=branch,
+        )
+    return coverage_fallback_query(
+        interval, start_date=start_date, end_date=end_date, repos=repos
+    )
+
+
 def _commits_coverage(
     commits_queryset: QuerySet[Commit], interval: Interval
 ) -> QuerySet[Commit]:
@@ -362,11 +495,11 @@ def repository_coverage_measurements_with_fallback(
                 trigger_backfill([dataset])
 
     # we're still backfilling or timeseries is disabled
-    return coverage_fallback_query(
+    return coverage_rollup_or_fallback(
         interval,
         start_date=start_date,
         end_date=end_date,
-        repository_id=repository.pk,
+        repos=[repository],
         branch=branch or repository.branch,
     )
 
@@ -385,8 +518,12 @@ def owner_coverage_measurements_with_fallback(
     directly from the primary database (much slower to query).
     """
     # we can't join across databases so we need to load all this into memory.
-    # select just the needed columns to keep this manageable
-    repos = Repository.objects.filter(repoid__in=repo_ids).only("repoid", "branch")
+    # select just the needed columns as plain rows to keep this manageable
+    repos = list(
+        Repository.objects.filter(repoid__in=repo_ids).values_list(
+            "repoid", "branch", named=True
+        )
+    )
 
     if settings.TIMESERIES_ENABLED:
         datasets = Dataset.objects.filter(
@@ -419,7 +556,7 @@ def owner_coverage_measurements_with_fallback(
         trigger_backfill(created_datasets)
 
     # we're still backfilling or timeseries is disabled
-    return coverage_fallback_query(
+    return coverage_rollup_or_fallback(
         interval,
         start_date=start_date,
         end_date=end_date,
@@ -0,0 +1,40 @@
+"""
+Interim coverage rollups served while TimescaleDB is still backfilling a repository.
+
+The min, max, sum and count of the coverage of the commits of every day of every
+branch are kept in a `DailyRollup`, from which the coverage of any interval aligned
+on days can be aggregated without scanning the commits on the primary database.
+"""
+
+from django.db.models import Count, FloatField, Max, Min, QuerySet, Sum
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from core.models import Commit
+from services.daily_rollups import DailyRollup, DailyValues
+
+
+def _daily_coverage(commits: QuerySet[Commit]) -> DailyValues:
+    rows = (
+        commits.filter(branch__isnull=False, timestamp__isnull=False)
+        .annotate(
+            day=TruncDate("timestamp", tzinfo=timezone.utc),
+            coverage=Cast(KeyTextTransform("c", "totals"), output_field=FloatField()),
+        )
+        .filter(coverage__isnull=False)
+        .order_by()
+        .values("repository_id", "branch", "day")
+        .annotate(
+            min=Min("coverage"),
+            max=Max("coverage"),
+            sum=Sum("coverage"),
+            count=Count("coverage"),
+        )
+        .values_list("repository_id", "branch", "day", "min", "max", "sum", "count")
+    )
+    for repoid, branch, day, *value in rows.iterator():
+        yield repoid, branch, day, value
+
+
+coverage_rollup = DailyRollup("coverage", _daily_coverage)
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from django.conf import settings
 from django.test import TestCase
@@ -67,11 +68,17 @@ class RefreshMeasurementSummariesTest(TestCase):
         )
 
         assert execute.call_count == 3
-        sql_statements = [call[0][0] for call in execute.call_args_list]
-        assert sql_statements == [
-            "CALL refresh_continuous_aggregate('timeseries_measurement_summary_1day', '2022-01-01T00:00:00', '2022-01-02T00:00:00')",
-            "CALL refresh_continuous_aggregate('timeseries_measurement_summary_7day', '2022-01-01T00:00:00', '2022-01-02T00:00:00')",
-            "CALL refresh_continuous_aggregate('timeseries_measurement_summary_30day', '2022-01-01T00:00:00', '2022-01-02T00:00:00')",
+        sql = "CALL refresh_continuous_aggregate(%(continuous_aggregate)s, %(start_date)s, %(end_date)s)"
+        assert [call[0] for call in execute.call_args_list] == [
+            (
+                sql,
+                {
+                    "continuous_aggregate": f"timeseries_measurement_summary_{cagg}",
+                    "start_date": "2022-01-01T00:00:00",
+                    "end_date": "2022-01-02T00:00:00",
+                },
+            )
+            for cagg in ["1day", "7day", "30day"]
         ]
 
 
@@ -396,6 +403,12 @@ class RepositoryCoverageMeasurementsWithFallbackTest(TestCase):
     def setUp(self):
         self.repo = RepositoryFactory()
 
+        redis_patcher = patch(
+            "services.daily_rollups.redis", fakeredis.FakeStrictRedis()
+        )
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
     @patch("timeseries.models.Dataset.is_backfilled")
     def test_backfilled_dataset(self, is_backfilled):
         is_backfilled.return_value = True
@@ -812,6 +825,12 @@ class OwnerCoverageMeasurementsWithFallbackTest(TestCase):
         self.repo1 = RepositoryFactory(author=self.owner)
         self.repo2 = RepositoryFactory(author=self.owner)
 
+        redis_patcher = patch(
+            "services.daily_rollups.redis", fakeredis.FakeStrictRedis()
+        )
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
     @patch("timeseries.models.Dataset.is_backfilled")
     def test_backfilled_datasets(self, is_backfilled):
         is_backfilled.return_value = True
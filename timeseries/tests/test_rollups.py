@@ -0,0 +1,246 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+from django.utils import timezone as django_timezone
+from redis.exceptions import RedisError
+from shared.django_apps.core.tests.factories import (
+    CommitFactory,
+    OwnerFactory,
+    RepositoryFactory,
+)
+
+from core.models import Commit
+from timeseries.helpers import coverage_rollup_or_fallback
+from timeseries.models import Interval
+from timeseries.rollups import coverage_rollup
+
+
+@override_settings(DAILY_ROLLUPS_ENABLED=True)
+class CoverageRollupTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        redis_patcher = patch("services.daily_rollups.redis", self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
+        self.owner = OwnerFactory()
+        self.repo1 = RepositoryFactory(author=self.owner, branch="main")
+        self.repo2 = RepositoryFactory(author=self.owner, branch="main")
+
+    def _commit(self, repo, commitid, timestamp, coverage, branch="main"):
+        commit = CommitFactory(
+            commitid=commitid,
+            repository_id=repo.pk,
+            branch=branch,
+            timestamp=timestamp,
+            totals={"c": coverage} if coverage is not None else None,
+        )
+        Commit.objects.filter(pk=commit.pk).update(updatestamp=django_timezone.now())
+        return commit
+
+    def _measurements(self, interval=Interval.INTERVAL_1_DAY, **kwargs):
+        kwargs.setdefault("repos", [self.repo1])
+        return list(coverage_rollup_or_fallback(interval, **kwargs))
+
+    def test_builds_rollups_of_read_repositories(self):
+        self._commit(
+            self.repo1,
+            "commit0",
+            datetime(2021, 12, 20, 5, tzinfo=timezone.utc),
+            "70.00",
+        )
+        self._commit(
+            self.repo1,
+            "commit1",
+            datetime(2021, 12, 30, 1, tzinfo=timezone.utc),
+            "75.00",
+        )
+        self._commit(
+            self.repo1, "commit2", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        self._commit(
+            self.repo1, "commit3", datetime(2022, 1, 1, 2, tzinfo=timezone.utc), "85.00"
+        )
+        self._commit(
+            self.repo1,
+            "commit4",
+            datetime(2022, 1, 1, 3, tzinfo=timezone.utc),
+            "90.00",
+            branch="other",
+        )
+        self._commit(
+            self.repo1, "commit5", datetime(2022, 1, 2, 1, tzinfo=timezone.utc), None
+        )
+        self._commit(
+            self.repo2, "commit6", datetime(2022, 1, 2, 1, tzinfo=timezone.utc), "90.00"
+        )
+        kwargs = dict(
+            start_date=datetime(2021, 12, 31, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, tzinfo=timezone.utc),
+            repos=[self.repo1, self.repo2],
+        )
+
+        # reads before the first refresh are served from the database
+        self._measurements(**kwargs)
+        assert coverage_rollup.days([(self.repo1.pk, "main")]) is None
+
+        assert coverage_rollup.refresh() == 3
+        with self.assertNumQueries(0):
+            res = self._measurements(**kwargs)
+
+        assert res == [
+            {
+                # the last bin before the start date, to be carried forward
+                "timestamp_bin": datetime(2021, 12, 30, tzinfo=timezone.utc),
+                "min": 75.0,
+                "max": 75.0,
+                "avg": 75.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "min": 80.0,
+                "max": 85.0,
+                "avg": 82.5,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 2, tzinfo=timezone.utc),
+                "min": 90.0,
+                "max": 90.0,
+                "avg": 90.0,
+            },
+        ]
+
+    def test_branch_and_query_param_dates(self):
+        self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        self._commit(
+            self.repo1,
+            "commit2",
+            datetime(2022, 1, 1, 3, tzinfo=timezone.utc),
+            "90.00",
+            branch="other",
+        )
+        self._commit(
+            self.repo1,
+            "commit3",
+            datetime(2022, 1, 2, 3, tzinfo=timezone.utc),
+            "70.00",
+            branch="other",
+        )
+        self._measurements(branch="other")
+        coverage_rollup.refresh()
+
+        res = self._measurements(
+            Interval.INTERVAL_7_DAY,
+            start_date="2021-12-31",
+            end_date=datetime(2022, 1, 3),
+            branch="other",
+        )
+
+        assert res == [
+            {
+                "timestamp_bin": datetime(2021, 12, 27, tzinfo=timezone.utc),
+                "min": 70.0,
+                "max": 90.0,
+                "avg": 80.0,
+            },
+        ]
+
+    def test_refreshes_days_of_updated_commits(self):
+        commit1 = self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        commit2 = self._commit(
+            self.repo1, "commit2", datetime(2022, 1, 2, 1, tzinfo=timezone.utc), "90.00"
+        )
+        self._measurements()
+        coverage_rollup.refresh()
+        version = coverage_rollup.versions([(self.repo1.pk, "main")])
+
+        # commits are picked up by their `updatestamp`, however old their `timestamp`
+        self._commit(
+            self.repo1, "commit0", datetime(2021, 6, 1, 1, tzinfo=timezone.utc), "60.00"
+        )
+        Commit.objects.filter(pk=commit1.pk).update(
+            totals={"c": "70.00"}, updatestamp=django_timezone.now()
+        )
+        # days left without coverage are removed
+        Commit.objects.filter(pk=commit2.pk).update(
+            totals=None, updatestamp=django_timezone.now()
+        )
+
+        assert coverage_rollup.refresh() == 1
+        res = self._measurements()
+        assert [(m["timestamp_bin"].date().isoformat(), m["avg"]) for m in res] == [
+            ("2021-06-01", 60.0),
+            ("2022-01-01", 70.0),
+        ]
+        assert coverage_rollup.versions([(self.repo1.pk, "main")]) != version
+
+    def test_stale_rollups_are_not_read(self):
+        self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        self._measurements()
+        coverage_rollup.refresh()
+        assert coverage_rollup.days([(self.repo1.pk, "main")]) is not None
+
+        self.redis.hset("daily_rollup:coverage:refreshed", self.repo1.pk, 0)
+        assert coverage_rollup.days([(self.repo1.pk, "main")]) is None
+        assert self._measurements() == [
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "min": 80.0,
+                "max": 80.0,
+                "avg": 80.0,
+            },
+        ]
+
+    def test_drops_rollups_not_read(self):
+        self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        self._measurements()
+        coverage_rollup.refresh()
+        assert self.redis.exists(f"daily_rollup:coverage:{self.repo1.pk}:main")
+
+        self.redis.hset("daily_rollup:coverage:read", self.repo1.pk, 0)
+        coverage_rollup.refresh()
+        assert self.redis.keys("daily_rollup:coverage:*") == []
+
+    @patch("services.daily_rollups.DailyRollup.days")
+    def test_falls_back_to_database(self, mocked_days):
+        mocked_days.side_effect = RedisError
+        self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+        self._commit(
+            self.repo1,
+            "commit2",
+            datetime(2022, 1, 1, 3, tzinfo=timezone.utc),
+            "90.00",
+            branch="other",
+        )
+
+        res = self._measurements(branch="main")
+        assert res == [
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "min": 80.0,
+                "max": 80.0,
+                "avg": 80.0,
+            },
+        ]
+
+    @override_settings(DAILY_ROLLUPS_ENABLED=False)
+    def test_disabled(self):
+        self._commit(
+            self.repo1, "commit1", datetime(2022, 1, 1, 1, tzinfo=timezone.utc), "80.00"
+        )
+
+        assert [m["avg"] for m in self._measurements()] == [80.0]
+        # repositories aren't even marked as read
+        assert self.redis.keys("daily_rollup:*") == []
@@ -1,7 +1,9 @@
 import logging
 import re
+import time
+import zlib
 from json import dumps
-from typing import Any, Dict, Optional
+from typing import IO, Any, Dict, Optional
 from urllib.parse import urlparse
 
 import jwt
@@ -12,9 +14,10 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
 from django.http import HttpRequest
 from django.utils import timezone
-from jwt import PyJWKClient, PyJWTError
+from jwt import PyJWK, PyJWKClient, PyJWKClientConnectionError, PyJWTError
 from redis import Redis
 from rest_framework.exceptions import NotFound, Throttled, ValidationError
+from shared.api_archive.archive import ArchiveService
 from shared.github import InvalidInstallationError, get_github_integration_token
 from shared.helpers.redis import get_redis_connection
 from shared.plan.service import PlanService
@@ -54,6 +57,15 @@ _valid_azure_server_uri = r"^https?(?:://|%3A%2F%2F)(?:dev.azure.com(?:/|%2F)[a-
 log = logging.getLogger(__name__)
 redis = get_redis_connection()
 
+# JWKS key sets are cached per issuer for the lifetime of the process, so OIDC
+# uploads don't pay a round trip to the issuer on every request. Unknown `kid`s
+# force a refetch (handled by `PyJWKClient`), and if the issuer is unreachable
+# we keep using the last key we verified for up to `OIDC_JWKS_MAX_STALENESS`.
+OIDC_JWKS_CACHE_TTL = 60 * 15
+OIDC_JWKS_MAX_STALENESS = 60 * 60 * 6
+_oidc_jwks_clients: Dict[str, PyJWKClient] = {}
+_oidc_last_signing_keys: Dict[tuple[str, str], tuple[PyJWK, float]] = {}
+
 
 def parse_params(data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -234,6 +246,42 @@ def parse_params(data: Dict[str, Any]) -> Dict[str, Any]:
     return v.document
 
 
+def get_oidc_jwks_client(jwks_url: str) -> PyJWKClient:
+    jwks_client = _oidc_jwks_clients.get(jwks_url)
+    if jwks_client is None:
+        jwks_client = PyJWKClient(jwks_url, lifespan=OIDC_JWKS_CACHE_TTL)
+        _oidc_jwks_clients[jwks_url] = jwks_client
+    return jwks_client
+
+
+def get_oidc_signing_key(jwks_url: str, token: str) -> PyJWK:
+    """
+    Returns the key that signed `token`, using the process-wide JWKS cache for `jwks_url`.
+    When the JWKS endpoint can't be reached, the last key fetched for the token's `kid`
+    is served instead, as long as it is not older than `OIDC_JWKS_MAX_STALENESS`.
+    """
+    jwks_client = get_oidc_jwks_client(jwks_url)
+    try:
+        signing_key = jwks_client.get_signing_key_from_jwt(token)
+    except PyJWKClientConnectionError:
+        kid = jwt.get_unverified_header(token).get("kid")
+        stale_key, fetched_at = _oidc_last_signing_keys.get(
+            (jwks_url, kid), (None, 0.0)
+        )
+        if stale_key is None or time.monotonic() - fetched_at > OIDC_JWKS_MAX_STALENESS:
+            raise
+        log.warning(
+            "Could not fetch JWKS, using previously fetched signing key",
+            extra=dict(jwks_url=jwks_url, kid=kid),
+        )
+        return stale_key
+    _oidc_last_signing_keys[(jwks_url, signing_key.key_id)] = (
+        signing_key,
+        time.monotonic(),
+    )
+    return signing_key
+
+
 def get_repo_with_github_actions_oidc_token(token: str) -> Repository:
     unverified_contents = jwt.decode(token, options={"verify_signature": False})
     token_issuer = str(unverified_contents.get("iss"))
@@ -249,8 +297,7 @@ def get_repo_with_github_actions_oidc_token(token: str) -> Repository:
         # remove trailing slashes if present
         github_enterprise_url = re.sub(r"/+$", "", github_enterprise_url)
         jwks_url = f"{github_enterprise_url}/_services/token/.well-known/jwks"
-    jwks_client = PyJWKClient(jwks_url)
-    signing_key = jwks_client.get_signing_key_from_jwt(token)
+    signing_key = get_oidc_signing_key(jwks_url, token)
     data = jwt.decode(
         token,
         signing_key.key,
@@ -839,3 +886,85 @@ def generate_upload_prometheus_metrics_labels(
     )
 
     return metrics_tags
+
+
+STREAMING_UPLOAD_CHUNK_SIZE = 1024 * 64
+STREAMING_UPLOAD_PART_SIZE = 1024 * 1024 * 10
+
+
+class StreamingUploadReader:
+    """
+    File-like wrapper around an incoming request stream that reads it in chunks,
+    gzips it on the fly (unless it already is) and enforces a maximum size, so
+    the upload can be handed to the storage client without buffering it whole.
+    """
+
+    def __init__(self, stream: IO[bytes], is_already_gzipped: bool, max_size: int):
+        self.stream = stream
+        self.max_size = max_size
+        self.bytes_read = 0
+        # `wbits=31` makes zlib write a gzip header and trailer
+        self._compressor = None if is_already_gzipped else zlib.compressobj(wbits=31)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self.stream.read(STREAMING_UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                self._eof = True
+                if self._compressor is not None:
+                    self._buffer += self._compressor.flush()
+                break
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_size:
+                raise ValidationError(
+                    f"Upload exceeds the maximum size of {self.max_size} bytes"
+                )
+            if self._compressor is not None:
+                chunk = self._compressor.compress(chunk)
+            self._buffer += chunk
+
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def stream_upload_to_storage(
+    archive_service: ArchiveService,
+    path: str,
+    stream: IO[bytes],
+    is_already_gzipped: bool = False,
+) -> None:
+    """
+    Writes the raw upload read from `stream` to `path` in the archive.
+    When the storage backend is minio, the data is piped through a multipart upload
+    so that worker memory stays flat regardless of the upload size; other backends
+    fall back to reading the (size capped) stream and writing it in one go.
+    """
+    minio_client = getattr(archive_service.storage, "minio_client", None)
+    if minio_client is None:
+        data = stream.read(settings.UPLOAD_MAX_STREAM_SIZE + 1)
+        if len(data) > settings.UPLOAD_MAX_STREAM_SIZE:
+            raise ValidationError(
+                f"Upload exceeds the maximum size of {settings.UPLOAD_MAX_STREAM_SIZE} bytes"
+            )
+        archive_service.write_file(path, data, is_already_gzipped=is_already_gzipped)
+        return
+
+    reader = StreamingUploadReader(
+        stream,
+        is_already_gzipped=is_already_gzipped,
+        max_size=settings.UPLOAD_MAX_STREAM_SIZE,
+    )
+    minio_client.put_object(
+        archive_service.root,
+        path,
+        reader,
+        length=-1,
+        part_size=STREAMING_UPLOAD_PART_SIZE,
+        content_type="text/plain",
+        metadata={"Content-Encoding": "gzip"},
+    )
@@ -0,0 +1,20 @@
+import fakeredis
+import pytest
+
+from upload import helpers
+
+
+@pytest.fixture(autouse=True)
+def clear_oidc_jwks_cache():
+    helpers._oidc_jwks_clients.clear()
+    helpers._oidc_last_signing_keys.clear()
+    yield
+    helpers._oidc_jwks_clients.clear()
+    helpers._oidc_last_signing_keys.clear()
+
+
+@pytest.fixture(autouse=True)
+def tokenless_verification_redis(mocker):
+    redis_server = fakeredis.FakeStrictRedis()
+    mocker.patch("upload.tokenless.tokenless.redis", redis_server)
+    yield redis_server
@@ -1,10 +1,13 @@
+import gzip
 from contextlib import nullcontext
-from unittest.mock import patch
+from io import BytesIO
+from unittest.mock import MagicMock, patch
 
 import jwt
 import pytest
 from django.conf import settings
 from django.test import TestCase
+from jwt import PyJWKClientConnectionError
 from rest_framework.exceptions import Throttled, ValidationError
 from shared.django_apps.core.tests.factories import (
     CommitFactory,
@@ -19,9 +22,13 @@ from billing.helpers import mock_all_plans_and_tiers
 from codecov_auth.models import GithubAppInstallation, Service
 from reports.tests.factories import CommitReportFactory, UploadFactory
 from upload.helpers import (
+    StreamingUploadReader,
     check_commit_upload_constraints,
     determine_repo_for_upload,
+    get_oidc_jwks_client,
+    get_oidc_signing_key,
     ghapp_installation_id_to_use,
+    stream_upload_to_storage,
     try_to_get_best_possible_bot_token,
     validate_activated_repo,
     validate_upload,
@@ -346,3 +353,85 @@ def test_determine_repo_for_upload_github_actions(codecov_vcr):
         determine_repo_for_upload({"token": token, "service": "github-actions"})
         == repository
     )
+
+
+def test_get_oidc_jwks_client_is_reused_per_url():
+    url = "https://token.actions.githubusercontent.com/.well-known/jwks"
+    client = get_oidc_jwks_client(url)
+    assert get_oidc_jwks_client(url) is client
+    assert (
+        get_oidc_jwks_client("https://example.com/_services/token/.well-known/jwks")
+        is not client
+    )
+
+
+@patch("upload.helpers.PyJWKClient")
+def test_get_oidc_signing_key_serves_stale_key_when_jwks_unreachable(
+    mock_jwks_client,
+):
+    url = "https://token.actions.githubusercontent.com/.well-known/jwks"
+    token = jwt.encode({}, "secret", algorithm="HS256", headers={"kid": "abc"})
+    signing_key = MagicMock(key_id="abc")
+    get_key = mock_jwks_client.return_value.get_signing_key_from_jwt
+    get_key.return_value = signing_key
+    assert get_oidc_signing_key(url, token) is signing_key
+
+    get_key.side_effect = PyJWKClientConnectionError("unreachable")
+    assert get_oidc_signing_key(url, token) is signing_key
+    mock_jwks_client.assert_called_once()
+
+    with patch("upload.helpers.OIDC_JWKS_MAX_STALENESS", -1):
+        with pytest.raises(PyJWKClientConnectionError):
+            get_oidc_signing_key(url, token)
+
+
+def test_streaming_upload_reader_gzips_in_chunks():
+    data = b"coverage report\n" * 100000
+    reader = StreamingUploadReader(
+        BytesIO(data), is_already_gzipped=False, max_size=len(data)
+    )
+    parts = []
+    while part := reader.read(1024 * 1024):
+        parts.append(part)
+    assert gzip.decompress(b"".join(parts)) == data
+
+
+def test_streaming_upload_reader_already_gzipped():
+    data = gzip.compress(b"coverage report")
+    reader = StreamingUploadReader(
+        BytesIO(data), is_already_gzipped=True, max_size=1000
+    )
+    assert reader.read() == data
+
+
+def test_streaming_upload_reader_enforces_max_size():
+    reader = StreamingUploadReader(
+        BytesIO(b"x" * 1000), is_already_gzipped=False, max_size=999
+    )
+    with pytest.raises(ValidationError):
+        reader.read()
+
+
+def test_stream_upload_to_storage_uses_multipart_upload(settings):
+    settings.UPLOAD_MAX_STREAM_SIZE = 1000
+    archive_service = MagicMock(root="archive")
+    stream_upload_to_storage(archive_service, "some/path.txt", BytesIO(b"report"))
+    args, kwargs = archive_service.storage.minio_client.put_object.call_args
+    assert args[:2] == ("archive", "some/path.txt")
+    assert gzip.decompress(args[2].read()) == b"report"
+    assert kwargs["length"] == -1
+    archive_service.write_file.assert_not_called()
+
+
+def test_stream_upload_to_storage_without_minio(settings):
+    settings.UPLOAD_MAX_STREAM_SIZE = 1000
+    archive_service = MagicMock(storage=object())
+    stream_upload_to_storage(
+        archive_service, "some/path.txt", BytesIO(b"report"), is_already_gzipped=True
+    )
+    archive_service.write_file.assert_called_once_with(
+        "some/path.txt", b"report", is_already_gzipped=True
+    )
+
+    with pytest.raises(ValidationError):
+        stream_upload_to_storage(archive_service, "some/path.txt", BytesIO(b"x" * 1001))
@@ -44,7 +44,9 @@ from upload.helpers import (
     parse_params,
     validate_upload,
 )
+from upload.tokenless.azure import TokenlessAzureHandler
 from upload.tokenless.tokenless import TokenlessUploadHandler
+from upload.tokenless.travis import TokenlessTravisHandler
 from utils.encryption import encryptor
 
 
@@ -966,7 +968,7 @@ class UploadHandlerRouteTest(APITestCase):
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    @patch("shared.api_archive.archive.ArchiveService.write_file")
+    @patch("upload.views.legacy.stream_upload_to_storage")
     @patch("upload.views.legacy.get_redis_connection")
     @patch("upload.views.legacy.uuid4")
     @patch("upload.views.legacy.dispatch_upload_task")
@@ -978,7 +980,7 @@ class UploadHandlerRouteTest(APITestCase):
         mock_dispatch_upload,
         mock_uuid4,
         mock_get_redis,
-        mock_write_file,
+        mock_stream_upload,
     ):
         class MockRepoProviderAdapter:
             async def get_commit(self, commit, token):
@@ -1020,9 +1022,10 @@ class UploadHandlerRouteTest(APITestCase):
         repo_hash = archive_service.get_archive_hash(self.repo)
         expected_url = f"v4/raw/{datetime}/{repo_hash}/b521e55aef79b101f48e2544837ca99a7fa3bf6b/dec1f00b-1883-40d0-afd6-6dcb876510be.txt"
 
-        mock_write_file.assert_called_with(
-            expected_url, b"coverage report", is_already_gzipped=False
-        )
+        args, kwargs = mock_stream_upload.call_args
+        assert args[1] == expected_url
+        assert args[2].read() == b"coverage report"
+        assert kwargs == {"is_already_gzipped": False}
         assert mock_dispatch_upload.call_args[0][0] == {
             "commit": "b521e55aef79b101f48e2544837ca99a7fa3bf6b",
             "token": "a03e5d02-9495-4413-b0d8-05651bb2e842",
@@ -1049,7 +1052,7 @@ class UploadHandlerRouteTest(APITestCase):
             == "https://app.codecov.io/github/codecovtest/upload-test-repo/commit/b521e55aef79b101f48e2544837ca99a7fa3bf6b"
         )
 
-    @patch("shared.api_archive.archive.ArchiveService.write_file")
+    @patch("upload.views.legacy.stream_upload_to_storage")
     @patch("upload.views.legacy.get_redis_connection")
     @patch("upload.views.legacy.uuid4")
     @patch("upload.views.legacy.dispatch_upload_task")
@@ -1061,7 +1064,7 @@ class UploadHandlerRouteTest(APITestCase):
         mock_dispatch_upload,
         mock_uuid4,
         mock_get_redis,
-        mock_write_file,
+        mock_stream_upload,
     ):
         class MockRepoProviderAdapter:
             async def get_commit(self, commit, token):
@@ -1103,9 +1106,10 @@ class UploadHandlerRouteTest(APITestCase):
         repo_hash = archive_service.get_archive_hash(self.repo)
         expected_url = f"v4/raw/{datetime}/{repo_hash}/b521e55aef79b101f48e2544837ca99a7fa3bf6b/dec1f00b-1883-40d0-afd6-6dcb876510be.txt"
 
-        mock_write_file.assert_called_with(
-            expected_url, b"coverage report", is_already_gzipped=False
-        )
+        args, kwargs = mock_stream_upload.call_args
+        assert args[1] == expected_url
+        assert args[2].read() == b"coverage report"
+        assert kwargs == {"is_already_gzipped": False}
         assert mock_dispatch_upload.call_args[0][0] == {
             "commit": "b521e55aef79b101f48e2544837ca99a7fa3bf6b",
             "token": "a03e5d02-9495-4413-b0d8-05651bb2e842",
@@ -3224,3 +3228,58 @@ class UploadHandlerGithubActionsTokenlessTest(TestCase):
         assert [line.strip() for line in e.value.args[0].split("\n")] == [
             line.strip() for line in expected_error.split("\n")
         ]
+
+
+class TokenlessVerificationCacheTest(TestCase):
+    params = {
+        "job": 732059764,
+        "owner": "codecov",
+        "repo": "codecov-api",
+        "commit": "3be5c52bd748c508a7e96993c02cf3518c816e84",
+    }
+
+    @patch.object(TokenlessTravisHandler, "verify", return_value="github")
+    def test_successful_verification_is_shared(self, mock_verify):
+        for _ in range(3):
+            assert (
+                TokenlessUploadHandler("travis", self.params).verify_upload()
+                == "github"
+            )
+        assert mock_verify.call_count == 1
+
+        TokenlessUploadHandler(
+            "travis", {**self.params, "job": 732059765}
+        ).verify_upload()
+        assert mock_verify.call_count == 2
+
+    @patch.object(
+        TokenlessTravisHandler, "verify", side_effect=NotFound("Travis run is stale")
+    )
+    def test_failed_verification_is_cached(self, mock_verify):
+        for _ in range(2):
+            with pytest.raises(NotFound) as e:
+                TokenlessUploadHandler("travis", self.params).verify_upload()
+            assert e.value.args[0] == "Travis run is stale"
+        assert mock_verify.call_count == 1
+
+    @patch.object(TokenlessAzureHandler, "verify", return_value="github")
+    def test_azure_build_is_normalized_on_cache_hits(self, mock_verify):
+        params = {
+            **self.params,
+            "build": "20190725.8+1",
+            "project": "public",
+            "server_uri": "https://dev.azure.com/example/",
+        }
+        for _ in range(2):
+            upload_params = dict(params)
+            assert (
+                TokenlessUploadHandler("azure_pipelines", upload_params).verify_upload()
+                == "github"
+            )
+            assert upload_params["build"] == "20190725.8 1"
+        assert mock_verify.call_count == 1
+
+        TokenlessUploadHandler(
+            "azure_pipelines", {**params, "project": "other"}
+        ).verify_upload()
+        assert mock_verify.call_count == 2
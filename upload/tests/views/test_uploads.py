@@ -26,6 +26,7 @@ from reports.models import (
     UploadFlagMembership,
 )
 from reports.tests.factories import CommitReportFactory, UploadFactory
+from upload.helpers import OIDC_JWKS_CACHE_TTL
 from upload.views.uploads import (
     CanDoCoverageUploadsPermission,
     UploadViews,
@@ -941,7 +942,8 @@ class TestGitlabEnterpriseOIDC(APITestCase):
         )
         assert response.status_code == 201
         mock_jwks_client.assert_called_with(
-            "https://example.com/_services/token/.well-known/jwks"
+            "https://example.com/_services/token/.well-known/jwks",
+            lifespan=OIDC_JWKS_CACHE_TTL,
         )
 
     @patch("upload.views.uploads.AnalyticsService")
@@ -13,6 +13,16 @@ log = logging.getLogger(__name__)
 
 
 class TokenlessAzureHandler(BaseTokenlessUploadHandler):
+    verified_params = BaseTokenlessUploadHandler.verified_params + (
+        "project",
+        "server_uri",
+    )
+
+    @classmethod
+    def normalize_params(cls, upload_params):
+        if upload_params.get("build"):
+            upload_params["build"] = upload_params["build"].replace("+", " ")
+
     def get_build(self) -> Dict[str, Any]:
         try:
             response = requests.get(
@@ -101,7 +111,7 @@ class TokenlessAzureHandler(BaseTokenlessUploadHandler):
 
         # Check build ID
         build["buildNumber"] = build["buildNumber"].replace("+", " ")
-        self.upload_params["build"] = self.upload_params.get("build").replace("+", " ")
+        self.normalize_params(self.upload_params)
         if build["buildNumber"] != self.upload_params.get("build"):
             log.warning(
                 f"Azure build numbers do not match. Upload build number: {self.upload_params.get('build')}, Azure build number: {self.upload_params.get('buildNumber')}",
@@ -2,9 +2,19 @@ from rest_framework.exceptions import NotFound
 
 
 class BaseTokenlessUploadHandler(object):
+    # the upload params `verify` checks against the CI provider
+    verified_params = ("build", "job", "owner", "repo", "commit")
+
     def __init__(self, upload_params):
         self.upload_params = upload_params
 
+    @classmethod
+    def normalize_params(cls, upload_params):
+        """
+        Normalizes `upload_params`, in place, the way `verify` compares them to
+        the CI provider's.
+        """
+
     def check_repository_type(self, repository_type):
         if repository_type.lower() not in ("github", "gitlab", "bitbucket"):
             raise NotFound(
@@ -18,6 +18,7 @@ class TokenlessGithubActionsHandler(BaseTokenlessUploadHandler):
     actions_token = settings.GITHUB_ACTIONS_TOKEN
     client_id = settings.GITHUB_CLIENT_ID
     client_secret = settings.GITHUB_CLIENT_SECRET
+    verified_params = BaseTokenlessUploadHandler.verified_params + ("pr",)
 
     def log_warning(self, message: str) -> None:
         log.warning(
@@ -1,6 +1,9 @@
+import json
 import logging
 
+from redis.exceptions import RedisError
 from rest_framework.exceptions import NotFound
+from shared.helpers.redis import get_redis_connection
 
 from upload.tokenless.appveyor import TokenlessAppveyorHandler
 from upload.tokenless.azure import TokenlessAzureHandler
@@ -10,6 +13,14 @@ from upload.tokenless.github_actions import TokenlessGithubActionsHandler
 from upload.tokenless.travis import TokenlessTravisHandler
 
 log = logging.getLogger(__name__)
+redis = get_redis_connection()
+
+# Every shard of a CI build verifies the same build against the CI provider, so
+# verification results are shared through redis for a short while. Failures are
+# cached for less time so a build that wasn't visible yet can be retried soon.
+VERIFICATION_CACHE_TTL = 60
+VERIFICATION_FAILURE_CACHE_TTL = 20
+VERIFICATION_LOCK_TIMEOUT = 30
 
 
 class TokenlessUploadHandler(object):
@@ -26,6 +37,17 @@ class TokenlessUploadHandler(object):
         self.verifier = self.ci_verifiers.get(ci_type.replace("-", "_"), None)
         self.upload_params = upload_params
         self.ci_type = ci_type
+        if self.verifier is not None:
+            # normalized upfront so that cached verifications normalize them too,
+            # and so that they key the verification as `verify` sees them
+            self.verifier.normalize_params(upload_params)
+            self.verification_cache_key = "tokenless_verification:{}:{}".format(
+                ci_type.replace("-", "_"),
+                ":".join(
+                    f"{param}={upload_params.get(param)}"
+                    for param in self.verifier.verified_params
+                ),
+            )
 
     def verify_upload(self):
         log.info(
@@ -37,9 +59,74 @@ class TokenlessUploadHandler(object):
                 owner=self.upload_params.get("owner"),
             ),
         )
+        if self.verifier is None:
+            raise NotFound(
+                "Your CI provider is not compatible with tokenless uploads, please upload using your repository token to resolve this."
+            )
+
+        cached = self._get_cached_verification()
+        if cached is not None:
+            return self._result_from_cache(cached)
+
+        # single-flight: concurrent uploads from the same build wait for the
+        # first one to talk to the CI provider and then reuse its result
+        lock = redis.lock(
+            f"{self.verification_cache_key}:lock",
+            timeout=VERIFICATION_LOCK_TIMEOUT,
+            blocking_timeout=VERIFICATION_LOCK_TIMEOUT,
+        )
+        try:
+            acquired = lock.acquire()
+        except RedisError:
+            log.warning(
+                "Unable to lock tokenless verification, verifying without lock",
+                extra=dict(ci_type=self.ci_type, job=self.upload_params.get("job")),
+                exc_info=True,
+            )
+            acquired = False
+        try:
+            if acquired:
+                cached = self._get_cached_verification()
+                if cached is not None:
+                    return self._result_from_cache(cached)
+            return self._verify_and_cache()
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except RedisError:
+                    pass
+
+    def _verify_and_cache(self):
         try:
-            return self.verifier(self.upload_params).verify()
+            service = self.verifier(self.upload_params).verify()
         except TypeError:
             raise NotFound(
                 "Your CI provider is not compatible with tokenless uploads, please upload using your repository token to resolve this."
             )
+        except NotFound as e:
+            self._set_cached_verification(
+                {"error": str(e.detail)}, VERIFICATION_FAILURE_CACHE_TTL
+            )
+            raise
+        self._set_cached_verification({"service": service}, VERIFICATION_CACHE_TTL)
+        return service
+
+    def _result_from_cache(self, cached: dict) -> str:
+        if "error" in cached:
+            raise NotFound(cached["error"])
+        return cached["service"]
+
+    def _get_cached_verification(self) -> dict | None:
+        try:
+            cached = redis.get(self.verification_cache_key)
+        except RedisError:
+            log.warning("Error reading tokenless verification cache", exc_info=True)
+            return None
+        return json.loads(cached) if cached else None
+
+    def _set_cached_verification(self, value: dict, ttl: int) -> None:
+        try:
+            redis.set(self.verification_cache_key, json.dumps(value), ex=ttl)
+        except RedisError:
+            log.warning("Error writing tokenless verification cache", exc_info=True)
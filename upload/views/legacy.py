@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import re
+from io import BytesIO
 from json import dumps
 from uuid import uuid4
 
@@ -35,6 +36,7 @@ from upload.helpers import (
     insert_commit,
     parse_headers,
     parse_params,
+    stream_upload_to_storage,
     validate_upload,
 )
 from upload.metrics import API_UPLOAD_COUNTER
@@ -229,8 +231,11 @@ class UploadHandler(APIView, ShelterMixin):
             encoding = request.META.get("HTTP_X_CONTENT_ENCODING") or request.META.get(
                 "HTTP_CONTENT_ENCODING"
             )
-            archive_service.write_file(
-                path, request.body, is_already_gzipped=(encoding == "gzip")
+            stream_upload_to_storage(
+                archive_service,
+                path,
+                request.stream or BytesIO(),
+                is_already_gzipped=(encoding == "gzip"),
             )
 
             log.info(
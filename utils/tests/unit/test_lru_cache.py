@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from utils.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_default_and_delete():
+    cache = LRUCache()
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+    cache.set("a", None)
+    assert "a" in cache
+    cache.delete("a")
+    assert "a" not in cache
+    cache.delete("a")
+
+
+@patch("utils.lru_cache.time.monotonic")
+def test_lru_cache_ttl(mocked_monotonic):
+    mocked_monotonic.return_value = 100
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+
+    mocked_monotonic.return_value = 109
+    assert cache.get("a") == 1
+
+    mocked_monotonic.return_value = 110
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_clear():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.clear()
+    assert len(cache) == 0
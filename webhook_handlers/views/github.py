@@ -23,6 +23,7 @@ from codecov_auth.models import (
 )
 from core.models import Branch, Commit, Pull, Repository
 from services.billing import BillingService
+from services.permission_cache import invalidate_permissions
 from services.task import TaskService
 from utils.config import get_config
 from webhook_handlers.constants import (
@@ -646,6 +647,7 @@ class GithubWebhookHandler(APIView):
 
             # Force a sync for the removed member to remove their access to the
             # org and its private repositories.
+            invalidate_permissions(member.ownerid)
             TaskService().refresh(
                 ownerid=member.ownerid,
                 username=member.username,
@@ -719,6 +721,7 @@ class GithubWebhookHandler(APIView):
                 )
                 return Response(status=status.HTTP_404_NOT_FOUND)
 
+            invalidate_permissions(member.ownerid)
             try:
                 member.permission.remove(repo.repoid)
                 member.save(update_fields=["permission"])